@@ -1,5 +1,8 @@
 import logging
-from ..utils import possible_attacks
+
+import numpy
+
+from ..utils import possible_attack_indices
 
 from dicewars.client.ai_driver import BattleCommand, EndTurnCommand
 
@@ -26,22 +29,16 @@ class AI:
     def ai_turn(self, board, nb_moves_this_turn, nb_turns_this_game, time_left):
         """AI agent's turn
 
-        Creates a list with all possible moves along with associated strength
-        difference. The list is then sorted in descending order with respect to
-        the SD. A move with the highest SD is then made unless the highest
+        Computes the strength difference (SD) of all possible moves at once.
+        The first move with the highest SD is then made unless the highest
         SD is lower than zero - in this case, the agent ends its turn.
         """
+        sources, targets = possible_attack_indices(board, self.player_name)
+        strength_differences = board.compact.dice[sources].astype(int) - board.compact.dice[targets]
 
-        attacks = []
-        for source, target in possible_attacks(board, self.player_name):
-            area_dice = source.get_dice()
-            strength_difference = area_dice - target.get_dice()
-            attack = [source.get_name(), target.get_name(), strength_difference]
-            attacks.append(attack)
-
-        attacks = sorted(attacks, key=lambda attack: attack[2], reverse=True)
-
-        if attacks and attacks[0][2] >= 0:
-            return BattleCommand(attacks[0][0], attacks[0][1])
+        if len(sources):
+            best = numpy.argmax(strength_differences)
+            if strength_differences[best] >= 0:
+                return BattleCommand(int(sources[best]), int(targets[best]))
 
         return EndTurnCommand()
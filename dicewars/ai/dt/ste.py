@@ -1,6 +1,8 @@
 import logging
-from ..utils import possible_attacks
-from ..utils import probability_of_holding_area, probability_of_successful_attack
+
+import numpy
+
+from ..utils import AttackBatch
 
 from dicewars.client.ai_driver import BattleCommand, EndTurnCommand
 
@@ -50,14 +52,9 @@ class AI:
         It includes all moves that either have hold probability higher or equal to 20 %
         or have strength of eight dice.
         """
-        turns = []
-
-        for source, target in possible_attacks(self.board, self.player_name):
-            area_name = source.get_name()
-            atk_power = source.get_dice()
-            atk_prob = probability_of_successful_attack(self.board, area_name, target.get_name())
-            hold_prob = atk_prob * probability_of_holding_area(self.board, target.get_name(), atk_power - 1, self.player_name)
-            if hold_prob >= 0.2 or atk_power == 8:
-                turns.append([area_name, target.get_name(), hold_prob])
+        attacks = AttackBatch(self.board, self.player_name)
+        hold_probs = attacks.attack_probability * attacks.hold_probability
+        preferred = numpy.flatnonzero((hold_probs >= 0.2) | (attacks.atk_dice == 8))
+        order = preferred[numpy.argsort(-hold_probs[preferred], kind='stable')]
 
-        return sorted(turns, key=lambda turn: turn[2], reverse=True)
+        return [list(attacks.attack(i)) + [hold_probs[i]] for i in order]
@@ -1,8 +1,11 @@
 import logging
-from ..utils import probability_of_holding_area, probability_of_successful_attack
-from ..utils import possible_attacks
 
-from dicewars.client.ai_driver import BattleCommand, EndTurnCommand
+import numpy
+
+from ..planning import AttackPlanner, plan_attacks
+from ..utils import AttackBatch
+
+from dicewars.client.ai_driver import AttackPlanCommand, EndTurnCommand
 
 
 class AI:
@@ -12,6 +15,9 @@ class AI:
     attack and hold over the area until next turn higher a 20% in two-player
     gams and higher than 40% in four-player games. In addition, it prefers
     attacks initiated from its largest region.
+
+    The preferred moves are planned once per turn and sent to the server as
+    a whole, since no attack of the plan depends on the result of another.
     """
     def __init__(self, player_name, board, players_order):
         """
@@ -39,30 +45,34 @@ class AI:
             self.score_weight = 2
 
         self.largest_region = []
+        self.planner = AttackPlanner(player_name, self.plan_turn)
 
     def ai_turn(self, board, nb_moves_this_turn, nb_turns_this_game, time_left):
         """AI agent's turn
 
-        Agent gets a list preferred moves and makes such move that has the
-        highest estimated hold probability, prefering moves initiated from within
-        the largest region. If there is no such move, the agent ends it's turn.
+        Agent plans the preferred moves, ordered by the estimated hold
+        probability and prefering moves initiated from within the largest
+        region, and sends them all at once. If there is no such move, the
+        agent ends it's turn.
         """
         self.board = board
-        self.logger.debug("Looking for possible turns.")
-        self.get_largest_region()
-        turns = self.possible_turns()
-
-        if turns:
-            turn = turns[0]
-            self.logger.debug("Possible turn: {}".format(turn))
-            hold_prob = turn[3]
-            self.logger.debug("{0}->{1} attack and hold probabiliy {2}".format(turn[0], turn[1], hold_prob))
+        attacks = self.planner.next_plan(board, nb_turns_this_game)
 
-            return BattleCommand(turn[0], turn[1])
+        if attacks:
+            self.logger.debug("Planned attacks {}".format(attacks))
+            return AttackPlanCommand(attacks, stop_on_loss=False)
 
         self.logger.debug("No more plays.")
         return EndTurnCommand()
 
+    def plan_turn(self, board):
+        """Plan the preferred moves, see possible_turns()
+        """
+        self.board = board
+        self.logger.debug("Looking for possible turns.")
+        self.get_largest_region()
+        return plan_attacks(board, ((turn[0], turn[1]) for turn in self.possible_turns()))
+
     def possible_turns(self):
         """Find possible turns with hold higher hold probability than treshold
 
@@ -71,18 +81,13 @@ class AI:
         the preference of these moves. The list is sorted in descending order with
         respect to preference * hold probability
         """
-        turns = []
-        for source, target in possible_attacks(self.board, self.player_name):
-            atk_power = source.get_dice()
-            atk_prob = probability_of_successful_attack(self.board, source.get_name(), target.get_name())
-            hold_prob = atk_prob * probability_of_holding_area(self.board, target.get_name(), atk_power - 1, self.player_name)
-            if hold_prob >= self.treshold or atk_power == 8:
-                preference = hold_prob
-                if source.get_name() in self.largest_region:
-                    preference *= self.score_weight
-                turns.append([source.get_name(), target.get_name(), preference, hold_prob])
-
-        return sorted(turns, key=lambda turn: turn[2], reverse=True)
+        attacks = AttackBatch(self.board, self.player_name)
+        hold_probs = attacks.attack_probability * attacks.hold_probability
+        preferences = numpy.where(numpy.isin(attacks.sources, self.largest_region), hold_probs * self.score_weight, hold_probs)
+        preferred = numpy.flatnonzero((hold_probs >= self.treshold) | (attacks.atk_dice == 8))
+        order = preferred[numpy.argsort(-preferences[preferred], kind='stable')]
+
+        return [list(attacks.attack(i)) + [preferences[i], hold_probs[i]] for i in order]
 
     def get_largest_region(self):
         """Get size of the largest region, including the areas within
@@ -0,0 +1,86 @@
+import numpy
+
+from ..utils import ATTACK_TABLES, possible_attack_indices, sigmoid
+
+
+class WPMEvaluator:
+    """Win probability model evaluated for all moves at once
+
+    The features of all outcomes of all moves are rows of one matrix, so the
+    win probabilities come from a single matrix-vector product. Dice of
+    players are summed once per state of the board.
+
+    Attributes
+    ----------
+    weights : numpy.ndarray
+    players_order : list of int
+        Names of players in the order of their features
+    """
+    def __init__(self, weights, players_order):
+        self.weights = weights
+        self.players_order = players_order
+        self.index_of_player = {player: i for i, player in enumerate(players_order)}
+        self.dice_version = None
+        self.dice = None
+
+    def player_dice(self, board):
+        """Total dice of every player, in the order of players_order
+
+        Returns
+        -------
+        numpy.ndarray of int
+        """
+        compact = board.compact
+        version = (compact.owner.tobytes(), compact.dice.tobytes())
+        if version != self.dice_version:
+            self.dice_version = version
+            totals = numpy.bincount(
+                compact.owner[compact.names], weights=compact.dice[compact.names],
+                minlength=max(self.players_order) + 1
+            )
+            self.dice = totals.astype(int)[self.players_order]
+        return self.dice
+
+    def attacks(self, board, player_name):
+        """Possible attacks of a player with what the evaluation needs of them
+
+        Returns
+        -------
+        sources, targets : numpy.ndarray of int
+            Names of attacking and attacked areas, ordered as by possible_attacks()
+        atk_dice, def_dice : numpy.ndarray of int
+        opponents : numpy.ndarray of int
+            Positions of owners of the targets in players_order
+        attack_probability : numpy.ndarray of float
+        """
+        compact = board.compact
+        sources, targets = possible_attack_indices(board, player_name)
+        atk_dice = compact.dice[sources].astype(int)
+        def_dice = compact.dice[targets].astype(int)
+        index = numpy.zeros(max(self.players_order) + 1, dtype=int)
+        index[self.players_order] = numpy.arange(len(self.players_order))
+        opponents = index[compact.owner[targets]]
+        return sources, targets, atk_dice, def_dice, opponents, ATTACK_TABLES.success[atk_dice, def_dice]
+
+    def expands_region(self, board, region, sources, targets):
+        """Whether attacks start in the region or conquer an area next to it
+
+        Parameters
+        ----------
+        region : list of int
+            Names of areas
+        sources, targets : numpy.ndarray of int
+        """
+        in_region = numpy.zeros(len(board.compact.owner), dtype=bool)
+        in_region[region] = True
+        return in_region[sources] | in_region[board.compact.neighbour_matrix[targets]].any(axis=1)
+
+    def outcome_matrix(self, features, nb_rows):
+        """Matrix with the features in every row, to be updated per outcome
+        """
+        return numpy.tile(numpy.asarray(features, dtype=float), (nb_rows, 1))
+
+    def win_probabilities(self, features):
+        """Estimated win probability for every row of features
+        """
+        return sigmoid(features @ self.weights)
@@ -1,8 +1,7 @@
 import numpy
 import logging
 
-from ..utils import probability_of_successful_attack, sigmoid
-from ..utils import possible_attacks
+from .wpm import WPMEvaluator
 
 from dicewars.client.ai_driver import BattleCommand, EndTurnCommand
 
@@ -61,7 +60,7 @@ class AI:
                             -0.31785557, -0.16003507, -0.31410674, -0.16487769,
                             -0.33290964, -0.12624279, -0.33843017, -0.14888412]),
         }[self.players]
-        numpy.warnings.filterwarnings('ignore')
+        self.evaluator = WPMEvaluator(self.weights, self.players_order)
 
     def ai_turn(self, board, nb_moves_this_turn, nb_turns_this_game, time_left):
         """AI agent's turn
@@ -94,99 +93,62 @@ class AI:
         self.logger.debug("Don't want to attack anymore.")
         return EndTurnCommand()
 
-    def get_features(self, end_turn=False):
-        """Get features associated with a move
+    def get_features(self, dice, score):
+        """Get features of the current state
 
         Parameters
         ----------
-        end_turn : bool
-            The move is ending the turn
+        dice : numpy.ndarray of int
+            Dice of players in the order of players_order
+        score : int
+            Score standing for every player
 
         Returns
         -------
-        list of int
+        numpy.ndarray
         """
-        features = []
-        for p in self.players_order:
-            score = numpy.log(self.get_score_by_player(p) + 1)
-            if end_turn and p == self.player_name:
-                dice = numpy.log(self.board.get_player_dice(p) + self.get_score_by_player(p) + 1)
-            else:
-                dice = numpy.log(self.board.get_player_dice(p) + 1)
-            features.append(score)
-            features.append(dice)
+        features = numpy.empty(2 * len(self.players_order))
+        features[0::2] = numpy.log(score + 1)
+        features[1::2] = numpy.log(dice + 1)
         return features
 
     def possible_turns(self):
         """Get list of possible turns with the associated improvement
         in estimated win probability. The list is sorted in descending order
         with respect to the improvement.
+
+        The features of the current state, of ending the turn and of winning
+        and losing every attack are evaluated together.
         """
-        turns = []
         name = self.player_name
-
-        features = self.get_features()
-        wp_start = numpy.log(sigmoid(numpy.dot(numpy.array(features), self.weights)))
-
-        end_features = self.get_features(end_turn=True)
-        wp_end = numpy.log(sigmoid(numpy.dot(numpy.array(end_features), self.weights)))
-        improvement = wp_end - wp_start
-
-        turns.append(['end', 0, improvement])
-
-        for source, target in possible_attacks(self.board, self.player_name):
-            area_name = source.get_name()
-            atk_power = source.get_dice()
-            def_power = target.get_dice()
-            opponent_name = target.get_owner_name()
-            # check whether the attack would expand the largest region
-            increase_score = False
-            if area_name in self.largest_region:
-                increase_score = True
-            else:
-                for n in target.get_adjacent_areas():
-                    if n in self.largest_region:
-                        increase_score = True
-                        break
-
-            a_dice = self.board.get_player_dice(name)
-            a_score = self.get_score_by_player(name)
-            if increase_score:
-                a_score += 1
-
-            atk_dice = {
-                "current": a_dice,
-                "win": a_dice + a_score,
-                "loss": a_dice + a_score - atk_power + 1,
-            }
-
-            d_dice = self.board.get_player_dice(opponent_name)
-            def_dice = {
-                "loss": d_dice,
-                "win": d_dice - def_power,
-            }
-
-            atk_prob = probability_of_successful_attack(self.board, area_name, target.get_name())
-            opponent_idx = self.players_order.index(opponent_name) * 2 + 1
-            win_features = [d for d in features]
-            win_features[1] = numpy.log(atk_dice["win"] + 1)
-            win_features[opponent_idx] = numpy.log(def_dice["win"] + 1)
-
-            loss_features = [d for d in features]
-            loss_features[1] = numpy.log(atk_dice["loss"] + 1)
-            loss_features[opponent_idx] = numpy.log(def_dice["loss"] + 1)
-
-            wp_win = sigmoid(numpy.dot(numpy.array(win_features), self.weights))
-            wp_loss = sigmoid(numpy.dot(numpy.array(loss_features), self.weights))
-
-            wp_win = sigmoid(numpy.dot(numpy.array(win_features), self.weights))
-            wp_loss = sigmoid(numpy.dot(numpy.array(loss_features), self.weights))
-            total_prob = (wp_win * atk_prob) + (wp_loss * (1.0 - atk_prob))
-            wp_atk = numpy.log(total_prob)
-
-            improvement = wp_atk - wp_start
-            turns.append([area_name, target.get_name(), improvement])
-
+        dice = self.evaluator.player_dice(self.board)
+        score = self.get_score_by_player(name)
+        sources, targets, atk_dice, def_dice, opponents, atk_prob = self.evaluator.attacks(self.board, name)
+        nb_attacks = len(sources)
+
+        features = self.evaluator.outcome_matrix(self.get_features(dice, score), 2 + 2 * nb_attacks)
+        features[1, 1] = numpy.log(dice[0] + score + 1)
+
+        # check whether the attacks would expand the largest region
+        a_score = score + self.evaluator.expands_region(self.board, self.largest_region, sources, targets)
+        wins = numpy.arange(2, 2 + nb_attacks)
+        losses = wins + nb_attacks
+        opponent_idx = opponents * 2 + 1
+        features[wins, 1] = numpy.log(dice[0] + a_score + 1)
+        features[wins, opponent_idx] = numpy.log(dice[opponents] - def_dice + 1)
+        features[losses, 1] = numpy.log(dice[0] + a_score - atk_dice + 1 + 1)
+        features[losses, opponent_idx] = numpy.log(dice[opponents] + 1)
+
+        wp = self.evaluator.win_probabilities(features)
+        wp_start = numpy.log(wp[0])
+        total_prob = (wp[wins] * atk_prob) + (wp[losses] * (1.0 - atk_prob))
+        improvements = numpy.log(total_prob) - wp_start
+
+        turns = [['end', 0, numpy.log(wp[1]) - wp_start]]
+        turns.extend(
+            [source, target, improvement]
+            for source, target, improvement in zip(sources.tolist(), targets.tolist(), improvements)
+        )
         return sorted(turns, key=lambda turn: turn[2], reverse=True)
 
     def get_score_by_player(self, player_name, skip_area=None):
@@ -1,12 +1,19 @@
 import numpy
 import logging
 
-from ..utils import probability_of_successful_attack, sigmoid
-from ..utils import possible_attacks
+from .wpm import WPMEvaluator
 
 from dicewars.client.ai_driver import BattleCommand, EndTurnCommand
 
 
+def log_or_zero(x):
+    """Logarithm with 0 instead of minus infinity for zero
+    """
+    with numpy.errstate(divide='ignore'):
+        logarithm = numpy.log(x)
+    return numpy.where(numpy.isinf(logarithm), 0, logarithm)
+
+
 class AI:
     """Agent using Win Probability Maximization (WPM) using logarithms of player dice
 
@@ -49,7 +56,7 @@ class AI:
             7: numpy.array([0.72382109, -0.39171476, -0.39423241, -0.38390144, -0.38401564, -0.36980703, -0.36138501]),
             8: numpy.array([0.72340846, -0.35936507, -0.38758583, -0.35487285, -0.37616735, -0.37974499, -0.34989554, -0.37451491]),
         }[self.players]
-        numpy.warnings.filterwarnings('ignore')
+        self.evaluator = WPMEvaluator(self.weights, self.players_order)
 
     def ai_turn(self, board, nb_moves_this_turn, nb_turns_this_game, time_left):
         """AI agent's turn
@@ -86,89 +93,38 @@ class AI:
         """Get list of possible turns with the associated improvement
         in estimated win probability. The list is sorted in descending order
         with respect to the improvement.
+
+        The features of the current state, of ending the turn and of winning
+        and losing every attack are evaluated together.
         """
-        turns = []
         name = self.player_name
-
-        features = []
-        for p in self.players_order:
-            dice = numpy.log(self.board.get_player_dice(p))
-            if numpy.isinf(dice):
-                dice = 0
-            features.append(dice)
-
-        wp_start = numpy.log(sigmoid(numpy.dot(numpy.array(features), self.weights)))
-
-        end_features = [d for d in features]
-        end_features[0] = numpy.log(self.board.get_player_dice(name) + self.get_score_by_player(name))
-        if numpy.isinf(end_features[0]):
-            end_features[0] = 0
-        wp_end = numpy.log(sigmoid(numpy.dot(numpy.array(end_features), self.weights)))
-        improvement = wp_end - wp_start
-
-        turns.append(['end', 0, improvement])
-
-        for source, target in possible_attacks(self.board, self.player_name):
-            area_name = source.get_name()
-            atk_power = source.get_dice()
-            def_power = target.get_dice()
-            opponent_name = target.get_owner_name()
-            # check whether the attack would expand the largest region
-            increase_score = False
-            if area_name in self.largest_region:
-                increase_score = True
-            else:
-                for n in target.get_adjacent_areas():
-                    if n in self.largest_region:
-                        increase_score = True
-                        break
-
-            a_dice = self.board.get_player_dice(name)
-            a_score = self.get_score_by_player(name)
-            if increase_score:
-                a_score += 1
-
-            atk_dice = {
-                "current": a_dice,
-                "win": a_dice + a_score,
-                "loss": a_dice + a_score - atk_power + 1,
-            }
-
-            d_dice = self.board.get_player_dice(opponent_name)
-            def_dice = {
-                "loss": d_dice,
-                "win": d_dice - def_power,
-            }
-
-            atk_prob = probability_of_successful_attack(self.board, area_name, target.get_name())
-            opponent_idx = self.players_order.index(opponent_name)
-            win_features = [d for d in features]
-            win_features[0] = numpy.log(atk_dice["win"])
-            if numpy.isinf(win_features[0]):
-                win_features[0] = 0
-            win_features[opponent_idx] = numpy.log(def_dice["win"])
-            if numpy.isinf(win_features[opponent_idx]):
-                win_features[opponent_idx] = 0
-
-            loss_features = [d for d in features]
-            loss_features[0] = numpy.log(atk_dice["loss"])
-            if numpy.isinf(loss_features[0]):
-                loss_features[0] = 0
-            loss_features[opponent_idx] = numpy.log(def_dice["loss"])
-            if numpy.isinf(loss_features[opponent_idx]):
-                loss_features[opponent_idx] = 0
-
-            wp_win = sigmoid(numpy.dot(numpy.array(win_features), self.weights))
-            wp_loss = sigmoid(numpy.dot(numpy.array(loss_features), self.weights))
-
-            wp_win = sigmoid(numpy.dot(numpy.array(win_features), self.weights))
-            wp_loss = sigmoid(numpy.dot(numpy.array(loss_features), self.weights))
-            total_prob = (wp_win * atk_prob) + (wp_loss * (1.0 - atk_prob))
-            wp_atk = numpy.log(total_prob)
-
-            improvement = wp_atk - wp_start
-            turns.append([area_name, target.get_name(), improvement])
-
+        dice = self.evaluator.player_dice(self.board)
+        score = self.get_score_by_player(name)
+        sources, targets, atk_dice, def_dice, opponents, atk_prob = self.evaluator.attacks(self.board, name)
+        nb_attacks = len(sources)
+
+        features = self.evaluator.outcome_matrix(log_or_zero(dice), 2 + 2 * nb_attacks)
+        features[1, 0] = log_or_zero(dice[0] + score)
+
+        # check whether the attacks would expand the largest region
+        a_score = score + self.evaluator.expands_region(self.board, self.largest_region, sources, targets)
+        wins = numpy.arange(2, 2 + nb_attacks)
+        losses = wins + nb_attacks
+        features[wins, 0] = log_or_zero(dice[0] + a_score)
+        features[wins, opponents] = log_or_zero(dice[opponents] - def_dice)
+        features[losses, 0] = log_or_zero(dice[0] + a_score - atk_dice + 1)
+        features[losses, opponents] = log_or_zero(dice[opponents])
+
+        wp = self.evaluator.win_probabilities(features)
+        wp_start = numpy.log(wp[0])
+        total_prob = (wp[wins] * atk_prob) + (wp[losses] * (1.0 - atk_prob))
+        improvements = numpy.log(total_prob) - wp_start
+
+        turns = [['end', 0, numpy.log(wp[1]) - wp_start]]
+        turns.extend(
+            [source, target, improvement]
+            for source, target, improvement in zip(sources.tolist(), targets.tolist(), improvements)
+        )
         return sorted(turns, key=lambda turn: turn[2], reverse=True)
 
     def get_score_by_player(self, player_name, skip_area=None):
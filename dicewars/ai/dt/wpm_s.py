@@ -1,8 +1,7 @@
 import numpy
 import logging
 
-from ..utils import probability_of_successful_attack, sigmoid
-from ..utils import possible_attacks
+from .wpm import WPMEvaluator
 
 from dicewars.client.ai_driver import BattleCommand, EndTurnCommand
 
@@ -49,6 +48,7 @@ class AI:
             7: numpy.array([0.27109102, -0.18051686, -0.18232428, -0.17905882, -0.17959111, -0.17958394, -0.17634735]),
             8: numpy.array([0.277179, -0.16852433, -0.18678373, -0.17492631, -0.17996621, -0.1790844, -0.16977776, -0.18876063]),
         }[self.players]
+        self.evaluator = WPMEvaluator(self.weights, self.players_order)
 
     def ai_turn(self, board, nb_moves_this_turn, nb_turns_this_game, time_left):
         """AI agent's turn
@@ -76,48 +76,31 @@ class AI:
     def possible_turns(self):
         """Get list of possible turns with the associated improvement
         in estimated win probability
+
+        The features of the current state and of winning every attack are
+        evaluated together.
         """
-        turns = []
+        score = self.get_score_by_player(self.player_name)
+        self.get_largest_region()
+        sources, targets, atk_dice, _, opponents, atk_prob = self.evaluator.attacks(self.board, self.player_name)
 
-        features = []
-        for p in self.players_order:
-            features.append(self.get_score_by_player(p))
-        win_prob = numpy.log(sigmoid(numpy.dot(numpy.array(features), self.weights)))
+        increase_score = self.evaluator.expands_region(self.board, self.largest_region, sources, targets)
+        candidates = increase_score | (atk_dice == 8)
+        sources, targets, atk_prob = sources[candidates], targets[candidates], atk_prob[candidates]
 
-        self.get_largest_region()
+        # the score stands for every player; skipping the target, which is not
+        # the agent's, leaves the opponent's one the same
+        features = self.evaluator.outcome_matrix([score] * len(self.players_order), 1 + len(sources))
+        features[1:, 0] += increase_score[candidates]
 
-        for source, target in possible_attacks(self.board, self.player_name):
-            area_name = source.get_name()
-            atk_power = source.get_dice()
-
-            opponent_name = target.get_owner_name()
-
-            increase_score = False
-            if area_name in self.largest_region:
-                increase_score = True
-            else:
-                for n in target.get_adjacent_areas():
-                    if n in self.largest_region:
-                        increase_score = True
-                        break
-
-            if increase_score or atk_power == 8:
-                atk_prob = numpy.log(probability_of_successful_attack(self.board, area_name, target.get_name()))
-                new_features = []
-                for p in self.players_order:
-                    idx = self.players_order.index(p)
-                    if p == self.player_name:
-                        new_features.append(features[idx] + 1 if increase_score else features[idx])
-                    elif p == opponent_name:
-                        new_features.append(self.get_score_by_player(p, skip_area=target.get_name()))
-                    else:
-                        new_features.append(features[idx])
-                new_win_prob = numpy.log(sigmoid(numpy.dot(numpy.array(new_features), self.weights)))
-                total_prob = new_win_prob + atk_prob
-                improvement = total_prob - win_prob
-                if improvement >= -1:
-                    turns.append([area_name, target.get_name(), improvement])
+        win_prob = numpy.log(self.evaluator.win_probabilities(features))
+        improvements = win_prob[1:] + numpy.log(atk_prob) - win_prob[0]
 
+        turns = [
+            [source, target, improvement]
+            for source, target, improvement in zip(sources.tolist(), targets.tolist(), improvements)
+            if improvement >= -1
+        ]
         return sorted(turns, key=lambda turn: turn[2], reverse=True)
 
     def get_score_by_player(self, player_name, skip_area=None):
@@ -0,0 +1 @@
+from .ai import AI
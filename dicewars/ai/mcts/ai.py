@@ -0,0 +1,99 @@
+import logging
+import random
+
+from dicewars.ai.timing import TimeManager
+from dicewars.client.ai_driver import BattleCommand, EndTurnCommand
+
+from .simulator import SimulatedGame
+from .uct import END_TURN, UCTSearch, most_visited
+
+
+PONDER_ITERATIONS = 16  # per call of ponder()
+PRIOR_WEIGHT = 64.0  # visits all the pondered statistics are worth at most
+
+
+class AI:
+    """Agent choosing attacks by Monte Carlo Tree Search
+
+    The tree of the current turn is kept between moves, so the search goes
+    on from the subtree of the position reached by the last battle.
+
+    While other players are on turn, the AI ponders: it plays their turns
+    out by the policy of rollouts and searches the positions reached at the
+    start of its turn. The statistics of its first actions in them start the
+    search of its next turn.
+    """
+    def __init__(self, player_name, board, players_order):
+        self.player_name = player_name
+        self.players_order = players_order
+        self.logger = logging.getLogger('AI')
+
+        self.rng = random.Random(random.getrandbits(64))
+        self.time_manager = TimeManager()
+        self.search = UCTSearch(player_name, self.rng)
+        self.turn = None
+
+        self.priors = {}
+        self.ponder_board = None
+        self.ponder_game = None
+
+    def ai_turn(self, board, nb_moves_this_turn, nb_turns_this_game, time_left):
+        deadline = self.time_manager.start_move(time_left, nb_moves_this_turn, nb_turns_this_game)
+
+        if nb_turns_this_game != self.turn:
+            self.turn = nb_turns_this_game
+            self.search.root = None
+        game = SimulatedGame(board.compact, self.players_order, self.player_name)
+        if not self.search.set_root(game):
+            self.logger.debug("Starting a new tree")
+        if self.priors:
+            self.search.seed_root(self.priors, PRIOR_WEIGHT)
+            self.priors = {}
+        if self.search.root.actions == [END_TURN]:
+            return EndTurnCommand()
+
+        action = most_visited(self.search_root(deadline))
+        if action is END_TURN:
+            return EndTurnCommand()
+        return BattleCommand(*action)
+
+    def search_root(self, deadline):
+        """Search from the root till the deadline
+
+        Returns
+        -------
+        dict
+            (visits, value) of actions from the root
+        """
+        nb_rollouts = self.search.nb_rollouts
+        while not deadline.expired():
+            self.search.iterate()
+        self.logger.debug("{} rollouts in {:.3f}s".format(self.search.nb_rollouts - nb_rollouts, deadline.budget))
+        return self.search.root_statistics()
+
+    def ponder(self, board, current_player, cancelled):
+        """Search a position the next turn may start from, see AIDriver.start_pondering()
+        """
+        if board is not self.ponder_board:
+            self.ponder_board = board
+            self.ponder_game = SimulatedGame(board.compact, self.players_order, current_player)
+        if not self.ponder_game.masks[self.player_name]:
+            return False
+
+        game = self.ponder_game.copy()
+        game.play_until(self.player_name, self.rng)
+        if game.winner is not None or not game.masks[self.player_name]:
+            return True
+
+        search = UCTSearch(
+            self.player_name, self.rng, self.search.exploration, self.search.rollout_turns, self.search.min_probability
+        )
+        search.set_root(game)
+        for _ in range(PONDER_ITERATIONS):
+            if cancelled.is_set():
+                break
+            search.iterate()
+        for action, (visits, value) in search.root_statistics().items():
+            total_visits, total_value = self.priors.get(action, (0, 0.0))
+            self.priors[action] = (total_visits + visits, total_value + value)
+        return True
@@ -0,0 +1,185 @@
+import multiprocessing
+import os
+import random
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from dicewars.ai.timing import Deadline
+
+from .ai import AI as SerialAI
+from .simulator import SimulatedGame
+from .uct import UCTSearch
+
+
+NB_WORKERS_VARIABLE = 'DICEWARS_MCTS_WORKERS'
+WORKER_MARGIN = 0.01  # seconds for a worker to send its statistics back
+REPLY_TIMEOUT = 0.05  # seconds of waiting for a late worker
+JOIN_TIMEOUT = 1.0
+
+
+def default_nb_workers():
+    """Number of workers of an AI not given it explicitly
+
+    It is taken from the environment variable DICEWARS_MCTS_WORKERS, which
+    launchers playing several games at once set to share the cores among
+    them. Otherwise, the workers use all the cores but the one of the AI.
+    """
+    if os.environ.get(NB_WORKERS_VARIABLE):
+        return int(os.environ[NB_WORKERS_VARIABLE])
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def shared_arrays(shared, nb_slots):
+    """Owners and dice of a CompactBoard backed by a block of shared memory
+    """
+    owner = np.ndarray(nb_slots, dtype=np.int8, buffer=shared.buf)
+    dice = np.ndarray(nb_slots, dtype=np.int8, buffer=shared.buf, offset=nb_slots)
+    return owner, dice
+
+
+def search_worker(connection, parent_connection, compact, shared_name, player_name, players_order, seed):
+    """Serve requests for searches from the position in the shared memory
+
+    Every request is a tuple (move, turn, budget) answered by the move and
+    the statistics of the root. A tree is kept for the whole turn, like in
+    the serial AI. The worker ends on None or when the AI goes away.
+    """
+    parent_connection.close()
+    shared = shared_memory.SharedMemory(name=shared_name)
+    compact = compact.copy()
+    compact.owner, compact.dice = shared_arrays(shared, len(compact.owner))
+    search = UCTSearch(player_name, random.Random(seed))
+    turn = None
+
+    try:
+        while True:
+            try:
+                request = connection.recv()
+            except EOFError:
+                break
+            if request is None:
+                break
+
+            move, request_turn, budget = request
+            deadline = Deadline(budget - WORKER_MARGIN)
+            if request_turn != turn:
+                turn = request_turn
+                search.root = None
+            search.set_root(SimulatedGame(compact, players_order, player_name))
+            while not deadline.expired():
+                search.iterate()
+            connection.send((move, search.root_statistics()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        compact.owner = compact.dice = None
+        shared.close()
+        connection.close()
+
+
+def shut_down(processes, connections, shared):
+    """Stop the workers and release the shared memory
+    """
+    for connection in connections:
+        try:
+            connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        connection.close()
+    for process in processes:
+        process.join(JOIN_TIMEOUT)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+    shared.close()
+    shared.unlink()
+
+
+class AI(SerialAI):
+    """Monte Carlo Tree Search run in parallel from the root
+
+    A pool of worker processes is started by the constructor. For every
+    move, the position is written into shared memory, the workers and this
+    process search it independently and their root statistics are summed.
+
+    The workers are stopped by close(), called by the AIDriver at the end
+    of the game, and also when the AI is garbage collected or the
+    interpreter exits. A worker ends on its own as soon as its connection
+    to the AI breaks, so none is left behind even if the AI is killed.
+
+    A daemonic process, e.g. a worker of multiprocessing.Pool playing games
+    of a tournament, cannot have children, so there the AI searches alone.
+    """
+    def __init__(self, player_name, board, players_order, nb_workers=None):
+        """
+        Parameters
+        ----------
+        nb_workers : int
+            Number of worker processes, see default_nb_workers() for the default.
+            With none, the AI searches on its own like the serial one.
+        """
+        super().__init__(player_name, board, players_order)
+        if nb_workers is None:
+            nb_workers = default_nb_workers()
+        if nb_workers and multiprocessing.current_process().daemon:
+            self.logger.warning("Searching without workers, a daemonic process cannot start them")
+            nb_workers = 0
+
+        nb_slots = len(board.compact.owner)
+        self.shared = shared_memory.SharedMemory(create=True, size=2 * nb_slots)
+        self.owner, self.dice = shared_arrays(self.shared, nb_slots)
+
+        context = multiprocessing.get_context('fork')
+        self.processes = []
+        self.connections = []
+        self.finalizer = weakref.finalize(self, shut_down, self.processes, self.connections, self.shared)
+        for _ in range(nb_workers):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(
+                target=search_worker,
+                args=(worker_connection, connection, board.compact, self.shared.name,
+                      player_name, players_order, self.rng.getrandbits(64)),
+                daemon=True,
+            )
+            self.connections.append(connection)
+            try:
+                process.start()
+            except BaseException:
+                worker_connection.close()
+                self.finalizer()
+                raise
+            worker_connection.close()
+            self.processes.append(process)
+
+        self.move = 0
+
+    def search_root(self, deadline):
+        self.move += 1
+        game = self.search.root.game
+        self.owner[:] = game.owner
+        self.dice[:] = game.dice
+        for connection in self.connections:
+            connection.send((self.move, self.turn, deadline.remaining()))
+
+        statistics = super().search_root(deadline)
+
+        for connection in self.connections:
+            while connection.poll(max(0.0, deadline.remaining()) + REPLY_TIMEOUT):
+                move, worker_statistics = connection.recv()
+                if move != self.move:
+                    continue  # late answer to an earlier move
+                for action, (visits, value) in worker_statistics.items():
+                    total_visits, total_value = statistics.get(action, (0, 0.0))
+                    statistics[action] = (total_visits + visits, total_value + value)
+                break
+            else:
+                self.logger.warning("A worker did not finish its search in time")
+
+        return statistics
+
+    def close(self):
+        """Stop the workers
+        """
+        self.finalizer()
@@ -0,0 +1,231 @@
+from dicewars.ai.utils import ATTACK_TABLES
+from dicewars.server.game.game import MAX_PASS_ROUNDS, max_reinforcement
+
+
+MAX_DICE = 8
+
+
+class SimulatedGame:
+    """Game played by the server's rules on lists instead of Areas
+
+    Battles are decided by one draw against the probability of success, which
+    is equivalent to rolling the dice, as only the winner matters. Reserves
+    and the passing rule follow Game.end_turn() and Game.check_win_condition().
+
+    Attributes
+    ----------
+    owner, dice : list of int
+        Owner and dice of every area, indexed by names of areas
+    masks : dict of int: int
+        Bitmask of areas of every player
+    reserves : dict of int: int
+        Dice in reserve of every player
+    players_order : list of int
+    current_player : int
+    nb_consecutive_end_of_turns : int
+    winner : int
+        Name of the winner, -1 for a game cancelled by passing, None while it goes on
+    """
+    def __init__(self, compact, players_order, current_player, reserves=None, nb_consecutive_end_of_turns=0):
+        """
+        Parameters
+        ----------
+        compact : CompactBoard
+        players_order : list of int
+        current_player : int
+        reserves : dict of int: int
+            Reserves of players, none by default
+        nb_consecutive_end_of_turns : int
+        """
+        self.names = compact.names.tolist()
+        self.neighbours = [compact.get_neighbours(area).tolist() for area in range(len(compact.owner))]
+        self.adjacency_masks = compact.adjacency_masks
+        self.success = ATTACK_TABLES.success.tolist()
+        self.nb_areas = len(self.names)
+        self.max_reinforcement = max_reinforcement(self.nb_areas)
+
+        self.owner = compact.owner.tolist()
+        self.dice = compact.dice.tolist()
+        self.players_order = list(players_order)
+        self.masks = {player: 0 for player in self.players_order}
+        for area in self.names:
+            self.masks[self.owner[area]] |= 1 << area
+        self.reserves = dict(reserves) if reserves else {player: 0 for player in self.players_order}
+        self.current_player = current_player
+        self.nb_consecutive_end_of_turns = nb_consecutive_end_of_turns
+        self.winner = None
+
+    def copy(self):
+        game = object.__new__(SimulatedGame)
+        game.__dict__.update(self.__dict__)
+        game.owner = list(self.owner)
+        game.dice = list(self.dice)
+        game.masks = dict(self.masks)
+        game.reserves = dict(self.reserves)
+        return game
+
+    def position(self):
+        """Owners and dice of all areas, identifying the position within a turn
+        """
+        return tuple(self.owner), tuple(self.dice)
+
+    def nb_players_alive(self):
+        return sum(1 for mask in self.masks.values() if mask)
+
+    def player_areas(self, player):
+        return [area for area in self.names if self.owner[area] == player]
+
+    def possible_attacks(self, player):
+        """Pairs of areas the player can attack from and to
+        """
+        owner = self.owner
+        dice = self.dice
+        return [
+            (source, target)
+            for source in self.names if owner[source] == player and dice[source] > 1
+            for target in self.neighbours[source] if owner[target] != player
+        ]
+
+    def attack_probability(self, source, target):
+        return self.success[self.dice[source]][self.dice[target]]
+
+    def battle(self, source, target, succeeded):
+        """Carry out a battle with a known result, as Game.battle() does
+
+        Parameters
+        ----------
+        source, target : int
+        succeeded : bool
+            Whether the attacker won
+        """
+        self.nb_consecutive_end_of_turns = 0
+        atk_dice = self.dice[source]
+        self.dice[source] = 1
+        if not succeeded:
+            return
+
+        attacker = self.owner[source]
+        defender = self.owner[target]
+        self.owner[target] = attacker
+        self.dice[target] = atk_dice - 1
+        self.masks[attacker] |= 1 << target
+        self.masks[defender] &= ~(1 << target)
+
+        if bin(self.masks[attacker]).count('1') == self.nb_areas:
+            self.winner = attacker
+
+    def random_battle(self, source, target, rng):
+        """Carry out a battle with a random result
+
+        Returns
+        -------
+        bool
+            Whether the attacker won
+        """
+        succeeded = rng.random() < self.success[self.dice[source]][self.dice[target]]
+        self.battle(source, target, succeeded)
+        return succeeded
+
+    def largest_region(self, player):
+        available = self.masks[player]
+        largest = 0
+        while available:
+            region = frontier = available & -available
+            while frontier:
+                reachable = 0
+                while frontier:
+                    lowest = frontier & -frontier
+                    reachable |= self.adjacency_masks[lowest.bit_length() - 1]
+                    frontier ^= lowest
+                frontier = reachable & available & ~region
+                region |= frontier
+            largest = max(largest, bin(region).count('1'))
+            available &= ~region
+        return largest
+
+    def end_turn(self, rng):
+        """Reinforce the current player and pass the turn, as Game.end_turn() does
+        """
+        player = self.current_player
+        self.nb_consecutive_end_of_turns += 1
+
+        reinforcement = min(self.reserves[player] + self.largest_region(player), self.max_reinforcement)
+        dice = self.dice
+        areas = [area for area in self.player_areas(player) if dice[area] < MAX_DICE]
+        while reinforcement and areas:
+            i = rng.randrange(len(areas))
+            area = areas[i]
+            dice[area] += 1
+            reinforcement -= 1
+            if dice[area] == MAX_DICE:
+                areas[i] = areas[-1]
+                areas.pop()
+        self.reserves[player] = reinforcement
+
+        idx = self.players_order.index(player)
+        while True:
+            idx = (idx + 1) % len(self.players_order)
+            if self.masks[self.players_order[idx]]:
+                break
+        self.current_player = self.players_order[idx]
+
+        if self.nb_consecutive_end_of_turns // self.nb_players_alive() == MAX_PASS_ROUNDS:
+            self.winner = -1
+
+    def play_turn(self, rng):
+        """Play the rest of the turn of the current player by a quick policy
+
+        Every area with more dice than some enemy neighbour, or with eight of
+        them, attacks the weakest such neighbour and goes on from the
+        conquered area. The turn is ended afterwards.
+        """
+        player = self.current_player
+        owner = self.owner
+        dice = self.dice
+        sources = [area for area in self.names if owner[area] == player and dice[area] > 1]
+        rng.shuffle(sources)
+
+        for source in sources:
+            while self.winner is None and dice[source] > 1:
+                atk_dice = dice[source]
+                target = None
+                for adj in self.neighbours[source]:
+                    if owner[adj] != player and (dice[adj] < atk_dice or atk_dice == MAX_DICE):
+                        if target is None or dice[adj] < dice[target]:
+                            target = adj
+                if target is None:
+                    break
+                if not self.random_battle(source, target, rng):
+                    break
+                source = target
+
+        if self.winner is None:
+            self.end_turn(rng)
+
+    def play_until(self, player, rng):
+        """Play turns of the other players by play_turn() until the player is on turn
+        """
+        while self.winner is None and self.masks[player] and self.current_player != player:
+            self.play_turn(rng)
+
+    def evaluate(self, player):
+        """Value of the position for a player between 0 and 1
+
+        A won game is worth 1, a lost one 0. Otherwise, it is the share of the
+        player in the dice all players get at the end of their turns.
+        """
+        if self.winner == player:
+            return 1.0
+        if not self.masks[player] or self.winner is not None and self.winner != -1:
+            return 0.0
+        regions = {other: self.largest_region(other) for other, mask in self.masks.items() if mask}
+        return regions[player] / sum(regions.values())
+
+    def rollout(self, player, rng, max_turns):
+        """Play on for at most max_turns turns and evaluate the result for the player
+        """
+        for _ in range(max_turns):
+            if self.winner is not None or not self.masks[player]:
+                break
+            self.play_turn(rng)
+        return self.evaluate(player)
@@ -0,0 +1,196 @@
+import math
+
+
+END_TURN = None
+
+
+class Node:
+    """Position within the turn of the searching player
+
+    Attributes
+    ----------
+    game : SimulatedGame
+    actions : list
+        Attacks as pairs of areas, and END_TURN
+    children : dict
+        ActionNode of every tried action
+    visits : int
+    """
+    def __init__(self, game, actions):
+        self.game = game
+        self.actions = actions
+        self.untried = list(reversed(actions))
+        self.children = {}
+        self.visits = 0
+
+
+class ActionNode:
+    """Action taken from a Node, with its statistics
+
+    An attack leads to one of two positions, depending on its result.
+    Ending the turn leads to no node, it is evaluated by rollouts.
+    """
+    def __init__(self, action, probability):
+        self.action = action
+        self.probability = probability
+        self.outcomes = {}
+        self.visits = 0
+        self.value = 0.0
+
+
+class UCTSearch:
+    """Upper Confidence bounds applied to Trees over the turn of a player
+
+    The tree spans the attacks of one turn; ending the turn and everything
+    after it is evaluated by rollouts of SimulatedGame.
+    """
+    def __init__(self, player, rng, exploration=0.5, rollout_turns=32, min_probability=0.5):
+        """
+        Parameters
+        ----------
+        player : int
+            Name of the searching player
+        rng : random.Random
+        exploration : float
+            Exploration constant of UCB1
+        rollout_turns : int
+            Number of turns played by a rollout before evaluating the position
+        min_probability : float
+            Attacks less likely to succeed are not considered, unless from eight dice
+        """
+        self.player = player
+        self.rng = rng
+        self.exploration = exploration
+        self.rollout_turns = rollout_turns
+        self.min_probability = min_probability
+        self.root = None
+        self.nb_rollouts = 0
+
+    def create_node(self, game):
+        actions = [
+            (source, target) for source, target in game.possible_attacks(self.player)
+            if game.attack_probability(source, target) >= self.min_probability or game.dice[source] == 8
+        ]
+        actions.append(END_TURN)
+        return Node(game, actions)
+
+    def set_root(self, game):
+        """Start searching from the position, reusing the tree if it has been reached
+
+        Returns
+        -------
+        bool
+            Whether a subtree of the previous search has been reused
+        """
+        if self.root is not None:
+            position = game.position()
+            for action_node in self.root.children.values():
+                for node in action_node.outcomes.values():
+                    if node.game.position() == position:
+                        self.root = node
+                        return True
+
+        self.root = self.create_node(game)
+        return False
+
+    def seed_root(self, priors, weight):
+        """Start statistics of the untried actions of the root by those of similar positions
+
+        Parameters
+        ----------
+        priors : dict
+            (visits, value) of actions, see root_statistics()
+        weight : float
+            Number of visits all the priors together are worth at most
+        """
+        root = self.root
+        priors = {action: statistics for action, statistics in priors.items() if action in root.untried}
+        total = sum(visits for visits, value in priors.values())
+        if not total:
+            return
+
+        scale = min(1.0, weight / total)
+        for action, (visits, value) in priors.items():
+            root.untried.remove(action)
+            child = ActionNode(action, 1.0 if action is END_TURN else root.game.attack_probability(*action))
+            child.visits = visits * scale
+            child.value = value * scale
+            root.children[action] = child
+            root.visits += child.visits
+
+    def select(self, node):
+        if node.untried:
+            action = node.untried.pop()
+            child = ActionNode(
+                action, 1.0 if action is END_TURN else node.game.attack_probability(*action)
+            )
+            node.children[action] = child
+            return child
+
+        log_visits = math.log(node.visits)
+        best = None
+        best_score = -1.0
+        for child in node.children.values():
+            score = child.value / child.visits + self.exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def iterate(self):
+        """Run one selection, expansion, rollout and backpropagation
+        """
+        path = []
+        node = self.root
+        while True:
+            node.visits += 1
+            action_node = self.select(node)
+            path.append(action_node)
+
+            if action_node.action is END_TURN:
+                game = node.game.copy()
+                game.end_turn(self.rng)
+                break
+
+            succeeded = self.rng.random() < action_node.probability
+            child = action_node.outcomes.get(succeeded)
+            if child is None:
+                game = node.game.copy()
+                game.battle(*action_node.action, succeeded)
+                action_node.outcomes[succeeded] = self.create_node(game)
+                game = game.copy()
+                break
+            node = child
+
+        value = game.rollout(self.player, self.rng, self.rollout_turns)
+        self.nb_rollouts += 1
+        for action_node in path:
+            action_node.visits += 1
+            action_node.value += value
+
+    def root_statistics(self):
+        """Visits and summed values of the actions tried from the root
+
+        Returns
+        -------
+        dict
+            (visits, value) of every tried action
+        """
+        return {action: (child.visits, child.value) for action, child in self.root.children.items()}
+
+    def best_action(self):
+        """Most visited action of the root
+        """
+        return most_visited(self.root_statistics())
+
+
+def most_visited(statistics):
+    """Action with the most visits, END_TURN if none was tried
+
+    Parameters
+    ----------
+    statistics : dict
+        (visits, value) of actions, see UCTSearch.root_statistics()
+    """
+    if not statistics:
+        return END_TURN
+    return max(statistics, key=lambda action: statistics[action][0])
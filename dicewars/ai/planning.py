@@ -0,0 +1,133 @@
+from collections import deque, namedtuple
+
+
+class PlannedAttack(namedtuple('PlannedAttack', ['source', 'target', 'source_dice', 'target_owner', 'target_dice'])):
+    """Attack of a plan together with the state of both areas it counts on
+    """
+    __slots__ = ()
+
+    def is_valid(self, board, player_name):
+        """Whether both areas are still as when the attack was planned
+        """
+        compact = board.compact
+        return (
+            compact.get_owner(self.source) == player_name
+            and compact.get_dice(self.source) == self.source_dice
+            and compact.get_owner(self.target) == self.target_owner
+            and compact.get_dice(self.target) == self.target_dice
+        )
+
+
+def plan_attacks(board, candidates):
+    """Turn preferred attacks into a plan valid for any results of its battles
+
+    Attacks are taken in the given order, skipping those from or to an area
+    already used by an earlier attack of the plan, as they would depend on
+    its result.
+
+    Parameters
+    ----------
+    board : Board
+    candidates : iterable of (int, int)
+        Names of attacking and attacked areas, the most preferred first
+
+    Returns
+    -------
+    list of PlannedAttack
+    """
+    compact = board.compact
+    used = set()
+    plan = []
+    for source, target in candidates:
+        if source in used or target in used:
+            continue
+        used.update((source, target))
+        plan.append(PlannedAttack(
+            source, target, compact.get_dice(source), compact.get_owner(target), compact.get_dice(target)
+        ))
+    return plan
+
+
+class AttackPlanner:
+    """Plan of attacks kept over the ai_turn() calls of one turn
+
+    The plan is made once at the start of a turn. A planned attack is made
+    only as long as its areas are as the plan expects, which a result of an
+    earlier battle may change; then, or once the plan runs out, the plan is
+    made anew from the current board.
+
+    Attributes
+    ----------
+    nb_plans : int
+        Number of plans made so far
+    nb_attacks : int
+        Number of attacks taken from plans
+    """
+    def __init__(self, player_name, make_plan):
+        """
+        Parameters
+        ----------
+        player_name : int
+        make_plan : callable
+            Takes the board and returns a list of PlannedAttack, e.g. by plan_attacks()
+        """
+        self.player_name = player_name
+        self.make_plan = make_plan
+        self.plan = deque()
+        self.turn = None
+        self.nb_plans = 0
+        self.nb_attacks = 0
+
+    def replan(self, board):
+        self.plan = deque(self.make_plan(board))
+        self.nb_plans += 1
+
+    def next_attack(self, board, nb_turns_this_game):
+        """Get the next attack of the plan
+
+        Parameters
+        ----------
+        board : Board
+        nb_turns_this_game : int
+            Turns of the player so far, a change of which starts a new plan
+
+        Returns
+        -------
+        (int, int)
+            Names of the attacking and the attacked area, None to end the turn
+        """
+        replanned = False
+        if nb_turns_this_game != self.turn:
+            self.turn = nb_turns_this_game
+            self.replan(board)
+            replanned = True
+
+        while True:
+            if self.plan and self.plan[0].is_valid(board, self.player_name):
+                attack = self.plan.popleft()
+                self.nb_attacks += 1
+                return attack.source, attack.target
+            if replanned:
+                return None
+            self.replan(board)
+            replanned = True
+
+    def next_plan(self, board, nb_turns_this_game):
+        """Get all the attacks left in the plan, e.g. for an AttackPlanCommand
+
+        The plan starts by the next attack as given by next_attack() and is
+        used up by this call.
+
+        Returns
+        -------
+        list of (int, int)
+            Names of attacking and attacked areas, empty to end the turn
+        """
+        attack = self.next_attack(board, nb_turns_this_game)
+        if attack is None:
+            return []
+
+        attacks = [attack] + [(planned.source, planned.target) for planned in self.plan]
+        self.nb_attacks += len(self.plan)
+        self.plan.clear()
+        return attacks
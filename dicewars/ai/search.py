@@ -0,0 +1,189 @@
+import random
+from contextlib import contextmanager
+
+from .utils import ATTACK_TABLES
+
+
+MAX_OWNER = 127  # owners are stored as int8
+MAX_DICE = 8
+
+
+class ZobristKeys:
+    """Random keys of owners and dice of areas for hashing positions
+
+    The keys are drawn from a private generator, so creating them does not
+    influence the global one.
+    """
+    def __init__(self, nb_slots, seed=0):
+        """
+        Parameters
+        ----------
+        nb_slots : int
+            Number of slots of the CompactBoard, i.e. the highest area name + 1
+        seed : int
+        """
+        generator = random.Random(seed)
+        self.owner = [[generator.getrandbits(64) for _ in range(MAX_OWNER + 1)] for _ in range(nb_slots)]
+        self.dice = [[generator.getrandbits(64) for _ in range(MAX_DICE + 1)] for _ in range(nb_slots)]
+
+
+class TranspositionTable:
+    """Values of already searched positions, holding at most size of them
+
+    When full, the oldest entries are dropped first.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        return self.entries.get(key, default)
+
+    def put(self, key, value):
+        if key not in self.entries and len(self.entries) >= self.size:
+            del self.entries[next(iter(self.entries))]
+        self.entries[key] = value
+
+    def clear(self):
+        self.entries.clear()
+
+
+class SearchBoard:
+    """Owners and dice of areas changed in place while searching
+
+    Moves are made by make_attack() and make_failed_attack() and taken back
+    by unmake(), so no copies of the board are needed. The Zobrist hash of
+    the position is updated along.
+
+    Attributes
+    ----------
+    owner : list of int
+        Owner of every area, indexed by names of areas
+    dice : list of int
+        Number of dice of every area
+    neighbours : list of list of int
+        Names of adjacent areas of every area
+    hash : int
+        Zobrist hash of the current position
+    """
+    def __init__(self, compact, keys=None):
+        """
+        Parameters
+        ----------
+        compact : CompactBoard
+            Board to start from, which is not changed by the search
+        keys : ZobristKeys
+            Keys for hashing, created for the board if not given
+        """
+        self.owner = compact.owner.tolist()
+        self.dice = compact.dice.tolist()
+        self.neighbours = [compact.get_neighbours(area).tolist() for area in range(len(self.owner))]
+        self.keys = keys if keys is not None else ZobristKeys(len(self.owner))
+        self.undo_stack = []
+
+        self.hash = 0
+        for area in compact.names.tolist():
+            self.hash ^= self.keys.owner[area][self.owner[area]] ^ self.keys.dice[area][self.dice[area]]
+
+    def set_area(self, area, owner, dice):
+        """Change an area as a part of the move being made
+        """
+        old_owner = self.owner[area]
+        old_dice = self.dice[area]
+        self.undo_stack[-1].append((area, old_owner, old_dice))
+
+        self.hash ^= self.keys.owner[area][old_owner] ^ self.keys.owner[area][owner]
+        self.hash ^= self.keys.dice[area][old_dice] ^ self.keys.dice[area][dice]
+        self.owner[area] = owner
+        self.dice[area] = dice
+
+    def make_attack(self, source, target, owner=None, dice=None):
+        """Make a successful attack
+
+        Parameters
+        ----------
+        source, target : int
+            Names of the attacking and the attacked area
+        owner : int
+            New owner of the target, the owner of the source by default
+        dice : int
+            Dice moved to the target, all but one of the source by default
+        """
+        if owner is None:
+            owner = self.owner[source]
+        if dice is None:
+            dice = self.dice[source] - 1
+
+        self.undo_stack.append([])
+        self.set_area(target, owner, dice)
+        self.set_area(source, self.owner[source], 1)
+
+    def make_failed_attack(self, source):
+        """Make an attack that failed, leaving the source with one die
+        """
+        self.undo_stack.append([])
+        self.set_area(source, self.owner[source], 1)
+
+    def unmake(self):
+        """Take back the last move
+        """
+        for area, owner, dice in reversed(self.undo_stack.pop()):
+            self.hash ^= self.keys.owner[area][self.owner[area]] ^ self.keys.owner[area][owner]
+            self.hash ^= self.keys.dice[area][self.dice[area]] ^ self.keys.dice[area][dice]
+            self.owner[area] = owner
+            self.dice[area] = dice
+
+    @contextmanager
+    def attack(self, source, target, owner=None, dice=None):
+        """Have a successful attack made within the context
+        """
+        self.make_attack(source, target, owner, dice)
+        try:
+            yield
+        finally:
+            self.unmake()
+
+    @contextmanager
+    def failed_attack(self, source):
+        """Have a failed attack made within the context
+        """
+        self.make_failed_attack(source)
+        try:
+            yield
+        finally:
+            self.unmake()
+
+    def attack_probability(self, source, target):
+        return ATTACK_TABLES.success[self.dice[source], self.dice[target]]
+
+    def attack_chance(self, source, target, evaluate):
+        """Expected value of an attack as a chance node
+
+        Parameters
+        ----------
+        source, target : int
+        evaluate : callable
+            Value of the current position, called after the attack has
+            succeeded and after it has failed
+
+        Returns
+        -------
+        float
+        """
+        probability = self.attack_probability(source, target)
+        with self.attack(source, target):
+            success = evaluate()
+        with self.failed_attack(source):
+            failure = evaluate()
+        return probability * success + (1.0 - probability) * failure
+
+    def enemy_neighbours(self, area, player_name):
+        """Names of areas adjacent to the given one not owned by the player
+        """
+        return [adj for adj in self.neighbours[area] if self.owner[adj] != player_name]
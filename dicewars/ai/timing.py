@@ -0,0 +1,128 @@
+import time
+
+from dicewars.client.ai_driver import FISCHER_INCREMENT
+
+
+class SearchTimeout(Exception):
+    """Raised by Deadline.check() once the time for a move is up
+    """
+
+
+class Deadline:
+    """Point in time by which a move has to be decided
+
+    Searches call check() regularly, so they stop on their own well before
+    the driver's SIGALRM would end the turn by force.
+    """
+    def __init__(self, budget):
+        """
+        Parameters
+        ----------
+        budget : float
+            Seconds from now
+        """
+        self.budget = budget
+        self.end = time.perf_counter() + budget
+
+    def remaining(self):
+        return self.end - time.perf_counter()
+
+    def expired(self):
+        return time.perf_counter() >= self.end
+
+    def check(self):
+        if time.perf_counter() >= self.end:
+            raise SearchTimeout()
+
+
+class TimeManager:
+    """Splitting of the Fischer clock among moves of a game
+
+    Every move gets the increment plus an equal share of the rest of the
+    clock among the moves expected till the end of the game. A reserve is
+    never touched, covering the time spent outside of the search.
+    """
+    def __init__(self, expected_turns=60, min_turns_left=10, moves_per_turn=4.0,
+                 increment=FISCHER_INCREMENT, reserve=0.3):
+        """
+        Parameters
+        ----------
+        expected_turns : int
+            Expected length of a game in turns of the AI
+        min_turns_left : int
+            Number of turns always expected to follow
+        moves_per_turn : float
+            Initial estimate of moves in a turn, later replaced by the observed average
+        increment : float
+            Fischer increment gained by every move
+        reserve : float
+            Seconds of the clock not to be used by searching
+        """
+        self.expected_turns = expected_turns
+        self.min_turns_left = min_turns_left
+        self.moves_per_turn = moves_per_turn
+        self.increment = increment
+        self.reserve = reserve
+        self.nb_moves = 0
+
+    def expected_moves_left(self, nb_turns_this_game):
+        turns_left = max(self.min_turns_left, self.expected_turns - nb_turns_this_game)
+        return turns_left * self.moves_per_turn
+
+    def start_move(self, time_left, nb_moves_this_turn, nb_turns_this_game):
+        """Get the deadline of the move being decided
+
+        Parameters
+        ----------
+        time_left : float
+            Time on the clock as passed to ai_turn()
+        nb_moves_this_turn : int
+        nb_turns_this_game : int
+
+        Returns
+        -------
+        Deadline
+        """
+        self.nb_moves += 1
+        if nb_turns_this_game > 0:
+            self.moves_per_turn = max(1.0, self.nb_moves / (nb_turns_this_game + 1))
+
+        available = time_left - self.reserve
+        budget = available / self.expected_moves_left(nb_turns_this_game) + self.increment
+        return Deadline(max(0.0, min(budget, available)))
+
+
+def iterative_deepening(search, deadline, min_depth=1, max_depth=32, best=None, growth=2.0):
+    """Run a search deeper and deeper while there is time left
+
+    Parameters
+    ----------
+    search : callable
+        Takes the depth and returns the result of a search that deep. It
+        should call deadline.check() regularly.
+    deadline : Deadline
+    min_depth, max_depth : int
+    best
+        Result to return if not even the shallowest search finishes
+    growth : float
+        Expected ratio of durations of successive depths. No deeper search
+        is started unless it is expected to finish in time.
+
+    Returns
+    -------
+    (result, int)
+        Result of the deepest finished search and its depth, None if none finished
+    """
+    depth_reached = None
+    for depth in range(min_depth, max_depth + 1):
+        started = time.perf_counter()
+        try:
+            best = search(depth)
+        except SearchTimeout:
+            break
+        depth_reached = depth
+
+        if deadline.remaining() < (time.perf_counter() - started) * growth:
+            break
+
+    return best, depth_reached
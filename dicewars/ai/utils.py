@@ -71,92 +71,83 @@ def probability_of_successful_attack(board, atk_area, target_area):
     return attack_succcess_probability(atk_power, def_power)
 
 
+class AttackTables:
+    """Probabilities of outcomes of battles for all numbers of dice
+
+    The tables are indexed by the number of dice of the attacker and the
+    defender, e.g. success[atk, df], which works for arrays of them as well.
+    They are computed exactly by convolving distributions of sums of dice.
+
+    Attributes
+    ----------
+    sum_distribution : numpy.ndarray
+        sum_distribution[n, s] is the probability that n dice sum up to s
+    success : numpy.ndarray
+        Probability that the attacker wins, i.e. rolls strictly more
+    margin : numpy.ndarray
+        margin[atk, df, m + max_margin] is the probability that the sum of
+        the attacker exceeds the one of the defender by m
+    surviving_attacker : numpy.ndarray
+        Expected number of dice the attacker has in both areas after the battle
+    surviving_defender : numpy.ndarray
+        Expected number of dice the defender keeps
+    """
+    def __init__(self, faces=6, max_dice=8):
+        """
+        Parameters
+        ----------
+        faces : int
+            Number of faces of a die
+        max_dice : int
+            Maximal number of dice in an area
+        """
+        self.faces = faces
+        self.max_dice = max_dice
+        self.max_margin = faces * max_dice
+
+        die = numpy.ones(faces + 1)
+        die[0] = 0
+        die /= faces
+        self.sum_distribution = numpy.zeros((max_dice + 1, self.max_margin + 1))
+        self.sum_distribution[0, 0] = 1.0
+        for n in range(1, max_dice + 1):
+            self.sum_distribution[n] = numpy.convolve(self.sum_distribution[n-1], die)[:self.max_margin + 1]
+
+        self.margin = numpy.zeros((max_dice + 1, max_dice + 1, 2 * self.max_margin + 1))
+        for atk in range(max_dice + 1):
+            for df in range(max_dice + 1):
+                # the reversed defender's distribution puts margin 0 at index max_margin
+                self.margin[atk, df] = numpy.convolve(self.sum_distribution[atk], self.sum_distribution[df][::-1])
+
+        self.success = self.margin[:, :, self.max_margin + 1:].sum(axis=2)
+
+        dice = numpy.arange(max_dice + 1)
+        atk, df = numpy.meshgrid(dice, dice, indexing='ij')
+        self.surviving_attacker = 1 + self.success * numpy.maximum(atk - 1, 0)
+        self.surviving_defender = (1 - self.success) * df
+
+        for table in [self.sum_distribution, self.margin, self.success, self.surviving_attacker, self.surviving_defender]:
+            table.flags.writeable = False
+
+
+ATTACK_TABLES = AttackTables()
+
+
 def attack_succcess_probability(atk, df):
-    """Dictionary with pre-calculated probabilities for each combination of dice
+    """Probability of successful attack for a combination of dice
 
     Parameters
     ----------
-    atk : int
+    atk : int or numpy.ndarray of int
         Number of dice the attacker has
-    df : int
+    df : int or numpy.ndarray of int
         Number of dice the defender has
 
     Returns
     -------
-    float
+    float or numpy.ndarray of float
     """
-    return {
-        2: {
-            1: 0.83796296,
-            2: 0.44367284,
-            3: 0.15200617,
-            4: 0.03587963,
-            5: 0.00610497,
-            6: 0.00076625,
-            7: 0.00007095,
-            8: 0.00000473,
-        },
-        3: {
-            1: 0.97299383,
-            2: 0.77854938,
-            3: 0.45357510,
-            4: 0.19170096,
-            5: 0.06071269,
-            6: 0.01487860,
-            7: 0.00288998,
-            8: 0.00045192,
-        },
-        4: {
-            1: 0.99729938,
-            2: 0.93923611,
-            3: 0.74283050,
-            4: 0.45952825,
-            5: 0.22044235,
-            6: 0.08342284,
-            7: 0.02544975,
-            8: 0.00637948,
-        },
-        5: {
-            1: 0.99984997,
-            2: 0.98794010,
-            3: 0.90934714,
-            4: 0.71807842,
-            5: 0.46365360,
-            6: 0.24244910,
-            7: 0.10362599,
-            8: 0.03674187,
-        },
-        6: {
-            1: 0.99999643,
-            2: 0.99821685,
-            3: 0.97529981,
-            4: 0.88395347,
-            5: 0.69961639,
-            6: 0.46673060,
-            7: 0.25998382,
-            8: 0.12150697,
-        },
-        7: {
-            1: 1.00000000,
-            2: 0.99980134,
-            3: 0.99466336,
-            4: 0.96153588,
-            5: 0.86237652,
-            6: 0.68516499,
-            7: 0.46913917,
-            8: 0.27437553,
-        },
-        8: {
-            1: 1.00000000,
-            2: 0.99998345,
-            3: 0.99906917,
-            4: 0.98953404,
-            5: 0.94773146,
-            6: 0.84387382,
-            7: 0.67345564,
-            8: 0.47109073,
-        },
-    }[atk][df]
+    return ATTACK_TABLES.success[atk, df]
 
 
 def possible_attacks(board: Board, player_name: int) -> Iterator[Tuple[int, int]]:
@@ -172,6 +163,89 @@ def possible_attacks(board: Board, player_name: int) -> Iterator[Tuple[int, int]
                 yield (area, adjacent_area)
 
 
+def possible_attack_indices(board: Board, player_name: int) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """Get all possible attacks of a player as arrays of names of areas
+
+    The attacks are in the same order as given by possible_attacks().
+
+    Returns
+    -------
+    (numpy.ndarray of int, numpy.ndarray of int)
+        Names of the attacking and of the attacked areas
+    """
+    compact = board.compact
+    sources = compact.adjacency_source
+    targets = compact.adjacency
+    possible = (compact.owner[sources] == player_name) & (compact.dice[sources] >= 2) & (compact.owner[targets] != player_name)
+    return sources[possible], targets[possible]
+
+
+def probabilities_of_holding_areas(board: Board, area_names, areas_dice, player_name: int) -> numpy.ndarray:
+    """Estimate probability of holding areas until next turn
+
+    This is probability_of_holding_area() for arrays of areas at once.
+
+    Parameters
+    ----------
+    board : Board
+    area_names : numpy.ndarray of int
+    areas_dice : numpy.ndarray of int
+    player_name : int
+        Owner of the areas
+
+    Returns
+    -------
+    numpy.ndarray of float
+    """
+    compact = board.compact
+    neighbours = compact.neighbour_matrix[area_names]
+    enemy_dice = compact.dice[neighbours]
+    threatening = (compact.owner[neighbours] != player_name) & (enemy_dice > 1)
+    hold_probs = numpy.where(threatening, 1.0 - ATTACK_TABLES.success[enemy_dice, areas_dice[:, None]], 1.0)
+
+    # multiplied one neighbour after another, as probability_of_holding_area() does
+    probabilities = numpy.ones(len(area_names))
+    for hold_prob in hold_probs.T:
+        probabilities *= hold_prob
+    return probabilities
+
+
+class AttackBatch:
+    """All possible attacks of a player evaluated at once
+
+    Attributes
+    ----------
+    sources : numpy.ndarray of int
+        Names of attacking areas
+    targets : numpy.ndarray of int
+        Names of attacked areas
+    atk_dice : numpy.ndarray of int
+        Dice in attacking areas
+    strength_difference : numpy.ndarray of int
+        Dice in attacking areas less dice in attacked areas
+    attack_probability : numpy.ndarray of float
+        Probability of successful attack
+    hold_probability : numpy.ndarray of float
+        Probability of holding the attacked area until next turn, once it is conquered
+    """
+    def __init__(self, board: Board, player_name: int):
+        compact = board.compact
+        self.sources, self.targets = possible_attack_indices(board, player_name)
+        self.atk_dice = compact.dice[self.sources].astype(int)
+        def_dice = compact.dice[self.targets].astype(int)
+        self.strength_difference = self.atk_dice - def_dice
+        self.attack_probability = ATTACK_TABLES.success[self.atk_dice, def_dice]
+        self.hold_probability = probabilities_of_holding_areas(board, self.targets, self.atk_dice - 1, player_name)
+
+    def __len__(self):
+        return len(self.sources)
+
+    def attack(self, i):
+        """Get the i-th attack as (source name, target name)
+        """
+        return int(self.sources[i]), int(self.targets[i])
+
+
 def save_state(f, board, player_name, players_order):
     save_game = {
         'player_name': player_name,
@@ -1,7 +1,9 @@
 import logging
 import random
 
-from ..utils import possible_attacks, save_state
+import numpy
+
+from ..utils import possible_attack_indices, save_state
 from .utils import best_sdc_attack, is_acceptable_sdc_attack
 
 from dicewars.client.ai_driver import BattleCommand, EndTurnCommand
@@ -29,47 +31,50 @@ class FinalAI:
         Get a random area. If it has a possible move, the agent will do it.
         If there are no more moves, the agent ends its turn.
         """
+        sources, targets = possible_attack_indices(board, self.player_name)
+
         if nb_turns_this_game < 3:
             self.logger.debug("Doing a random move")
             attack_filter = lambda x: x
             attack_selector = random.choice
-            attack_acceptor = lambda x: True
+            attack_acceptor = lambda source, target: True
 
             with open('debug.save', 'wb') as f:
                 save_state(f, board, self.player_name, self.players_order)
 
         else:
             self.logger.debug("Doing a serious move")
-            attack_filter = lambda x: self.from_largest_region(board, x)
-            attack_selector = best_sdc_attack
-            attack_acceptor = lambda x: is_acceptable_sdc_attack(x)
+            attack_filter = lambda x: self.from_largest_region(board, sources, x)
+            attack_selector = lambda x: best_sdc_attack(board, sources, targets, x)
+            attack_acceptor = lambda source, target: is_acceptable_sdc_attack(board, source, target)
 
             with open('debug.save', 'wb') as f:
                 save_state(f, board, self.player_name, self.players_order)
 
-        all_moves = list(possible_attacks(board, self.player_name))
-        if not all_moves:
+        all_moves = numpy.arange(len(sources))
+        if not len(all_moves):
             self.logger.debug("There are no moves possible at all")
             return EndTurnCommand()
 
         moves_of_interest = attack_filter(all_moves)
-        if not moves_of_interest:
+        if not len(moves_of_interest):
             self.logger.debug("There are no moves of interest")
             return EndTurnCommand()
 
         the_move = attack_selector(moves_of_interest)
+        source, target = int(sources[the_move]), int(targets[the_move])
 
-        if attack_acceptor(the_move):
-            return BattleCommand(the_move[0].get_name(), the_move[1].get_name())
+        if attack_acceptor(source, target):
+            return BattleCommand(source, target)
         else:
-            self.logger.debug("The move {} is not acceptable, ending turn".format(the_move))
+            self.logger.debug("The move {} is not acceptable, ending turn".format((source, target)))
             return EndTurnCommand()
 
-    def from_largest_region(self, board, attacks):
+    def from_largest_region(self, board, sources, moves):
         players_regions = board.get_players_regions(self.player_name)
         max_region_size = max(len(region) for region in players_regions)
         max_sized_regions = [region for region in players_regions if len(region) == max_region_size]
 
         the_largest_region = max_sized_regions[0]
         self.logger.debug('The largest region: {}'.format(the_largest_region))
-        return [attack for attack in attacks if attack[0].get_name() in the_largest_region]
+        return moves[numpy.isin(sources[moves], the_largest_region)]
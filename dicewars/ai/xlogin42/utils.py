@@ -1,17 +1,28 @@
+import numpy
+
+
 def attacker_advantage(attacker, defender):
     return attacker.get_dice() - defender.get_dice()
 
 
-def best_sdc_attack(attacks):
-    scored_attacks = [(source, target, attacker_advantage(source, target)) for source, target in attacks]
-    scored_attacks.sort(key=lambda attack: attack[2], reverse=True)
+def best_sdc_attack(board, sources, targets, moves):
+    """Get the first of moves with the highest attacker's advantage
 
-    return scored_attacks[0]
+    Parameters
+    ----------
+    board : Board
+    sources, targets : numpy.ndarray of int
+        Names of areas of all possible attacks
+    moves : numpy.ndarray of int
+        Indices of the attacks to choose from
+    """
+    advantages = board.compact.dice[sources[moves]].astype(int) - board.compact.dice[targets[moves]]
+    return moves[numpy.argmax(advantages)]
 
 
-def is_acceptable_sdc_attack(attack):
-    source, target, advantage = attack
-    if advantage > 0 or source.get_dice() == 8:
+def is_acceptable_sdc_attack(board, source, target):
+    advantage = board.compact.get_dice(source) - board.compact.get_dice(target)
+    if advantage > 0 or board.compact.get_dice(source) == 8:
         return True
     else:
         return False
@@ -1,15 +1,34 @@
 import logging
+from dicewars.ai.search import MAX_OWNER, SearchBoard, TranspositionTable, ZobristKeys
+from dicewars.ai.timing import TimeManager, iterative_deepening
 from dicewars.ai.utils import possible_attacks
 from dicewars.ai.utils import probability_of_holding_area, probability_of_successful_attack, attack_succcess_probability
 
 from dicewars.client.ai_driver import BattleCommand, EndTurnCommand
-import copy
 
 THRESHOLD = 0.4
+TABLE_SIZE = 2 ** 18
+MAX_LAYERS = 8
+
+
+def conquered_owner(area):
+    """Owner of an area conquered from the given one while searching
+
+    As in the original evaluation, the conquered area is marked as owned by
+    the attacking area. Names beyond the owners SearchBoard can hash, which
+    are not names of players either, are all folded to MAX_OWNER.
+    """
+    return min(area, MAX_OWNER)
+
 
 class AI:
     """
     Agent using Expectiminimax strategy
+
+    The search makes and unmakes attacks on a SearchBoard and remembers
+    values of searched nodes in a transposition table kept over the game.
+    With two players left, the number of opponent's layers is deepened
+    iteratively as long as the share of the clock for the move allows.
     """
     def __init__(self, player_name, board, players_order):
         """
@@ -19,6 +38,9 @@ class AI:
         """
         self.player_name = player_name
         self.logger = logging.getLogger('AI')
+        self.keys = ZobristKeys(len(board.compact.owner))
+        self.table = TranspositionTable(TABLE_SIZE)
+        self.time_manager = TimeManager()
 
     def ai_turn(self, board, nb_moves_this_turn, nb_turns_this_game, time_left):
         """
@@ -28,12 +50,15 @@ class AI:
             return EndTurnCommand()            
 
         self.board = board
+        self.deadline = self.time_manager.start_move(time_left, nb_moves_this_turn, nb_turns_this_game)
+        self.search = SearchBoard(board.compact, self.keys)
         self.playersCount = self.board.nb_players_alive()
 
-        # self.logger.critical(time_left)
-
         if self.playersCount == 2:
-            best_turn = self.expectiMinMax()
+            best_turn, layers = iterative_deepening(
+                self.expectiMinMax, self.deadline, min_depth=0, max_depth=MAX_LAYERS, best=(None, None, 0.0)
+            )
+            self.logger.debug("Searched {} layers of the opponent".format(layers))
             if best_turn[0] is not None:
                 return BattleCommand(best_turn[0], best_turn[1])
         else:
@@ -48,42 +73,9 @@ class AI:
 
                 return BattleCommand(area_name, turn[1])
 
-            if turns:
-                turn = turns[0]
-                area_name = turn[0]
-                self.logger.debug("Possible turn: {}".format(turn))
-                hold_prob = turn[2]
-                self.logger.debug("{0}->{1} attack and hold probabiliy {2}".format(area_name, turn[1], hold_prob))
-
-                return BattleCommand(area_name, turn[1])
-
         self.logger.debug("No more plays.")
         return EndTurnCommand()
 
-    def updateBoardAttack(self, board, source, target):
-        sourceName = source.get_name()
-        targetName = target.get_name()
-        newBoard = copy.deepcopy(board)
-        newBoard.get_area(targetName).set_owner(sourceName)
-        newBoard.get_area(targetName).set_dice(source.get_dice() - 1)
-        newBoard.get_area(sourceName).set_dice(1)
-        return newBoard
-
-    def updateBoardDefence(self, board, defender, attacker):
-        targetName = attacker.get_name()
-        newBoard = copy.deepcopy(board)
-        newBoard.get_area(targetName).set_dice(1)
-        return newBoard
-
-    def updateBoard(self, board, source, target):
-        sourceName = source.get_name()
-        targetName = target.get_name()
-        newBoard = copy.deepcopy(board)
-        newBoard.get_area(targetName).set_owner(sourceName)
-        newBoard.get_area(targetName).set_dice(source.get_dice() - 1)
-        newBoard.get_area(sourceName).set_dice(1)
-        return newBoard
-
     def best_turn(self):
         """Get a list of preferred moves
         This list is sorted with respect to hold probability in descending order.
@@ -98,111 +90,124 @@ class AI:
             atk_prob = probability_of_successful_attack(self.board, area_name, target.get_name())
             hold_prob = atk_prob * probability_of_holding_area(self.board, target.get_name(), atk_power - 1, self.player_name)
             if hold_prob >= 0.2 or atk_power == 8:
-                newBoard = self.updateBoard(self.board, source, target)
-                turns.append([area_name, target.get_name(), self.expectiMax3(newBoard, target)])
+                # the target keeps counting with its dice from before the attack
+                self.search.make_attack(area_name, target.get_name(), owner=conquered_owner(area_name))
+                turns.append([area_name, target.get_name(), self.expectiMax3(target.get_name(), target.get_dice())])
+                self.search.unmake()
 
         return sorted(turns, key=lambda turn: turn[2], reverse=True)
 
-    def expectiMax3(self, board, area):
+    def expectiMax3(self, area, area_dice):
+        key = (self.search.hash, 'max3', area, area_dice)
+        value = self.table.get(key)
+        if value is not None:
+            return value
+
         values=[]
-        if area.get_dice() < 2:
+        if area_dice < 2:
             return 0.0
 
-        for target in self.possible_attacks_from_area(board, area, self.player_name): 
-            atk_power = area.get_dice()
-            if atk_power < 2:
-                continue
-
-            attack_possibility_value = attack_succcess_probability(area.get_dice(), target.get_dice())
+        for target in self.search.enemy_neighbours(area, self.player_name):
+            atk_power = area_dice
+            attack_possibility_value = attack_succcess_probability(area_dice, self.search.dice[target])
             if attack_possibility_value >= 0.2 or atk_power == 8:
-                newBoard = self.updateBoardAttack(board, area, target) # ze sme zautocili a vyhrali
-                areaAttacked = newBoard.get_area(target.get_name()) # areaAttacked bude mat get_dice() - 1 kociek
-                val = attack_possibility_value * self.expectiMin3(newBoard, areaAttacked) * areaAttacked.get_dice() 
+                self.search.make_attack(area, target, owner=conquered_owner(area), dice=area_dice - 1) # ze sme zautocili a vyhrali
+                val = attack_possibility_value * self.expectiMin3(target) * self.search.dice[target]
+                self.search.unmake()
                 values.append(val)
 
-        if not values:
-            return 0.0
-        
-        return max(values)
+        value = max(values) if values else 0.0
+        self.table.put(key, value)
+        return value
+
+    def expectiMin3(self, area):
+        key = (self.search.hash, 'min3', area)
+        value = self.table.get(key)
+        if value is not None:
+            return value
 
-    def expectiMin3(self, board, area):
         values = []
-        for adj in area.get_adjacent_areas():
-            adjacent_area = board.get_area(adj)
-            if adjacent_area.get_owner_name() != self.player_name:
-                enemy_dice = adjacent_area.get_dice()
-                if enemy_dice == 1:
-                    continue
-                lose_prob = attack_succcess_probability(enemy_dice, area.get_dice())
-                if lose_prob >= 0.2 or area.get_dice() == 8:        
-                    newBoard = self.updateBoardDefence(board, area, adjacent_area) # ze na nas zautocili a vyhrali sme a s area nic nestane, oni budu mat get_dice() == 1
-                    areaThatAttacked = newBoard.get_area(adjacent_area.get_name()) # areaAttacked bude mat get_dice() == 1 kocku
-                    val = (1 - lose_prob) * self.expectiMax3(newBoard, areaThatAttacked) * areaThatAttacked.get_dice() 
-                    values.append(val)
-
-        if not values:
-            return 1.0 # tu by som mozno dal jednotku
-        
-        return min(values)
+        area_dice = self.search.dice[area]
+        for adj in self.search.enemy_neighbours(area, self.player_name):
+            enemy_dice = self.search.dice[adj]
+            if enemy_dice == 1:
+                continue
+            lose_prob = attack_succcess_probability(enemy_dice, area_dice)
+            if lose_prob >= 0.2 or area_dice == 8:
+                self.search.make_failed_attack(adj) # ze na nas zautocili a vyhrali sme a s area nic nestane, oni budu mat 1 kocku
+                val = (1 - lose_prob) * self.expectiMax3(adj, 1)
+                self.search.unmake()
+                values.append(val)
 
-    def expectiMinMax(self):
+        value = min(values) if values else 1.0
+        self.table.put(key, value)
+        return value
+
+    def expectiMinMax(self, layers):
+        self.layers = layers
+        self.search = SearchBoard(self.board.compact, self.keys)
         best_turn = (None, None, 0.0)
 
         for area in self.board.get_player_border(self.player_name):
-            exp = self.expectiMax2(self.board, area)
+            exp = self.expectiMax2(area.get_name())
             if exp[1] > best_turn[2]:
                 best_turn = (area.get_name(), exp[0], exp[1])
 
         return best_turn
 
-    def expectiMax2(self, board, area):
+    def expectiMax2(self, area):
+        key = (self.search.hash, 'max2', area, self.layers)
+        best_move = self.table.get(key)
+        if best_move is not None:
+            return best_move
+
         best_move = (None, 0.0)
-        atk_power = area.get_dice()
-        if not area.can_attack():
+        atk_power = self.search.dice[area]
+        if atk_power < 2:
             return best_move
 
-        for target in self.possible_attacks_from_area(board, area, self.player_name): 
-            attack_possibility_value = attack_succcess_probability(atk_power, target.get_dice())
+        for target in self.search.enemy_neighbours(area, self.player_name):
+            self.deadline.check()
+            attack_possibility_value = attack_succcess_probability(atk_power, self.search.dice[target])
             if attack_possibility_value >= THRESHOLD or atk_power == 8:
-                newBoard = self.updateBoardAttack(board, area, target) # ze sme zautocili a vyhrali
-                areaAttacked = newBoard.get_area(target.get_name()) # areaAttacked bude mat get_dice() - 1 kociek
-                val = attack_possibility_value * self.expectiMin2(newBoard, areaAttacked, self.playersCount) * areaAttacked.get_dice() 
+                self.search.make_attack(area, target, owner=conquered_owner(area)) # ze sme zautocili a vyhrali
+                val = attack_possibility_value * self.expectiMin2(target, self.layers) * self.search.dice[target]
+                self.search.unmake()
                 if val > best_move[1]:
-                    best_move = (target.get_name(), val)
-        
+                    best_move = (target, val)
+
+        self.table.put(key, best_move)
         return best_move
 
-    def expectiMin2(self, board, area, expectiMinLayers):
+    def expectiMin2(self, area, expectiMinLayers):
+        key = (self.search.hash, 'min2', area, expectiMinLayers, self.layers)
+        value = self.table.get(key)
+        if value is not None:
+            return value
+
         values = []
-        area_dice = area.get_dice()
+        area_dice = self.search.dice[area]
 
-        for adjacent_area in self.possible_attacks_from_area(board, area, self.player_name):
-            enemy_dice = adjacent_area.get_dice()
-            if not adjacent_area.can_attack():
+        for adjacent_area in self.search.enemy_neighbours(area, self.player_name):
+            self.deadline.check()
+            enemy_dice = self.search.dice[adjacent_area]
+            if enemy_dice < 2:
                 continue
             lose_prob = attack_succcess_probability(enemy_dice, area_dice)
             if lose_prob <= THRESHOLD: 
-                newBoard = self.updateBoardDefence(board, area, adjacent_area) # ze na nas zautocili a vyhrali sme a s area nic nestane, oni budu mat get_dice() == 1
-                areaThatAttacked = newBoard.get_area(adjacent_area.get_name()) # areaAttacked bude mat get_dice() == 1 kocku
+                self.search.make_failed_attack(adjacent_area) # ze na nas zautocili a vyhrali sme a s area nic nestane, oni budu mat 1 kocku
                 if expectiMinLayers == 0:
-                    expectiVal = self.expectiMax2(newBoard, area)[1]
+                    expectiVal = self.expectiMax2(area)[1]
                 else: 
-                    expectiVal = self.expectiMin2(newBoard, area, expectiMinLayers - 1)
+                    expectiVal = self.expectiMin2(area, expectiMinLayers - 1)
+                self.search.unmake()
 
-                val = (1 - lose_prob) * expectiVal * areaThatAttacked.get_dice() 
+                val = (1 - lose_prob) * expectiVal
                 values.append(val)
             else:
                 # predpokladam, ze sme bitku prehrali, zobrali nam ho
                 values.append(0.0001)
         
-        return min(values) if values else 1.0
-
-   
-
-    def possible_attacks_from_area(self, board, area, player_name):
-        neighbours = area.get_adjacent_areas()
-
-        for adj in neighbours:
-            adjacent_area = board.get_area(adj)
-            if adjacent_area.get_owner_name() != player_name:
-                yield adjacent_area
\ No newline at end of file
+        value = min(values) if values else 1.0
+        self.table.put(key, value)
+        return value
@@ -1,8 +1,9 @@
 import copy
-import json
+import importlib
 from json.decoder import JSONDecodeError
 import logging
 import signal
+import threading
 
 from .timers import FischerTimer, FixedTimer
 
@@ -18,6 +19,24 @@ def TimeoutHandler(signum, handler):
 TIME_LIMIT_CONSTRUCTOR = 10.0  # in seconds, for AI constructor
 FISCHER_INIT = 10.0  # seconds
 FISCHER_INCREMENT = 0.1  # seconds
+PONDER_STOP_TIMEOUT = 0.1  # in seconds, for a call of ponder() to notice it was cancelled
+
+
+def get_ai_constructor(ai_specification):
+    """Get the AI class of a module in dicewars.ai, e.g. 'dt.sdc'
+    """
+    ai_module = importlib.import_module('dicewars.ai.{}'.format(ai_specification))
+
+    return ai_module.AI
+
+
+def get_nickname(ai_spec):
+    if ai_spec is not None:
+        nick = '{} (AI)'.format(ai_spec)
+    else:
+        nick = 'Human'
+
+    return nick
 
 
 class BattleCommand:
@@ -26,6 +45,24 @@ class BattleCommand:
         self.target_name = target_name
 
 
+class AttackPlanCommand:
+    """Attacks to be made by the server in order, answered by one message
+
+    Parameters
+    ----------
+    attacks : list of (int, int)
+        Names of attacking and attacked areas
+    stop_on_loss : bool
+        Whether to give up the rest of the plan after a lost battle
+    min_dice : int
+        Attacks from areas with fewer dice when they are due are skipped
+    """
+    def __init__(self, attacks, stop_on_loss=True, min_dice=2):
+        self.attacks = list(attacks)
+        self.stop_on_loss = stop_on_loss
+        self.min_dice = min_dice
+
+
 class EndTurnCommand:
     pass
 
@@ -55,7 +92,7 @@ class AIDriver:
         self.ai_disabled = False
         try:
             with FixedTimer(TIME_LIMIT_CONSTRUCTOR):
-                self.ai = ai_constructor(self.player_name, copy.deepcopy(self.board), copy.deepcopy(self.game.players_order))
+                self.ai = ai_constructor(self.player_name, self.board.snapshot(), copy.deepcopy(self.game.players_order))
         except TimeoutError:
             self.logger.error("The AI failed to construct itself in {}s. Disabling it.".format(TIME_LIMIT_CONSTRUCTOR))
             self.ai_disabled = True
@@ -67,49 +104,117 @@ class AIDriver:
         self.moves_this_turn = 0
         self.turns_finished = 0
 
+        self.ponder_thread = None
+        self.ponder_cancelled = threading.Event()
+        self.ponder_failed = False
+
         self.timer = FischerTimer(FISCHER_INIT, FISCHER_INCREMENT)
 
     def run(self):
-        """Main AI agent loop
+        """Main AI agent loop, returning when the game ends
         """
         game = self.game
 
         while True:
             message = game.input_queue.get(block=True, timeout=None)
+            self.stop_pondering()
             try:
                 if not self.handle_server_message(message):
-                    exit(0)
+                    return
             except JSONDecodeError:
                 self.logger.error("Invalid message from server.")
                 exit(1)
-            self.current_player_name = game.current_player.get_name()
-            if self.current_player_name == self.player_name and not self.waitingForResponse:
-                if self.ai_disabled:
-                    self.logger.warning("The AI has already misbehaved, just end-turning.")
-                    self.send_message('end_turn')
-                    continue
-
-                try:
-                    with self.timer as time_left:
-                        command = self.ai.ai_turn(
-                            copy.deepcopy(self.board),
-                            self.moves_this_turn,
-                            self.turns_finished,
-                            time_left
-                        )
-                    self.process_command(command)
-                except TimeoutError:
-                    self.logger.warning("Forced 'end_turn' because of timeout")
-                    self.send_message('end_turn')
-                    self.time_left_last_time = -1.0
-                except Exception:
-                    self.logger.error("The AI crashed during attempt to make a move:\n", exc_info=True)
-                    self.send_message('end_turn')
-                    self.ai_disabled = True
-
-                if not self.waitingForResponse:
-                    self.logger.warning("Forced 'end_turn' because the implementation did nothing")
-                    self.send_message('end_turn')
+            self.make_move()
+            self.start_pondering()
+
+    def start_pondering(self):
+        """Have the AI ponder in the background while another player is on turn
+
+        Only AIs having a ponder() method ponder. It is called with a snapshot
+        of the board, the name of the current player and an Event set once
+        a message comes from the server, again and again until it returns
+        False or the Event is set. A call should return soon after that.
+        """
+        ponder = getattr(getattr(self, 'ai', None), 'ponder', None)
+        if ponder is None or self.ai_disabled or self.ponder_failed:
+            return
+        if self.game.current_player_name == self.player_name:
+            return
+
+        self.ponder_cancelled.clear()
+        self.ponder_thread = threading.Thread(
+            target=self.ponder,
+            args=(ponder, self.board.snapshot(), self.game.current_player_name),
+            daemon=True,
+        )
+        self.ponder_thread.start()
+
+    def ponder(self, ponder, board, current_player_name):
+        try:
+            while not self.ponder_cancelled.is_set():
+                if not ponder(board, current_player_name, self.ponder_cancelled):
+                    break
+        except Exception:
+            self.logger.error("The AI crashed while pondering, not letting it ponder any more:\n", exc_info=True)
+            self.ponder_failed = True
+
+    def stop_pondering(self):
+        """Cancel pondering and wait a moment for the current call of ponder() to end
+
+        An AI whose ponder() does not end in PONDER_STOP_TIMEOUT is not let
+        ponder any more, the late call is left to finish in the background.
+        """
+        if self.ponder_thread is None:
+            return
+
+        self.ponder_cancelled.set()
+        self.ponder_thread.join(PONDER_STOP_TIMEOUT)
+        if self.ponder_thread.is_alive():
+            self.logger.error("The AI did not stop pondering in {}s, not letting it ponder any more.".format(
+                PONDER_STOP_TIMEOUT
+            ))
+            self.ponder_failed = True
+        self.ponder_thread = None
+
+    def make_move(self):
+        """Have the AI decide and send a command, if it is on turn
+
+        Nothing is done while the AI waits for a response to its previous command,
+        nor once the AI holds the whole board, as the server only announces the
+        end of the game then.
+        """
+        self.current_player_name = self.game.current_player.get_name()
+        if self.current_player_name != self.player_name or self.waitingForResponse:
+            return
+        if self.board.nb_players_alive() == 1:
+            return
+
+        if self.ai_disabled:
+            self.logger.warning("The AI has already misbehaved, just end-turning.")
+            self.send_message('end_turn')
+            return
+
+        try:
+            with self.timer as time_left:
+                command = self.ai.ai_turn(
+                    self.board.snapshot(),
+                    self.moves_this_turn,
+                    self.turns_finished,
+                    time_left
+                )
+            self.process_command(command)
+        except TimeoutError:
+            self.logger.warning("Forced 'end_turn' because of timeout")
+            self.send_message('end_turn')
+            self.time_left_last_time = -1.0
+        except Exception:
+            self.logger.error("The AI crashed during attempt to make a move:\n", exc_info=True)
+            self.send_message('end_turn')
+            self.ai_disabled = True
+
+        if not self.waitingForResponse:
+            self.logger.warning("Forced 'end_turn' because the implementation did nothing")
+            self.send_message('end_turn')
 
     def handle_server_message(self, msg):
         """Process message from the server
@@ -121,21 +226,14 @@ class AIDriver:
         """
         self.logger.debug("Received message type {0}.".format(msg["type"]))
         if msg['type'] == 'battle':
-            atk_data = msg['result']['atk']
-            def_data = msg['result']['def']
-            attacker = self.game.board.get_area(str(atk_data['name']))
-            attacker.set_dice(atk_data['dice'])
-            atk_name = attacker.get_owner_name()
-
-            defender = self.game.board.get_area(def_data['name'])
-            defender.set_dice(def_data['dice'])
-            def_name = defender.get_owner_name()
-
-            if def_data['owner'] == atk_data['owner']:
-                defender.set_owner(atk_data['owner'])
-                self.game.players[atk_name].set_score(msg['score'][str(atk_name)])
-                self.game.players[def_name].set_score(msg['score'][str(def_name)])
+            self.game.apply_battle(msg['result'], msg['score'])
+            self.waitingForResponse = False
 
+        elif msg['type'] == 'battles':
+            for result in msg['results']:
+                self.game.apply_battle(result, msg['score'])
+            if self.game.current_player_name == self.player_name:
+                self.moves_this_turn += len(msg['results'])
             self.waitingForResponse = False
 
         elif msg['type'] == 'end_turn':
@@ -155,25 +253,69 @@ class AIDriver:
             self.game.players[self.game.current_player_name].activate()
             self.waitingForResponse = False
 
+        elif msg['type'] == 'game_state':
+            self.game.apply_state(msg)
+            self.waitingForResponse = False
+
         elif msg['type'] == 'game_end':
             self.logger.info("Player {} has won".format(msg['winner']))
-            self.game.socket.close()
+            self.close_ai()
+            self.game.close_socket()
             return False
 
         return True
 
+    def close_ai(self):
+        """Let the AI release its resources, if it has a close() method
+        """
+        close = getattr(getattr(self, 'ai', None), 'close', None)
+        if close is None:
+            return
+
+        try:
+            close()
+        except Exception:
+            self.logger.error("The AI crashed while closing:\n", exc_info=True)
+
     def process_command(self, command):
         if isinstance(command, BattleCommand):
             if self.battle_is_valid(command):
                 self.send_message('battle', command.source_name, command.target_name)
             else:
                 self.send_message('end_turn')
+        elif isinstance(command, AttackPlanCommand):
+            attacks = self.skip_weak_attacks(command)
+            if attacks and self.battle_is_valid(BattleCommand(*attacks[0])):
+                command.attacks = attacks
+                self.send_message('attack_plan', plan=command)
+            else:
+                self.send_message('end_turn')
         elif isinstance(command, EndTurnCommand):
             self.send_message('end_turn')
         else:
             raise RuntimeError("Unknown command: {}".format(command))
 
-    def send_message(self, type, attacker=None, defender=None):
+    def skip_weak_attacks(self, plan):
+        """Leading attacks of a plan the server would skip for too few dice
+
+        The plan then starts by an attack which has to be valid, so that
+        every plan sent makes at least one battle.
+
+        Returns
+        -------
+        list of (int, int)
+            Attacks of the plan from the first one not to be skipped
+        """
+        for i, (source, target) in enumerate(plan.attacks):
+            try:
+                dice = self.board.get_area(source).get_dice()
+            except KeyError:
+                return plan.attacks[i:]
+            if dice >= plan.min_dice:
+                return plan.attacks[i:]
+        return []
+
+    def send_message(self, type, attacker=None, defender=None, plan=None):
         """Send message to the server
 
         Parameters
@@ -181,17 +323,14 @@ class AIDriver:
         type : str
         attacker : int
         defender : int
+        plan : AttackPlanCommand
         """
         if type == 'battle':
-            msg = {
-                'type': 'battle',
-                'atk': attacker,
-                'def': defender
-            }
             self.logger.debug("Sending battle message {}->{}".format(attacker, defender))
             self.moves_this_turn += 1
+        elif type == 'attack_plan':
+            self.logger.debug("Sending plan of {} attacks".format(len(plan.attacks)))
         elif type == 'end_turn':
-            msg = {'type': 'end_turn'}
             self.logger.debug("Sending end_turn message.")
             self.moves_this_turn = 0
             self.turns_finished += 1
@@ -199,12 +338,7 @@ class AIDriver:
             raise RuntimeError("Attempt to send unexpected message type {}".format(type))
 
         self.waitingForResponse = True
-
-        try:
-            self.game.socket.send(str.encode(json.dumps(msg)))
-        except BrokenPipeError:
-            self.logger.error("Connection to server broken.")
-            exit(1)
+        self.game.send_message(type, attacker, defender, plan)
 
     def battle_is_valid(self, battle):
         try:
@@ -4,24 +4,34 @@ from typing import List
 
 class Area(object):
     """Game board area
+
+    The owner and dice of the area are kept in the CompactBoard of its Board.
     """
-    def __init__(self, name, owner, dice, neighbours, hexes):
+    def __init__(self, name, board, hexes):
         """
         Parameters
         ----------
         name : int
-        owner : int
-        dice : int
-        neighbours : list of int
+        board : CompactBoard
+            Board holding the state of the area
         hexes : list of list of int
             Hex coordinates of for all Area's hexes
         """
         self.name = int(name)
-        self.owner_name = int(owner)
-        self.dice = int(dice)
-        self.neighbours = [int(n) for n in neighbours]
+        self.board = board
+        self.neighbours = board.get_neighbours(self.name).tolist()
         self.hexes = [[int(i) for i in h] for h in hexes]
 
+    def snapshot(self, board):
+        """Get a copy of the area, without hexes, over a copy of its CompactBoard
+        """
+        area = object.__new__(Area)
+        area.name = self.name
+        area.board = board
+        area.neighbours = self.neighbours[:]
+        area.hexes = []
+        return area
+
     def get_adjacent_areas(self) -> List[int]:
         """Return names of adjacent areas
         """
@@ -30,7 +40,7 @@ class Area(object):
     def get_dice(self) -> int:
         """Return number of dice in the Area
         """
-        return self.dice
+        return int(self.board.dice[self.name])
 
     def get_name(self) -> int:
         """Return Area's name
@@ -40,12 +50,12 @@ class Area(object):
     def get_owner_name(self) -> int:
         """Return Area's owner's name
         """
-        return self.owner_name
+        return int(self.board.owner[self.name])
 
     def can_attack(self) -> bool:
         """Return True if area has enough dice to attack
         """
-        return self.dice >= 2
+        return bool(self.board.dice[self.name] >= 2)
 
     def set_dice(self, dice: int) -> None:
         """Set area's dice
@@ -53,12 +63,12 @@ class Area(object):
         if dice < 1 or dice > 8:
             raise ValueError("Attempted to assign {} dice to Area {}".format(dice, self.name))
 
-        self.dice = dice
+        self.board.dice[self.name] = dice
 
     def set_owner(self, name: int) -> None:
         """Set owner name
         """
-        self.owner_name = int(name)
+        self.board.owner[self.name] = int(name)
 
     ##############
     # UI METHODS #
@@ -1,10 +1,14 @@
-import json
-from .area import Area
 from typing import List, Optional
 
+from dicewars.compact_board import CompactBoard, mask_to_names
+from .area import Area
+
 
 class Board(object):
     """Game board
+
+    A facade over a CompactBoard, which holds the owners and dice of all
+    areas in NumPy arrays. New AIs can use it directly as board.compact.
     """
     def __init__(self, areas, board):
         """
@@ -15,31 +19,83 @@ class Board(object):
         board : dict
             Dictionary describing the game's board
         """
+        self.compact = CompactBoard(
+            {int(area): board[area]['neighbours'] for area in areas},
+            {int(area): areas[area]['owner'] for area in areas},
+            {int(area): areas[area]['dice'] for area in areas},
+        )
+
+        self.create_areas({area: board[area]['hexes'] for area in areas})
+
+    def create_areas(self, hexes):
+        """Create the Area facades over the CompactBoard
+
+        Parameters
+        ----------
+        hexes : dict of str: list of list of int
+            Hex coordinates of every area
+        """
         self.areas = {}
-        # print(json.dumps(areas, sort_keys=True, indent=4))
-        for area in areas:
-            self.areas[area] = Area(area, areas[area]['owner'], areas[area]['dice'],
-                                    board[area]['neighbours'], board[area]['hexes'])
+        self.areas_by_name = [None] * len(self.compact.owner)
+        for area, area_hexes in hexes.items():
+            self.areas[area] = Area(area, self.compact, area_hexes)
+            self.areas_by_name[int(area)] = self.areas[area]
+
+    def snapshot(self):
+        """Get a copy of the board for an AI
+
+        Only owners and dice are copied, the adjacency is shared, as it is
+        read-only, and the hexes, which are needed just for rendering, are
+        left out. Whatever is done to the copy does not affect this board.
+        """
+        board = object.__new__(Board)
+        board.compact = self.compact.copy()
+        board.areas = {}
+        board.areas_by_name = [None] * len(board.compact.owner)
+        for name, area in self.areas.items():
+            board.areas[name] = board.areas_by_name[area.name] = area.snapshot(board.compact)
+        return board
+
+    def __setstate__(self, state):
+        if 'compact' not in state:  # saved before the introduction of CompactBoard
+            old_areas = state['areas']
+            self.__init__(
+                {name: {'owner': area.owner_name, 'dice': area.dice} for name, area in old_areas.items()},
+                {name: {'neighbours': area.neighbours, 'hexes': area.hexes} for name, area in old_areas.items()},
+            )
+        else:
+            self.__dict__.update(state)
 
     def get_area(self, idx: int):
         """Get Area given its name
+
+        Raises
+        ------
+        KeyError
+            If there is no area of the name
         """
-        return self.areas[str(idx)]
+        try:
+            name = int(idx)
+        except (TypeError, ValueError):
+            raise KeyError(idx)
+        if not 1 <= name < len(self.areas_by_name) or self.areas_by_name[name] is None:
+            raise KeyError(idx)
+        return self.areas_by_name[name]
 
     def get_player_areas(self, player_name: int) -> List[Area]:
         """Get all Areas belonging to a player
         """
-        return [area for area in self.areas.values() if area.get_owner_name() == player_name]
+        return [self.areas_by_name[area] for area in self.compact.get_player_areas(player_name).tolist()]
 
     def get_player_border(self, player_name: int) -> List[Area]:
         """Get all Areas belonging to a player which border other players' Areas
         """
-        return [area for area in self.get_player_areas(player_name) if self.is_at_border(area)]
+        return [self.areas_by_name[area] for area in self.compact.get_player_border(player_name)]
 
     def get_player_dice(self, player_name: int) -> int:
         """Get the number of all dice of a given player
         """
-        return sum([area.get_dice() for area in self.get_player_areas(player_name)])
+        return self.compact.get_player_dice(player_name)
 
     def get_players_regions(self, player_name: int, skip_area: Optional[int] = None) -> List[List[int]]:
         """Get all unbroken regions belonging to a player.
@@ -47,59 +103,20 @@ class Board(object):
         Returns them as a list of regions, where every region a list of names of area in the region.
         If skip_area is given, it is treated as not belonging to the player.
         """
-        area_names_to_test = [area.get_name() for area in self.get_player_areas(player_name) if area.get_name() != skip_area]
-
-        if not area_names_to_test:
-            return [[]]
-
-        regions = []
-        while area_names_to_test:
-            area_names_in_current_region = self.get_areas_region(area_names_to_test[0], area_names_to_test)
-            assert(len(area_names_in_current_region) > 0)
-            regions.append(area_names_in_current_region)
-
-            for area in area_names_in_current_region:
-                area_names_to_test.remove(area)
-
-        return regions
+        return self.compact.get_players_regions(player_name, skip_area) or [[]]
 
     def get_areas_region(self, area_name: int, available_areas: List[int]) -> List[int]:
         """Get all areas from available_areas which are in the same region as the given one.
 
         Returns them as a list of regions, where every region a list of names of area in the region.
         """
-        to_test = {area_name}
-        current_region = []
-
-        while to_test:
-            current_area = to_test.pop()
-
-            if current_area in current_region:
-                continue
-
-            current_region.append(current_area)
-
-            for neighbour_name in self.get_area(current_area).get_adjacent_areas():
-                if neighbour_name in current_region:
-                    continue
-                if neighbour_name in current_region:
-                    continue
-
-                if neighbour_name in available_areas:
-                    to_test.add(neighbour_name)
-
-        return current_region
+        available = 0
+        for area in available_areas:
+            available |= 1 << int(area)
+        return mask_to_names(self.compact.get_region_mask(int(area_name), available))
 
     def is_at_border(self, area: Area) -> bool:
-        owner = area.get_owner_name()
-        neighbourhood_names = area.get_adjacent_areas()
-
-        for neighbour_name in neighbourhood_names:
-            neighbour = self.get_area(neighbour_name)
-            if neighbour.get_owner_name() != owner:
-                return True
-
-        return False
+        return self.compact.is_at_border(area.get_name())
 
     def nb_players_alive(self) -> int:
-        return len(set(area.get_owner_name() for area in self.areas.values()))
+        return self.compact.nb_players_alive()
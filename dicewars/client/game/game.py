@@ -1,19 +1,21 @@
 import json
 from json.decoder import JSONDecodeError
 import logging
-import socket
 from queue import Queue
+import socket
 from time import sleep
 
 from .board import Board
 from .player import Player
 from dicewars.client.socket_listener import SocketListener
+from dicewars.protocol import LEGACY, FRAMED, SUPPORTED_PROTOCOLS, SUBSCRIPTION_DELTA, encode_frame
+from dicewars.transport import TcpTransport
 
 
 class Game(object):
     """Represantation of the game state
     """
-    def __init__(self, addr, port, hello_msg):
+    def __init__(self, addr, port, hello_msg, transport=None):
         """
         Parameters
         ----------
@@ -21,14 +23,18 @@ class Game(object):
             Server address
         port : int
             Server port
+        transport : TcpTransport, UnixTransport or InheritedTransport
+            How to connect to the server, TCP on the address and port by default
         """
         self.logger = logging.getLogger('CLIENT')
 
         self.buffer = 65535
         self.battle_in_progress = False
+        self.protocol = LEGACY
 
         self.server_address = addr
         self.server_port = port
+        self.transport = TcpTransport(addr, port) if transport is None else transport
         self.players = {}
 
         i = 0
@@ -43,6 +49,7 @@ class Game(object):
                 i += 1
                 sleep(0.01)
 
+        hello_msg = dict(hello_msg, protocols=SUPPORTED_PROTOCOLS, subscription=SUBSCRIPTION_DELTA)
         try:
             self.socket.send(str.encode(json.dumps(hello_msg)))
         except BrokenPipeError:
@@ -50,18 +57,12 @@ class Game(object):
             exit(1)
 
         self.start_socket_daemon()
-        while self.input_queue.empty():
-            pass
         msg = self.input_queue.get()
+        self.protocol = self.socket_listener.protocol
 
         self.logger.debug("Received message: {0}\n".format(msg))  # TODO
         if msg['type'] == 'game_start':
-            self.player_name = msg['player']
-            self.add_players(int(msg['no_players']), msg['score'])
-            self.board = Board(msg['areas'], msg['board'])
-            self.current_player = self.players[msg['current_player']]
-            self.current_player_name = msg['current_player']
-            self.players_order = msg['order']
+            self.start_game(msg)
         else:
             self.logger.error("Did not receive game state from server.")
             exit(1)
@@ -71,6 +72,69 @@ class Game(object):
     ##################
     # INITIALIZATION #
     ##################
+    def start_game(self, msg):
+        """Set up the game state from the 'game_start' message
+
+        Parameters
+        ----------
+        msg : dict
+            The 'game_start' message from the server
+        """
+        self.player_name = msg['player']
+        self.add_players(int(msg['no_players']), msg['score'])
+        self.board = Board(msg['areas'], msg['board'])
+        self.current_player = self.players[msg['current_player']]
+        self.current_player_name = msg['current_player']
+        self.players_order = msg['order']
+
+    def apply_state(self, msg):
+        """Overwrite owners and dice of areas and scores of players by a full snapshot
+
+        Parameters
+        ----------
+        msg : dict
+            The 'game_state' message from the server
+        """
+        for name, area in msg['areas'].items():
+            area_object = self.board.get_area(int(name))
+            area_object.set_owner(area['owner'])
+            area_object.set_dice(area['dice'])
+
+        for name, score in msg['score'].items():
+            self.players[int(name)].set_score(score)
+
+    def apply_battle(self, result, score):
+        """Update the board by a result of a battle
+
+        Parameters
+        ----------
+        result : dict
+            Attacking and defending area after the battle
+        score : dict
+            Scores of the players involved in the battle, if any area has changed its owner
+
+        Returns
+        -------
+        (int, int)
+            Names of the owners of the attacking and the defending area before the battle
+        """
+        atk_data = result['atk']
+        def_data = result['def']
+        attacker = self.board.get_area(int(atk_data['name']))
+        attacker.set_dice(atk_data['dice'])
+        atk_name = attacker.get_owner_name()
+
+        defender = self.board.get_area(int(def_data['name']))
+        defender.set_dice(def_data['dice'])
+        def_name = defender.get_owner_name()
+
+        if def_data['owner'] == atk_data['owner']:
+            defender.set_owner(atk_data['owner'])
+            self.players[atk_name].set_score(score[str(atk_name)])
+            self.players[def_name].set_score(score[str(def_name)])
+
+        return atk_name, def_name
+
     def add_players(self, number_of_players, score):
         """Create Players instances
         
@@ -88,7 +152,32 @@ class Game(object):
     ##############
     # NETWORKING #
     ##############
-    def send_message(self, type, attacker=None, defender=None):
+    def create_command(self, type, attacker=None, defender=None, plan=None):
+        """Create message with a command for the server
+
+        Parameters are the same as for send_message()
+
+        Returns
+        -------
+        dict
+            The message to be serialized
+        """
+        if type == 'battle':
+            return {
+                'type': 'battle',
+                'atk': attacker,
+                'def': defender
+            }
+        elif type == 'attack_plan':
+            return {
+                'type': 'attack_plan',
+                'attacks': [list(attack) for attack in plan.attacks],
+                'stop_on_loss': plan.stop_on_loss,
+                'min_dice': plan.min_dice,
+            }
+        return {'type': type}
+
+    def send_message(self, type, attacker=None, defender=None, plan=None):
         """Send message to the server
 
         Parameters
@@ -98,30 +187,43 @@ class Game(object):
             Name of attacking area
         defender : int
             Name of defending area
+        plan : AttackPlanCommand
+            Attacks to be made by the server at once
         """
-        if type == 'close':
-            msg = {'type': 'close'}
-        elif type == 'battle':
-            msg = {
-                'type': 'battle',
-                'atk': attacker,
-                'def': defender
-            }
-        elif type == 'end_turn':
-            msg = {'type': 'end_turn'}
+        msg = self.create_command(type, attacker, defender, plan)
+        if type == 'end_turn':
             self.logger.debug("Sending end_turn message.")
 
+        if self.protocol == FRAMED:
+            data = encode_frame(msg)
+        else:
+            data = str.encode(json.dumps(msg))
+
         try:
-            self.socket.send(str.encode(json.dumps(msg)))
-        except BrokenPipeError:
-            self.logger.error("Connection to server broken.")
-            exit(1)
+            self.socket.sendall(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # the server may have ended the game before reading the command,
+            # what it sent before closing the connection is still to be handled
+            self.socket_listener.join()
+            if self.input_queue.empty():
+                self.logger.error("Connection to server broken.")
+                exit(1)
+            self.logger.debug("Server closed the connection, handling its last messages.")
+
+    def close_socket(self):
+        """Close the connection to the server and wait for the listener to end
+        """
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.socket.close()
+        self.socket_listener.join()
 
     def init_socket(self):
         """Socket initialization
         """
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.connect((self.server_address, self.server_port))
+        self.socket = self.transport.connect()
 
     def start_socket_daemon(self):
         """Start message collecting daemon
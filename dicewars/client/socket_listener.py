@@ -1,10 +1,11 @@
-import sys
 import logging
 
 from json import loads
 from threading import Thread
 from json import JSONDecodeError
 
+from dicewars.protocol import LEGACY, FRAMED, FrameDecoder, is_framed
+
 
 class SocketListener(Thread):
     """Daemon for collecting messages from the server
@@ -17,6 +18,11 @@ class SocketListener(Thread):
         buffer : int
         queue : Queue
             Queue of incoming messages
+
+        Attributes
+        ----------
+        protocol : int
+            Version of protocol the server speaks
         """
         Thread.__init__(self)
         self.logger = logging.getLogger('SOCKET')
@@ -24,31 +30,70 @@ class SocketListener(Thread):
         self.socket = sock
         self.queue = queue
         self.buffer = buffer
+        self.protocol = LEGACY
 
     def run(self):
         """Collect messages from the server
+
+        The protocol chosen by the server is recognized from the first data received.
+        The listener ends when the server closes the connection, which it does once
+        the game is over, or when the client closes the socket.
+        """
+        data = self.receive()
+        if not data:
+            return
+
+        if is_framed(data):
+            self.protocol = FRAMED
+            self.collect_frames(data)
+        else:
+            self.collect_legacy_messages(data)
+
+    def receive(self):
+        """Receive data from the server
+
+        Returns
+        -------
+        bytes
+            Empty once the connection is closed
+        """
+        try:
+            return self.socket.recv(self.buffer)
+        except OSError as e:
+            self.logger.debug("Connection to server closed: {}".format(e))
+            return b''
+
+    def collect_frames(self, data):
+        """Collect messages in the FRAMED protocol
+        """
+        decoder = FrameDecoder()
+        while data:
+            for msg in decoder.feed(data):
+                self.queue.put(msg)
+            data = self.receive()
+
+    def collect_legacy_messages(self, data):
+        """Collect JSON messages terminated by '\\0'
         """
         buffer = ''
-        while True:
-            try:
-                data = self.socket.recv(self.buffer).decode()
-                messages = data.split('\0')
-                for msg in messages:
-                    if not msg:
-                        continue
-                    buffer += msg
-                    try:
-                        data = loads(buffer)
-                        if data['type'] == 'end_game':
-                            self.socket.close()
-                        self.queue.put(data)
-                        buffer = ''
-                    except JSONDecodeError as e:
-                        self.logger.warning("buffer: {0}\nmsg: {1}\nJSONDecodeError: {2}".format(buffer, msg, e))
-                        self.logger.warning("JSONDecodeError: {0}\nmsg: {1}".format(e, msg))
-                    except JSONError as e:
-                        self.logger.warning("buffer: {0}\nmsg: {1}".format(buffer, msg, e))
-                        self.logger.warning("JSONError: {0}\nmsg: {1}\nJSONError: {2}".format(e, msg))
-
-            except (ConnectionResetError, OSError):
-                exit(1)
+        data = data.decode()
+        while data:
+            messages = data.split('\0')
+            for msg in messages:
+                if not msg:
+                    continue
+                buffer += msg
+                try:
+                    data = loads(buffer)
+                    if data['type'] == 'end_game':
+                        self.socket.close()
+                    self.queue.put(data)
+                    buffer = ''
+                except JSONDecodeError as e:
+                    self.logger.warning("buffer: {0}\nmsg: {1}\nJSONDecodeError: {2}".format(buffer, msg, e))
+                    self.logger.warning("JSONDecodeError: {0}\nmsg: {1}".format(e, msg))
+                except JSONError as e:
+                    self.logger.warning("buffer: {0}\nmsg: {1}".format(buffer, msg, e))
+                    self.logger.warning("JSONError: {0}\nmsg: {1}\nJSONError: {2}".format(e, msg))
+
+            data = self.receive().decode()
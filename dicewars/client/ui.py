@@ -2,6 +2,7 @@ import hexutil
 import json
 from json.decoder import JSONDecodeError
 import logging
+import math
 from PyQt5.QtWidgets import QWidget, QGridLayout, QPushButton, QLabel
 from PyQt5.QtGui import QPainter, QColor, QPolygon, QPen, QBrush, QFont
 from PyQt5.QtCore import QPoint, Qt, QRectF, QTimer
@@ -44,6 +45,8 @@ class MainWindow(QWidget):
         for i, area in self.board.areas.items():
             for h in area.get_hexes():
                 self.areas_mapping[h] = i
+        self.max_x = max((abs(h.x) for h in self.areas_mapping), default=0) + 1
+        self.max_y = max((abs(h.y) for h in self.areas_mapping), default=0) + 1
 
         self.font = QFont('Helvetica', 16)
         self.pen = QPen()
@@ -70,8 +73,8 @@ class MainWindow(QWidget):
         x = size.width()
         y = size.height()
 
-        bbox = hexutil.Rectangle(-x // 2, -y // 2, x, y)
-        hexgrid = hexutil.HexGrid(10)
+        hexgrid = self.hex_grid()
+        self.font.setPointSize(max(4, 16 * hexgrid.width // 10))
 
         self.qp.setPen(Qt.NoPen)
         self.qp.translate(x // 2, y // 2)
@@ -85,7 +88,9 @@ class MainWindow(QWidget):
                 color = (170 + color[0] // 3, 170 + color[1] // 3, 170 + color[2] // 3)
             self.qp.setBrush(QColor(*color))
             self.qp.setPen(Qt.NoPen)
-            for h in area.get_hexes():
+            hexes = area.get_hexes()
+            area_hexes = set(hexes)
+            for h in hexes:
                 polygon = QPolygon([QPoint(*corner) for corner in hexgrid.corners(h)])
                 self.qp.drawPolygon(polygon)
 
@@ -102,7 +107,7 @@ class MainWindow(QWidget):
                     self.qp.restore()
 
                 for n in h.neighbours():
-                    if n not in area.get_hexes():
+                    if n not in area_hexes:
                         line = []
                         for corner in hexgrid.corners(h):
                             if corner in hexgrid.corners(n):
@@ -111,7 +116,7 @@ class MainWindow(QWidget):
 
             self.qp.save()
             pen = QPen()
-            pen.setWidth(3)
+            pen.setWidth(max(1, 3 * hexgrid.width // 10))
             self.qp.setPen(pen)
             self.qp.setBrush(QColor())
             self.qp.setRenderHint(QPainter.Antialiasing)
@@ -148,9 +153,22 @@ class MainWindow(QWidget):
         size = self.size()
         x = size.width()//2
         y = size.height()//2
-        hexgrid = hexutil.HexGrid(10)
+        hexgrid = self.hex_grid()
         return hexgrid.hex_at_coordinate(position.x() - x, position.y() - y)
 
+    def hex_grid(self):
+        """Return the grid of hexes fitting the board into the window
+
+        Hexes are 10 pixels wide, unless the board is too large for that.
+        """
+        size = self.size()
+        width = min(
+            10,
+            size.width() // (2 * self.max_x),
+            int(size.height() / (2 * math.sqrt(3) * self.max_y)),
+        )
+        return hexutil.HexGrid(max(2, width))
+
 
 class Battle(QWidget):
     """Widget for displaying battle results
@@ -346,6 +364,19 @@ class ClientUI(QWidget):
             if not self.handle_server_message(event):
                 self.logger.debug('Game has ended.')
 
+    def apply_battle(self, result, score):
+        """Update the board by a result of a battle and remember it to be drawn
+        """
+        atk_name, def_name = self.game.apply_battle(result, score)
+        atk_data = result['atk']
+        def_data = result['def']
+        self.game.battle = {
+            'atk_name' : atk_name,
+            'def_name' : def_name,
+            'atk_dice' : atk_data['pwr'],
+            'def_dice' : def_data['pwr']
+        }
+
     def handle_server_message(self, event):
         """Handle event associated to message from server
         """
@@ -360,28 +391,12 @@ class ClientUI(QWidget):
 
         if msg['type'] == 'battle':
             self.game.draw_battle = True
-            atk_data = msg['result']['atk']
-            def_data = msg['result']['def']
-            self.logger.debug(type(atk_data['name']))
-            attacker = self.game.board.get_area(str(atk_data['name']))
-            attacker.set_dice(atk_data['dice'])
-            atk_name = attacker.get_owner_name()
-
-            defender = self.game.board.get_area(def_data['name'])
-            defender.set_dice(def_data['dice'])
-            def_name = defender.get_owner_name()
-
-            if def_data['owner'] == atk_data['owner']:
-                defender.set_owner(atk_data['owner'])
-                self.game.players[atk_name].set_score(msg['score'][str(atk_name)])
-                self.game.players[def_name].set_score(msg['score'][str(def_name)])
-
-            self.game.battle = {
-                'atk_name' : atk_name,
-                'def_name' : def_name,
-                'atk_dice' : atk_data['pwr'],
-                'def_dice' : def_data['pwr']
-            }
+            self.apply_battle(msg['result'], msg['score'])
+
+        elif msg['type'] == 'battles':
+            self.game.draw_battle = bool(msg['results'])
+            for result in msg['results']:
+                self.apply_battle(result, msg['score'])
 
         elif msg['type'] == 'end_turn':
             self.logger.debug(msg)
@@ -406,8 +421,8 @@ class ClientUI(QWidget):
             self.game.battle = False
             self.game.players[self.game.current_player_name].activate()
 
-            for i, player in self.game.players.items():
-                player.set_reserve(msg['reserves'][str(i)])
+            for i, reserve in msg['reserves'].items():
+                self.game.players[int(i)].set_reserve(reserve)
 
         elif msg['type'] == 'game_end':
             if msg['winner'] == self.game.player_name:
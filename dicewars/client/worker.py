@@ -0,0 +1,90 @@
+import json
+import logging
+import random
+import socket
+
+from dicewars.client.ai_driver import AIDriver, get_ai_constructor, get_nickname
+from dicewars.client.game.game import Game
+from dicewars.transport import InheritedTransport, TcpTransport, UnixTransport
+
+
+def command_transport(command, fds):
+    """Transport to connect to the server of a game commanded to be played
+
+    Parameters
+    ----------
+    command : dict
+        The 'play' command
+    fds : list of int
+        Descriptors passed along with the command
+    """
+    if fds:
+        return InheritedTransport(fds)
+    elif command.get('unix') is not None:
+        return UnixTransport(command['unix'])
+    else:
+        return TcpTransport(command['address'], command['port'])
+
+
+class AIWorker:
+    """Client playing one game after another, as commanded by a launcher
+
+    The launcher sends a 'play' command for every game, saying which AI
+    is to play, with what seed of the random generator and how to connect
+    to the server, possibly passing the connection itself. Only the AI is
+    constructed for every game, the process and the modules it has imported
+    live on, which saves starting a client process for every game.
+    When the game ends, the worker answers by a 'game_over' message.
+
+    The control connection is a SOCK_SEQPACKET socket, so that every
+    command is received as a whole. The worker ends when it gets closed.
+    """
+    def __init__(self, control):
+        """
+        Parameters
+        ----------
+        control : socket
+            Connection to the launcher
+        """
+        self.logger = logging.getLogger('WORKER')
+        self.control = control
+
+    def run(self):
+        """Play games until the launcher closes the connection
+        """
+        while True:
+            try:
+                data, fds, _, _ = socket.recv_fds(self.control, 65535, 1)
+            except ConnectionResetError:
+                return
+            if not data:
+                return
+
+            command = json.loads(data.decode())
+            if command['type'] != 'play':
+                raise ValueError("Unknown command of the launcher '{}'".format(command))
+            self.play(command, fds)
+            self.control.send(str.encode(json.dumps({'type': 'game_over'})))
+
+    def play(self, command, fds):
+        """Play a game, like a client process started with the same options would
+        """
+        self.logger.info("Playing a game as {}".format(command['ai']))
+        ai_constructor = get_ai_constructor(command['ai'])
+        random.seed(command.get('seed'))
+
+        hello_msg = {
+            'type': 'client_desc',
+            'nickname': get_nickname(command['ai']),
+        }
+        if command.get('session') is not None:
+            hello_msg['session'] = command['session']
+
+        game = None
+        try:
+            game = Game(command.get('address'), command.get('port'), hello_msg, command_transport(command, fds))
+            AIDriver(game, ai_constructor).run()
+        except SystemExit:
+            self.logger.warning("Lost the connection to the server during the game")
+            if game is not None:
+                game.close_socket()
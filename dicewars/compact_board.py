@@ -0,0 +1,238 @@
+import numpy as np
+
+
+def read_only(array):
+    """Get a copy of the array which cannot be made writeable again
+
+    The copy is backed by immutable bytes, so unlike with just clearing the
+    writeable flag, nobody can set it back.
+    """
+    return np.frombuffer(array.tobytes(), dtype=array.dtype)
+
+
+def mask_to_names(mask):
+    """Names of areas in a bitmask in ascending order
+    """
+    names = []
+    while mask:
+        lowest = mask & -mask
+        names.append(lowest.bit_length() - 1)
+        mask ^= lowest
+    return names
+
+
+class CompactBoard:
+    """Board stored in flat NumPy arrays
+
+    Areas are identified by their integer names, which index the arrays
+    directly; the slots not used by any area, e.g. 0, have no owner.
+    Neighbours are stored in the CSR format: the neighbours of area a are
+    adjacency[adjacency_ptr[a]:adjacency_ptr[a+1]].
+
+    Owners and dice are the only mutable part. The names and the adjacency
+    are read-only and shared by all copies of the board.
+
+    Attributes
+    ----------
+    names : numpy.ndarray of int
+        Sorted names of all areas
+    owner : numpy.ndarray of int8
+        Owner of every area, 0 for unused slots
+    dice : numpy.ndarray of int8
+        Number of dice in every area
+    adjacency_ptr : numpy.ndarray of int32
+    adjacency : numpy.ndarray of int32
+    adjacency_source : numpy.ndarray of int32
+        Area whose neighbour is at the same position of adjacency
+    neighbour_matrix : numpy.ndarray of int32
+        Neighbours of every area in rows padded by 0, which is never an area
+    adjacency_masks : tuple of int
+        Neighbours of every area as a bitmask, bit a standing for area a
+
+    Regions of players are found by flood fill over bitmasks of areas and
+    cached until the ownership of any area changes.
+    """
+    def __init__(self, neighbours, owners, dice):
+        """
+        Parameters
+        ----------
+        neighbours : dict of int: list of int
+            Names of adjacent areas of every area
+        owners : dict of int: int
+            Owner of every area
+        dice : dict of int: int
+            Number of dice in every area
+        """
+        self.names = np.array(sorted(int(name) for name in neighbours), dtype=np.int32)
+        nb_slots = int(self.names[-1]) + 1 if len(self.names) else 1
+
+        self.owner = np.zeros(nb_slots, dtype=np.int8)
+        self.dice = np.zeros(nb_slots, dtype=np.int8)
+        degrees = np.zeros(nb_slots, dtype=np.int32)
+        for name, adjacent in neighbours.items():
+            self.owner[int(name)] = owners[name]
+            self.dice[int(name)] = dice[name]
+            degrees[int(name)] = len(adjacent)
+
+        self.adjacency_ptr = np.zeros(nb_slots + 1, dtype=np.int32)
+        np.cumsum(degrees, out=self.adjacency_ptr[1:])
+        self.adjacency = np.zeros(self.adjacency_ptr[-1], dtype=np.int32)
+        for name, adjacent in neighbours.items():
+            start = self.adjacency_ptr[int(name)]
+            self.adjacency[start:start + len(adjacent)] = [int(n) for n in adjacent]
+
+        self.adjacency_source = np.repeat(np.arange(nb_slots, dtype=np.int32), degrees)
+        self.neighbour_matrix = np.zeros((nb_slots, degrees.max(initial=0)), dtype=np.int32)
+        positions = np.arange(len(self.adjacency)) - self.adjacency_ptr[self.adjacency_source]
+        self.neighbour_matrix[self.adjacency_source, positions] = self.adjacency
+
+        self.names = read_only(self.names)
+        self.adjacency_ptr = read_only(self.adjacency_ptr)
+        self.adjacency = read_only(self.adjacency)
+        self.adjacency_source = read_only(self.adjacency_source)
+        self.neighbour_matrix = read_only(self.neighbour_matrix).reshape(self.neighbour_matrix.shape)
+
+        masks = [0] * nb_slots
+        for name, adjacent in neighbours.items():
+            for n in adjacent:
+                masks[int(name)] |= 1 << int(n)
+        self.adjacency_masks = tuple(masks)
+
+        self.regions_version = None
+        self.regions_cache = {}
+
+    @classmethod
+    def from_server_board(cls, board):
+        """Create a CompactBoard from the server's Board
+
+        Parameters
+        ----------
+        board : dicewars.server.game.board.Board
+        """
+        areas = board.areas.values()
+        return cls(
+            {area.get_name(): area.get_adjacent_areas_names() for area in areas},
+            {area.get_name(): area.get_owner_name() or 0 for area in areas},
+            {area.get_name(): area.get_dice() for area in areas},
+        )
+
+    def copy(self):
+        """Copy owners and dice, sharing the static rest of the board
+        """
+        board = object.__new__(CompactBoard)
+        board.__dict__.update(self.__dict__)
+        board.owner = self.owner.copy()
+        board.dice = self.dice.copy()
+        board.regions_version = None
+        board.regions_cache = {}
+        return board
+
+    def get_number_of_areas(self):
+        return len(self.names)
+
+    def get_neighbours(self, area):
+        """Names of areas adjacent to the given one, as a read-only array
+        """
+        return self.adjacency[self.adjacency_ptr[area]:self.adjacency_ptr[area + 1]]
+
+    def get_owner(self, area):
+        return int(self.owner[area])
+
+    def get_dice(self, area):
+        return int(self.dice[area])
+
+    def set_owner(self, area, owner):
+        self.owner[area] = owner
+
+    def set_dice(self, area, dice):
+        self.dice[area] = dice
+
+    def get_player_areas(self, player_name):
+        """Names of areas of a player in ascending order
+        """
+        return np.flatnonzero(self.owner == player_name)
+
+    def get_player_dice(self, player_name):
+        return int(self.dice[self.owner == player_name].sum())
+
+    def is_at_border(self, area):
+        return bool(np.any(self.owner[self.get_neighbours(area)] != self.owner[area]))
+
+    def get_player_border(self, player_name):
+        """Names of areas of a player adjacent to any area of other players
+        """
+        return [area for area in self.get_player_areas(player_name).tolist() if self.is_at_border(area)]
+
+    def get_owner_mask(self, player_name):
+        """Bitmask of areas of a player
+        """
+        bits = np.packbits(self.owner == player_name, bitorder='little')
+        return int.from_bytes(bits.tobytes(), 'little')
+
+    def get_region_mask(self, area, available):
+        """Bitmask of the region of available areas containing the given one
+
+        Parameters
+        ----------
+        area : int
+        available : int
+            Bitmask of areas which can be a part of the region
+        """
+        region = frontier = 1 << area
+        while frontier:
+            reachable = 0
+            while frontier:
+                lowest = frontier & -frontier
+                reachable |= self.adjacency_masks[lowest.bit_length() - 1]
+                frontier ^= lowest
+            frontier = reachable & available & ~region
+            region |= frontier
+        return region
+
+    def get_regions_masks(self, player_name, skip_area=None):
+        """Bitmasks of all unbroken regions belonging to a player
+
+        Regions are ordered by their area with the lowest name. The result is
+        cached as long as the owners of areas stay the same.
+        """
+        version = self.owner.tobytes()
+        if version != self.regions_version:
+            self.regions_version = version
+            self.regions_cache = {}
+
+        key = (player_name, skip_area)
+        if key not in self.regions_cache:
+            available = self.get_owner_mask(player_name)
+            if skip_area is not None:
+                available &= ~(1 << skip_area)
+
+            regions = []
+            while available:
+                lowest = available & -available
+                region = self.get_region_mask(lowest.bit_length() - 1, available)
+                regions.append(region)
+                available &= ~region
+            self.regions_cache[key] = regions
+
+        return self.regions_cache[key]
+
+    def get_players_regions(self, player_name, skip_area=None):
+        """Get all unbroken regions belonging to a player
+
+        Regions are ordered by their area with the lowest name.
+        If skip_area is given, it is treated as not belonging to the player.
+
+        Returns
+        -------
+        list of list of int
+            Names of areas of every region in ascending order
+        """
+        return [mask_to_names(region) for region in self.get_regions_masks(player_name, skip_area)]
+
+    def get_largest_region_size(self, player_name, skip_area=None):
+        """Number of areas in the largest region of a player
+        """
+        return max((bin(region).count('1') for region in self.get_regions_masks(player_name, skip_area)), default=0)
+
+    def nb_players_alive(self):
+        return len(np.unique(self.owner[self.names]))
@@ -0,0 +1,170 @@
+import json
+import logging
+import random
+from collections import deque
+
+from dicewars.client.ai_driver import AIDriver, get_ai_constructor, get_nickname
+from dicewars.client.game.game import Game as ClientGame
+from dicewars.protocol import SUBSCRIPTION_DELTA
+from dicewars.server.game import Game
+
+
+class RandomState:
+    """Private state of the global random generator
+
+    Every process of a socket-based game has its own instance of the global
+    random generator. Entering this context swaps the global state for this
+    private one, so that in-process participants do not influence each other.
+    """
+    def __init__(self, seed):
+        outer_state = random.getstate()
+        random.seed(seed)
+        self.state = random.getstate()
+        random.setstate(outer_state)
+
+    def __enter__(self):
+        self.outer_state = random.getstate()
+        random.setstate(self.state)
+
+    def __exit__(self, type, value, traceback):
+        self.state = random.getstate()
+        random.setstate(self.outer_state)
+
+
+class LocalClient(ClientGame):
+    """Client side of a game whose server lives in the same process
+    """
+    def __init__(self, server, msg):
+        """
+        Parameters
+        ----------
+        server : LocalGame
+        msg : dict
+            The 'game_start' message from the server
+        """
+        self.logger = logging.getLogger('CLIENT')
+        self.server = server
+        self.players = {}
+        self.start_game(msg)
+
+    def send_message(self, type, attacker=None, defender=None, plan=None):
+        msg = self.create_command(type, attacker, defender, plan)
+        self.server.inboxes[self.player_name].append(msg)
+
+    def close_socket(self):
+        pass
+
+
+class LocalGame(Game):
+    """Server side of a game played without any sockets
+
+    The AIs are driven by the very same AIDriver as in a client process,
+    including the Fischer clock, and each of them is called directly when
+    the server delivers a message to it. The drivers check attacks of
+    their AIs before sending them, as over sockets, so the server sees
+    the same commands.
+    """
+    def __init__(self, board, area_ownership, ais, client_seed=None):
+        """
+        Parameters
+        ----------
+        board : Board
+            Board with dice already assigned
+        area_ownership : dict of int: int
+            Initial assignment of areas to players
+        ais : list of str
+            AI specifications, the i-th AI plays as player i+1
+        client_seed : int
+            Seed of the random generator of every client
+        """
+        self.ais = ais
+        self.clients = {}
+        self.drivers = {}
+        self.random_states = {}
+        self.inboxes = {}
+        self.client_seed = client_seed
+
+        nicknames = [get_nickname(ai) for ai in ais]
+        if len(set(nicknames)) < len(nicknames):
+            nicknames = None
+
+        super().__init__(board, area_ownership, len(ais), None, None, nicknames)
+
+    def create_socket(self):
+        pass
+
+    def connect_clients(self):
+        """Register an in-process client for every player
+        """
+        for i in range(1, self.number_of_players + 1):
+            self.players[i].set_nickname(get_nickname(self.ais[i-1]))
+            self.players[i].set_subscription(SUBSCRIPTION_DELTA)
+            self.inboxes[i] = deque()
+        self.client_sockets = {}
+
+    def close_connections(self):
+        pass
+
+    def get_message(self, player):
+        try:
+            msg = self.inboxes[player].popleft()
+        except IndexError:
+            raise RuntimeError("Player {} did not send any command".format(player))
+        self.logger.debug("Got message from client {}; type: {}".format(player, msg['type']))
+        return msg
+
+    def encode_message(self, client, msg):
+        """Convert the message to what a client gets from json.loads()
+        """
+        return json.loads(json.dumps(msg))
+
+    def send_encoded(self, client, msg):
+        self.deliver(client.get_name(), msg)
+
+    def deliver(self, player_name, msg):
+        """Hand the message over to the client and let its AI react to it
+        """
+        if msg['type'] == 'game_start':
+            self.start_client(player_name, msg)
+            return
+
+        driver = self.drivers[player_name]
+        with self.random_states[player_name]:
+            if driver.handle_server_message(msg):
+                driver.make_move()
+
+    def start_client(self, player_name, msg):
+        self.random_states[player_name] = RandomState(self.client_seed)
+        self.clients[player_name] = LocalClient(self, msg)
+        with self.random_states[player_name]:
+            ai_constructor = get_ai_constructor(self.ais[player_name-1])
+            self.drivers[player_name] = AIDriver(self.clients[player_name], ai_constructor)
+
+
+def play_game(board, area_ownership, ais, fixed=None, client_seed=None):
+    """Play a whole game among AIs within this process
+
+    Given the same seeds, the result is identical to the one of a game
+    played through scripts/server.py and scripts/client.py.
+    As the AIs are timed by SIGALRM, this has to be called from the main thread.
+
+    Parameters
+    ----------
+    board : Board
+        Board with dice already assigned, see create_board()
+    area_ownership : dict of int: int
+        Initial assignment of areas to players
+    ais : list of str
+        AI specifications, e.g. 'dt.sdc'
+    fixed : int
+        Seed for player order and dice rolls
+    client_seed : int
+        Seed of the random generator of every client
+
+    Returns
+    -------
+    GameSummary
+    """
+    with RandomState(fixed):
+        game = LocalGame(board, area_ownership, ais, client_seed)
+        return game.play()
@@ -0,0 +1,281 @@
+import json
+import struct
+
+LEGACY = 0
+FRAMED = 1
+SUPPORTED_PROTOCOLS = [FRAMED, LEGACY]
+
+FRAME_HEADER = struct.Struct('!BI')
+
+SUBSCRIPTION_FULL = 'full'
+SUBSCRIPTION_DELTA = 'delta'
+
+RECORD_MAP = 0
+RECORD_BATTLE = 1
+RECORD_END_TURN = 2
+RECORD_BATTLE_COMMAND = 3
+RECORD_END_TURN_COMMAND = 4
+RECORD_BATTLES = 5
+RECORD_ATTACK_PLAN_COMMAND = 6
+
+BATTLE_RESULT = struct.Struct('!HBBHHBBH')
+BATTLE_COMMAND = struct.Struct('!HH')
+ATTACK_PLAN_OPTIONS = struct.Struct('!BBH')
+COUNT = struct.Struct('!H')
+PLAYER_VALUE = struct.Struct('!BH')
+AREA_STATE = struct.Struct('!HBB')
+
+
+def choose_protocol(hello_msg):
+    """Choose the protocol for a client given its hello message
+
+    The client lists the protocols it speaks in 'protocols' of its hello
+    message, which itself is always sent in the LEGACY protocol. In LEGACY,
+    the server sends JSON documents terminated by '\0' and clients send bare
+    JSON documents, relying on every recv() returning exactly one of them.
+    """
+    offered = hello_msg.get('protocols', [LEGACY])
+    for version in SUPPORTED_PROTOCOLS:
+        if version in offered:
+            return version
+    return LEGACY
+
+
+def choose_subscription(hello_msg):
+    """Choose what a client gets after every battle and end of turn
+
+    With SUBSCRIPTION_FULL, the client gets the whole state of the game,
+    with SUBSCRIPTION_DELTA only the changed areas, scores and reserves.
+    """
+    if hello_msg.get('subscription') == SUBSCRIPTION_DELTA:
+        return SUBSCRIPTION_DELTA
+    return SUBSCRIPTION_FULL
+
+
+def is_framed(data):
+    """Tell whether a stream starting by data is in the FRAMED protocol
+    """
+    return data[:1] == bytes([FRAMED])
+
+
+def encode_frame(msg):
+    """Encode a message as a frame of the FRAMED protocol
+
+    A frame is a header (protocol version, payload length) followed by the
+    payload. The first byte of the payload tells the kind of record: battle
+    results, batches of them, ends of turns and commands of clients are
+    struct-packed, other messages are JSON maps.
+
+    Parameters
+    ----------
+    msg : dict
+        Message with keys being either int or str
+
+    Returns
+    -------
+    bytes
+    """
+    try:
+        payload = encode_record(msg)
+    except (struct.error, KeyError, TypeError, ValueError):
+        payload = None
+    if payload is None:
+        payload = bytes([RECORD_MAP]) + str.encode(json.dumps(msg))
+
+    return FRAME_HEADER.pack(FRAMED, len(payload)) + payload
+
+
+def encode_record(msg):
+    """Pack messages of the frequent types, None for the other ones
+    """
+    if msg['type'] == 'battle' and 'result' in msg:
+        return b''.join([
+            bytes([RECORD_BATTLE]),
+            pack_battle(msg['result']),
+            pack_player_values(msg.get('score', {})),
+            pack_areas(msg.get('areas', {})),
+        ])
+    elif msg['type'] == 'battles':
+        return b''.join(
+            [bytes([RECORD_BATTLES]), COUNT.pack(len(msg['results']))]
+            + [pack_battle(result) for result in msg['results']]
+            + [pack_player_values(msg.get('score', {})), pack_areas(msg.get('areas', {}))]
+        )
+    elif msg['type'] == 'battle' and set(msg) == {'type', 'atk', 'def'}:
+        return bytes([RECORD_BATTLE_COMMAND]) + BATTLE_COMMAND.pack(msg['atk'], msg['def'])
+    elif msg['type'] == 'end_turn' and 'current_player' in msg:
+        return b''.join([
+            bytes([RECORD_END_TURN, msg['current_player']]),
+            pack_player_values(msg.get('reserves', {})),
+            pack_player_values(msg.get('score', {})),
+            pack_areas(msg.get('areas', {})),
+        ])
+    elif msg == {'type': 'end_turn'}:
+        return bytes([RECORD_END_TURN_COMMAND])
+    elif msg['type'] == 'attack_plan':
+        return b''.join(
+            [bytes([RECORD_ATTACK_PLAN_COMMAND]),
+             ATTACK_PLAN_OPTIONS.pack(msg['stop_on_loss'], msg['min_dice'], len(msg['attacks']))]
+            + [BATTLE_COMMAND.pack(source, target) for source, target in msg['attacks']]
+        )
+    return None
+
+
+def pack_battle(result):
+    atk = result['atk']
+    df = result['def']
+    return BATTLE_RESULT.pack(
+        atk['name'], atk['dice'], atk['owner'], atk['pwr'],
+        df['name'], df['dice'], df['owner'], df['pwr'],
+    )
+
+
+def unpack_battle(payload, offset):
+    fields = BATTLE_RESULT.unpack_from(payload, offset)
+    keys = ['name', 'dice', 'owner', 'pwr']
+    result = {
+        'atk': dict(zip(keys, fields[:4])),
+        'def': dict(zip(keys, fields[4:])),
+    }
+    return result, offset + BATTLE_RESULT.size
+
+
+def pack_player_values(values):
+    return COUNT.pack(len(values)) + b''.join(
+        PLAYER_VALUE.pack(int(player), value) for player, value in values.items()
+    )
+
+
+def pack_areas(areas):
+    """Pack owners and dice of areas; their adjacency is static and left out
+    """
+    return COUNT.pack(len(areas)) + b''.join(
+        AREA_STATE.pack(int(name), area['owner'], area['dice']) for name, area in areas.items()
+    )
+
+
+def unpack_player_values(payload, offset):
+    count, = COUNT.unpack_from(payload, offset)
+    offset += COUNT.size
+    values = {}
+    for _ in range(count):
+        player, value = PLAYER_VALUE.unpack_from(payload, offset)
+        offset += PLAYER_VALUE.size
+        values[str(player)] = value
+    return values, offset
+
+
+def unpack_areas(payload, offset):
+    count, = COUNT.unpack_from(payload, offset)
+    offset += COUNT.size
+    areas = {}
+    for _ in range(count):
+        name, owner, dice = AREA_STATE.unpack_from(payload, offset)
+        offset += AREA_STATE.size
+        areas[str(name)] = {'owner': owner, 'dice': dice}
+    return areas, offset
+
+
+def decode_payload(payload):
+    """Decode payload of a frame into a message
+
+    The message is the same as JSON would make of it, i.e. keys of
+    dictionaries are strings.
+    """
+    kind = payload[0]
+    if kind == RECORD_MAP:
+        return json.loads(payload[1:].decode())
+
+    elif kind == RECORD_BATTLE:
+        msg = {'type': 'battle'}
+        msg['result'], offset = unpack_battle(payload, 1)
+        msg['score'], offset = unpack_player_values(payload, offset)
+        msg['areas'], offset = unpack_areas(payload, offset)
+        return msg
+
+    elif kind == RECORD_BATTLES:
+        count, = COUNT.unpack_from(payload, 1)
+        offset = 1 + COUNT.size
+        msg = {'type': 'battles', 'results': []}
+        for _ in range(count):
+            result, offset = unpack_battle(payload, offset)
+            msg['results'].append(result)
+        msg['score'], offset = unpack_player_values(payload, offset)
+        msg['areas'], offset = unpack_areas(payload, offset)
+        return msg
+
+    elif kind == RECORD_END_TURN:
+        msg = {'type': 'end_turn', 'current_player': payload[1]}
+        msg['reserves'], offset = unpack_player_values(payload, 2)
+        msg['score'], offset = unpack_player_values(payload, offset)
+        msg['areas'], offset = unpack_areas(payload, offset)
+        return msg
+
+    elif kind == RECORD_BATTLE_COMMAND:
+        atk, df = BATTLE_COMMAND.unpack_from(payload, 1)
+        return {'type': 'battle', 'atk': atk, 'def': df}
+
+    elif kind == RECORD_END_TURN_COMMAND:
+        return {'type': 'end_turn'}
+
+    elif kind == RECORD_ATTACK_PLAN_COMMAND:
+        stop_on_loss, min_dice, count = ATTACK_PLAN_OPTIONS.unpack_from(payload, 1)
+        attacks = [
+            list(BATTLE_COMMAND.unpack_from(payload, 1 + ATTACK_PLAN_OPTIONS.size + i * BATTLE_COMMAND.size))
+            for i in range(count)
+        ]
+        return {'type': 'attack_plan', 'attacks': attacks, 'stop_on_loss': bool(stop_on_loss), 'min_dice': min_dice}
+
+    raise ValueError("Unknown record kind {}".format(kind))
+
+
+class FrameDecoder:
+    """Reassembles frames from chunks of a byte stream
+
+    Frames split across several chunks as well as several frames in a single
+    chunk are handled.
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """Add data received from the stream
+
+        Returns
+        -------
+        list of dict
+            Messages completed by the data
+        """
+        self.buffer += data
+        messages = []
+        offset = 0
+        while len(self.buffer) - offset >= FRAME_HEADER.size:
+            version, length = FRAME_HEADER.unpack_from(self.buffer, offset)
+            if version != FRAMED:
+                raise ValueError("Unsupported protocol version {}".format(version))
+            end = offset + FRAME_HEADER.size + length
+            if len(self.buffer) < end:
+                break
+            messages.append(decode_payload(bytes(self.buffer[offset + FRAME_HEADER.size:end])))
+            offset = end
+
+        del self.buffer[:offset]
+        return messages
+
+
+class FramedSocket:
+    """Blocking reading of whole messages from a socket in the FRAMED protocol
+    """
+    def __init__(self, sock, buffer=65535):
+        self.socket = sock
+        self.buffer = buffer
+        self.decoder = FrameDecoder()
+        self.pending = []
+
+    def get_message(self):
+        while not self.pending:
+            data = self.socket.recv(self.buffer)
+            if not data:
+                raise ConnectionResetError("Connection closed by peer")
+            self.pending.extend(self.decoder.feed(data))
+        return self.pending.pop(0)
@@ -1,3 +1,5 @@
 from .game import Game
 from .board import Board
-from .generator import BoardGenerator
+from .generator import BoardGenerator, BoardShape, board_shape
+from .initialization import create_board
+from .library import BoardLibrary
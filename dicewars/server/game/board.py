@@ -15,6 +15,8 @@ class Board(object):
         ----------
         areas : dict of int: Area
             Dictionary of Area instances
+        adjacency : set of (int, int)
+            Pairs of names of adjacent areas, in both orders
         """
         self.board = board
         self.areas = {}
@@ -22,6 +24,7 @@ class Board(object):
             self.areas[area] = Area(area, board[area]['neighbours'])
         for a in self.areas:
             self.areas[a].add_adjacent_areas(self)
+        self.adjacency = {(a, n) for a in board for n in board[a]['neighbours']}
 
     def get_area_by_name(self, name):
         """Get instance of Area by its name
@@ -34,11 +37,16 @@ class Board(object):
         Returns
         -------
         Area
-            Instance of an area
+            Instance of an area, None if there is no such area
         """
-        for a in self.areas:
-            if name == self.areas[a].get_name():
-                return self.areas[a]
+        if not isinstance(name, int):
+            return None
+        return self.areas.get(name)
+
+    def are_adjacent(self, name, other_name):
+        """Whether two areas, given by their names, are adjacent
+        """
+        return (name, other_name) in self.adjacency
 
     def get_board(self):
         """Get dictionary listing adjacent areas for each area
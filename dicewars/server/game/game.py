@@ -2,21 +2,34 @@ import json
 from json.decoder import JSONDecodeError
 import logging
 import random
-import socket
 import sys
 
+from dicewars.protocol import FRAMED, SUBSCRIPTION_DELTA, choose_protocol, choose_subscription, encode_frame
+from dicewars.transport import TcpTransport
 from .player import Player
 
 from .summary import GameSummary
 
 MAX_PASS_ROUNDS = 8
 MAX_BATTLES_PER_GAME = 10000  # obsevered maximum of 5671 over over 100k games
+MAX_BATTLES_PER_AREA = 300  # raises the limit for boards of more than 33 areas
+MAX_REINFORCEMENT = 64  # dice given at the end of a turn, reserve included
+REINFORCEMENT_PER_AREA = 2  # raises the limit for boards of more than 32 areas
+
+
+def max_reinforcement(nb_areas):
+    """Most dice a player can get at the end of a turn on a board of nb_areas areas
+
+    Without raising the limit for large boards, the last players standing
+    on them cannot reinforce fast enough to ever beat each other.
+    """
+    return max(MAX_REINFORCEMENT, REINFORCEMENT_PER_AREA * nb_areas)
 
 
 class Game(object):
     """Instance of the game
     """
-    def __init__(self, board, area_ownership, players, addr, port, nicknames_order):
+    def __init__(self, board, area_ownership, players, addr, port, nicknames_order, transport=None):
         """Initialize game and connect clients
 
         Parameters
@@ -27,6 +40,8 @@ class Game(object):
             IP address of the server
         port : int
             Port number
+        transport : TcpTransport, UnixTransport or InheritedTransport
+            How clients connect, TCP on the address and port by default
 
         Attributes
         ----------
@@ -34,12 +49,17 @@ class Game(object):
             Size of socket buffer
         number_of_players : int
             Number of players
+        max_battles : int
+            Number of battles after which the game is cancelled
+        max_reinforcement : int
+            Most dice a player can get at the end of a turn
         """
         self.buffer = 65535
         self.logger = logging.getLogger('SERVER')
 
         self.address = addr
         self.port = port
+        self.transport = TcpTransport(addr, port) if transport is None else transport
         self.number_of_players = players
 
         self.nb_players_alive = players
@@ -49,6 +69,8 @@ class Game(object):
         self.create_socket()
 
         self.board = board
+        self.max_battles = max(MAX_BATTLES_PER_GAME, MAX_BATTLES_PER_AREA * board.get_number_of_areas())
+        self.max_reinforcement = max_reinforcement(board.get_number_of_areas())
         self.initialize_players()
 
         self.connect_clients()
@@ -68,15 +90,8 @@ class Game(object):
         """Main loop of the game
         """
         try:
-            for i in range(1, self.number_of_players + 1):
-                player = self.players[i]
-                self.send_message(player, 'game_state')
-            while True:
-                self.logger.debug("Current player {}".format(self.current_player.get_name()))
-                self.handle_player_turn()
-                if self.check_win_condition():
-                    sys.stdout.write(str(self.summary))
-                    break
+            summary = self.play()
+            sys.stdout.write(str(summary))
 
         except KeyboardInterrupt:
             self.logger.info("Game interrupted.")
@@ -93,6 +108,23 @@ class Game(object):
         except BrokenPipeError:
             pass
 
+    def play(self):
+        """Play the game until one of the win conditions is met
+
+        Returns
+        -------
+        GameSummary
+            Summary of the finished game
+        """
+        for i in range(1, self.number_of_players + 1):
+            player = self.players[i]
+            self.send_message(player, 'game_state')
+        while True:
+            self.logger.debug("Current player {}".format(self.current_player.get_name()))
+            self.handle_player_turn()
+            if self.check_win_condition():
+                return self.summary
+
     ##############
     # GAME LOGIC #
     ##############
@@ -115,20 +147,88 @@ class Game(object):
         self.logger.debug("Handling player {} ({}) turn".format(self.current_player.get_name(), self.current_player.nickname))
         player = self.current_player.get_name()
         msg = self.get_message(player)
+        self.handle_message(msg)
 
+    def handle_message(self, msg):
+        """Carry out the action requested by the current player
+
+        Parameters
+        ----------
+        msg : dict
+            Message from the client of the current player
+        """
         if msg['type'] == 'battle':
+            attacker = self.board.get_area_by_name(msg.get('atk'))
+            defender = self.board.get_area_by_name(msg.get('def'))
+            if not self.attack_is_possible(self.current_player.get_name(), attacker, defender):
+                self.reject_move(msg)
+                return
+
             self.nb_consecutive_end_of_turns = 0
-            battle = self.battle(self.board.get_area_by_name(msg['atk']), self.board.get_area_by_name(msg['def']))
+            involved_players = [attacker.get_owner_name(), defender.get_owner_name()]
+            battle = self.battle(attacker, defender)
             self.summary.add_battle()
             self.logger.debug("Battle result: {}".format(battle))
-            for p in self.players:
-                self.send_message(self.players[p], 'battle', battle=battle)
+            self.broadcast('battle', battle=battle, players=involved_players)
+
+        elif msg['type'] == 'attack_plan':
+            if not self.plan_is_possible(msg):
+                self.reject_move(msg)
+                return
+
+            self.nb_consecutive_end_of_turns = 0
+            battles, involved_players = self.execute_attack_plan(msg['attacks'], msg['stop_on_loss'], msg['min_dice'])
+            self.logger.debug("Attack plan made {} of {} attacks".format(len(battles), len(msg['attacks'])))
+            self.broadcast('battles', battles=battles, players=involved_players)
 
         elif msg['type'] == 'end_turn':
-            self.nb_consecutive_end_of_turns += 1
-            affected_areas = self.end_turn()
-            for p in self.players:
-                self.send_message(self.players[p], 'end_turn', areas=affected_areas)
+            self.pass_turn()
+
+    def pass_turn(self):
+        """End the turn of the current player and let everyone know
+        """
+        self.nb_consecutive_end_of_turns += 1
+        ending_player = self.current_player.get_name()
+        affected_areas = self.end_turn()
+        self.broadcast('end_turn', areas=affected_areas, players=[ending_player])
+
+    def reject_move(self, msg):
+        """Treat an illegal command of the current player as the end of its turn
+
+        The illegal move is recorded in the summary of the game.
+
+        Parameters
+        ----------
+        msg : dict
+            The rejected command
+        """
+        player = self.current_player
+        self.logger.warning("Rejected illegal move of player {} ({}): {}".format(
+            player.get_name(), player.get_nickname(), msg
+        ))
+        self.summary.add_illegal_move(player.get_nickname(), self.summary.nb_battles)
+        self.pass_turn()
+
+    def plan_is_possible(self, msg):
+        """Whether an attack plan is well-formed and its first attack possible
+
+        The following attacks may become impossible as the plan is carried
+        out and they are just skipped then, but a plan making no battle at all
+        would not move the game on.
+        """
+        attacks = msg.get('attacks')
+        min_dice = msg.get('min_dice')
+        if not isinstance(attacks, list) or not attacks or not isinstance(min_dice, int) or 'stop_on_loss' not in msg:
+            return False
+        if not all(isinstance(attack, (list, tuple)) and len(attack) == 2 for attack in attacks):
+            return False
+
+        source, target = attacks[0]
+        return self.attack_is_possible(
+            self.current_player.get_name(),
+            self.board.get_area_by_name(source), self.board.get_area_by_name(target),
+            min_dice,
+        )
 
     def get_state(self):
         """Get game state
@@ -219,6 +319,70 @@ class Game(object):
 
         return battle
 
+    def execute_attack_plan(self, attacks, stop_on_loss, min_dice):
+        """Carry out the attacks of a plan of the current player in order
+
+        An attack no longer possible when it is due, or from an area with
+        fewer than min_dice dice, is skipped. The plan ends early when the
+        game is decided or, with stop_on_loss, after the first lost battle.
+
+        Parameters
+        ----------
+        attacks : list of (int, int)
+            Names of attacking and attacked areas
+        stop_on_loss : bool
+        min_dice : int
+
+        Returns
+        -------
+        list of dict
+            Results of the battles, see battle()
+        list of int
+            Players involved in the battles
+        """
+        player_name = self.current_player.get_name()
+        battles = []
+        involved_players = [player_name]
+        for source, target in attacks:
+            attacker = self.board.get_area_by_name(source)
+            defender = self.board.get_area_by_name(target)
+            if not self.attack_is_possible(player_name, attacker, defender, min_dice):
+                continue
+
+            if defender.get_owner_name() not in involved_players:
+                involved_players.append(defender.get_owner_name())
+            battle = self.battle(attacker, defender)
+            self.summary.add_battle()
+            battles.append(battle)
+
+            if self.nb_battles == self.max_battles:
+                break
+            if self.current_player.get_number_of_areas() == self.board.get_number_of_areas():
+                break
+            if stop_on_loss and battle['def']['owner'] != player_name:
+                break
+
+        return battles, involved_players
+
+    def attack_is_possible(self, player_name, attacker, defender, min_dice=2):
+        """Whether a player can attack from one area to another
+
+        Parameters
+        ----------
+        player_name : int
+        attacker, defender : Area
+            None stands for a non-existent area
+        min_dice : int
+            Dice the attacker needs to have, at least two
+        """
+        return (
+            attacker is not None and defender is not None
+            and attacker.get_owner_name() == player_name
+            and attacker.get_dice() >= max(2, min_dice)
+            and defender.get_owner_name() != player_name
+            and self.board.are_adjacent(attacker.get_name(), defender.get_name())
+        )
+
     def end_turn(self):
         """Handles end turn command
 
@@ -230,8 +394,8 @@ class Game(object):
         affected_areas = []
         player = self.current_player
         dice = player.get_reserve() + player.get_largest_region(self.board)
-        if dice > 64:
-            dice = 64
+        if dice > self.max_reinforcement:
+            dice = self.max_reinforcement
 
         areas = []
         for area in self.current_player.get_areas():
@@ -309,8 +473,8 @@ class Game(object):
             self.process_win(None, -1)
             return True
 
-        if self.nb_battles == MAX_BATTLES_PER_GAME:
-            self.logger.info("Game cancelled because the limit of {} battles has been reached".format(MAX_BATTLES_PER_GAME))
+        if self.nb_battles == self.max_battles:
+            self.logger.info("Game cancelled because the limit of {} battles has been reached".format(self.max_battles))
             for p in self.players.values():
                 if p.get_number_of_areas() > 0:
                     self.eliminate_player(p.get_name())
@@ -329,8 +493,7 @@ class Game(object):
     def process_win(self, player_nick, player_name):
         self.summary.set_winner(player_nick)
         self.logger.info("Player {} ({}) wins!".format(player_nick, player_name))
-        for i in self.players:
-            self.send_message(self.players[i], 'game_end', winner=player_name)
+        self.broadcast('game_end', winner=player_name)
 
     ##############
     # NETWORKING #
@@ -348,12 +511,42 @@ class Game(object):
         str
             Decoded message from the client
         """
-        raw_message = self.client_sockets[player].recv(self.buffer)
-        msg = json.loads(raw_message.decode())
+        if self.players[player].protocol == FRAMED:
+            msg = self.players[player].framed_socket.get_message()
+        else:
+            raw_message = self.client_sockets[player].recv(self.buffer)
+            msg = json.loads(raw_message.decode())
         self.logger.debug("Got message from client {}; type: {}".format(player, msg['type']))
         return msg
 
-    def send_message(self, client, type, battle=None, winner=None, areas=None):
+    def broadcast(self, type, battle=None, winner=None, areas=None, players=(), battles=None):
+        """Send the same message to all clients
+
+        The message is created and encoded only once for every combination
+        of protocol and subscription, and the same bytes are sent to all
+        clients sharing it.
+
+        Parameters are the same as for send_message(), and
+        players : list of int
+            Players whose areas or reserves have been changed by the event
+        """
+        self.logger.debug("Broadcasting msg type '{}'".format(type))
+        messages = {}
+        encoded = {}
+        for client in self.players.values():
+            key = (client.protocol, client.subscription)
+            if key not in encoded:
+                if client.subscription not in messages:
+                    if client.subscription == SUBSCRIPTION_DELTA and type in ['battle', 'battles', 'end_turn']:
+                        messages[client.subscription] = self.create_delta_message(type, battle, areas, players, battles)
+                    else:
+                        messages[client.subscription] = self.create_message(
+                            None, type, battle=battle, winner=winner, areas=areas, battles=battles
+                        )
+                encoded[key] = self.encode_message(client, messages[client.subscription])
+            self.send_encoded(client, encoded[key])
+
+    def send_message(self, client, type, battle=None, winner=None, areas=None, battles=None):
         """Send message to a client
 
         Parameters
@@ -368,8 +561,40 @@ class Game(object):
             Winner of the game
         areas : list of int
             Areas changed during the turn
+        battles : list of dict
+            Results of the battles of an attack plan
         """
         self.logger.debug("Sending msg type '{}' to client {}".format(type, client.get_name()))
+        msg = self.create_message(client, type, battle=battle, winner=winner, areas=areas, battles=battles)
+        self.send_encoded(client, self.encode_message(client, msg))
+
+    def send_encoded(self, client, data):
+        """Send an already encoded message to a client
+        """
+        client.send_message(data)
+
+    def encode_message(self, client, msg):
+        """Encode message in the protocol spoken with the client
+
+        Returns
+        -------
+        bytes
+        """
+        if client.protocol == FRAMED:
+            return encode_frame(msg)
+        else:
+            return str.encode(json.dumps(msg) + '\0')
+
+    def create_message(self, client, type, battle=None, winner=None, areas=None, battles=None):
+        """Create message for a client
+
+        Parameters are the same as for send_message()
+
+        Returns
+        -------
+        dict
+            The message to be serialized
+        """
         if type == 'game_start':
             msg = self.get_state()
             msg['type'] = 'game_start'
@@ -391,6 +616,11 @@ class Game(object):
             msg['type'] = 'battle'
             msg['result'] = battle
 
+        elif type == 'battles':
+            msg = self.get_state()
+            msg['type'] = 'battles'
+            msg['results'] = battles
+
         elif type == 'end_turn':
             msg = self.get_state()
             msg['type'] = 'end_turn'
@@ -409,17 +639,78 @@ class Game(object):
         elif type == 'close_socket':
             msg = {'type': 'close_socket'}
 
-        msg = json.dumps(msg)
-        client.send_message(msg + '\0')
+        return msg
+
+    def create_delta_message(self, type, battle=None, areas=None, players=(), battles=None):
+        """Create message with only the changes caused by battles or an end of turn
+
+        Unlike create_message(), which includes the whole state of the game,
+        only the areas, scores and reserves changed by the event are included.
+
+        Parameters
+        ----------
+        type : str
+            Either 'battle', 'battles' or 'end_turn'
+        battle : dict
+            Result of a battle
+        areas : dict
+            Areas changed during the turn
+        players : list of int
+            Players whose areas or reserves have been changed by the event
+        battles : list of dict
+            Results of the battles of an attack plan
+
+        Returns
+        -------
+        dict
+            The message to be serialized
+        """
+        if type == 'battle':
+            msg = {
+                'type': 'battle',
+                'result': battle,
+                'areas': {
+                    battle[side]['name']: {'owner': battle[side]['owner'], 'dice': battle[side]['dice']}
+                    for side in ['atk', 'def']
+                },
+                'score': {},
+            }
+            if battle['atk']['owner'] == battle['def']['owner']:
+                for name in players:
+                    msg['score'][name] = self.players[name].get_largest_region(self.board)
+
+        elif type == 'battles':
+            msg = {
+                'type': 'battles',
+                'results': battles,
+                'areas': {},
+                'score': {},
+            }
+            for battle in battles:
+                for side in ['atk', 'def']:
+                    area = self.board.get_area_by_name(battle[side]['name'])
+                    msg['areas'][area.get_name()] = {'owner': area.get_owner_name(), 'dice': area.get_dice()}
+            if any(battle['atk']['owner'] == battle['def']['owner'] for battle in battles):
+                for name in players:
+                    msg['score'][name] = self.players[name].get_largest_region(self.board)
+
+        elif type == 'end_turn':
+            msg = {
+                'type': 'end_turn',
+                'areas': areas,
+                'current_player': self.current_player.get_name(),
+                'reserves': {name: self.players[name].get_reserve() for name in players},
+                'score': {},
+            }
+
+        return msg
 
     def create_socket(self):
         """Initiate server socket
         """
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.socket.bind((self.address, self.port))
-            self.logger.debug("Server socket at {}:{}".format(self.address, self.port))
+            self.transport.bind()
+            self.logger.debug("Server socket at {}".format(self.transport))
         except OSError as e:
             self.logger.error("Cannot create socket. {0}.".format(e))
             exit(1)
@@ -429,7 +720,7 @@ class Game(object):
         """
         self.client_sockets = {}
 
-        self.socket.listen(self.number_of_players)
+        self.transport.listen(self.number_of_players)
         self.logger.debug("Waiting for clients to connect")
 
         for i in range(1, self.number_of_players + 1):
@@ -438,13 +729,15 @@ class Game(object):
             if hello_msg['type'] != 'client_desc':
                 raise ValueError("Client send a wrong-type hello message '{}'".format(hello_msg))
             self.players[i].set_nickname(hello_msg['nickname'])
+            self.players[i].set_protocol(choose_protocol(hello_msg))
+            self.players[i].set_subscription(choose_subscription(hello_msg))
 
         self.logger.debug("Successfully assigned clients to all players")
 
     def connect_client(self, i):
         """Assign client to an instance of Player
         """
-        sock, client_address = self.socket.accept()
+        sock, client_address = self.transport.accept()
         self.add_client(sock, client_address, i)
 
     def add_client(self, connection, client_address, i):
@@ -493,7 +786,7 @@ class Game(object):
         """Close server's socket
         """
         self.logger.debug("Closing server socket")
-        self.socket.close()
+        self.transport.close()
 
     ##################
     # INITIALIZATION #
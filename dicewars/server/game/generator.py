@@ -1,26 +1,138 @@
+from collections import namedtuple
+import math
+
 import hexutil
+import numpy as np
 from random import randint, choice as rand_choice, shuffle
 
 
+FREE = 0
+NEIGHBOURING = 1
+USED = 2
+OUTSIDE = 3
+
+# Offsets of adjacent hexes in the order of hexutil.Hex.neighbours()
+NEIGHBOUR_DIRECTIONS = ((2, 0), (1, 1), (-1, 1), (-2, 0), (-1, -1), (1, -1))
+
+
+BoardShape = namedtuple('BoardShape', [
+    'grid_width', 'grid_height', 'min_areas', 'max_areas', 'min_area_size', 'max_area_size',
+])
+BoardShape.__doc__ = """Parameters of generated boards
+
+The grid is grid_width hexes wide and grid_height hexes high, the number
+of areas and the numbers of hexes they grow to before being filled are
+drawn uniformly from the given ranges. If the grid runs out of room,
+the board has fewer areas.
+"""
+
+CLASSIC_SHAPE = BoardShape(32, 28, 29, 31, 12, 18)
+
+
+def board_shape(areas=None, grid=None, area_size=None):
+    """Shape of boards differing from the classic one in the given parameters
+
+    Unless the grid is given, it is scaled from the classic one, keeping
+    its proportions, to have the same room per hex of an area.
+
+    Parameters
+    ----------
+    areas : int or (int, int)
+        Number of areas, or its range
+    grid : (int, int)
+        Width and height of the grid
+    area_size : (int, int)
+        Range of sizes of areas
+
+    Returns
+    -------
+    BoardShape
+    """
+    if areas is None:
+        areas = CLASSIC_SHAPE.min_areas, CLASSIC_SHAPE.max_areas
+    elif isinstance(areas, int):
+        areas = areas, areas
+    if area_size is None:
+        area_size = CLASSIC_SHAPE.min_area_size, CLASSIC_SHAPE.max_area_size
+    if grid is None:
+        scale = math.sqrt(
+            areas[1] * sum(area_size)
+            / (CLASSIC_SHAPE.max_areas * (CLASSIC_SHAPE.min_area_size + CLASSIC_SHAPE.max_area_size))
+        )
+        grid = round(CLASSIC_SHAPE.grid_width * scale), round(CLASSIC_SHAPE.grid_height * scale)
+
+    shape = BoardShape(*grid, *areas, *area_size)
+    if min(shape) < 1 or shape.min_areas > shape.max_areas or shape.min_area_size > shape.max_area_size:
+        raise ValueError("Invalid shape of board {}".format(shape))
+    return shape
+
+
 class BoardGenerator(object):
     """Generator of game board
+
+    The grid is a flat array indexed by hexes, padded by a border of cells
+    outside of the board, so that neighbours of any hex on the board are
+    found by adding precomputed offsets to its index. Each hex also has the
+    name of the area it belongs to stored, 0 meaning no area. Free hexes
+    adjacent to used ones, where new areas can start, are kept track of as
+    hexes get used.
+
+    For the same state of the global random generator, a board of the
+    classic shape is the same as the one generated by the original
+    implementation, which used hexutil.Hex objects for the grid and searched
+    lists of hexes. That is why new areas are started by shuffling all the
+    coordinates on the classic grid, while on other grids, where it would
+    take too long, they start at a randomly chosen suitable hex.
     """
-    def __init__(self):
+    def __init__(self, shape=CLASSIC_SHAPE):
         """
+        Parameters
+        ----------
+        shape : BoardShape
+
         Attributes
         ----------
         min_x, max_x, min_y, max_y : int
             Boundary values for Hex coordinates
         """
-        self.min_x = -32
-        self.max_x = 30
-        self.min_y = -14
-        self.max_y = 13
-        self.coordinates = [(x, y) for x in range(self.min_x + 2, self.max_x, 2)
+        self.shape = shape
+        self.min_x = -2 * (shape.grid_width // 2)
+        self.max_x = self.min_x + 2 * (shape.grid_width - 1)
+        self.min_y = -(shape.grid_height // 2)
+        self.max_y = self.min_y + shape.grid_height - 1
+        self.shuffle_coordinates = shape[:2] == CLASSIC_SHAPE[:2]
+
+        self.origin_x = self.min_x - 2
+        self.origin_y = self.min_y - 1
+        self.width = self.max_x - self.min_x + 6
+        self.height = self.max_y - self.min_y + 3
+        self.offsets = tuple(dx + dy * self.width for dx, dy in NEIGHBOUR_DIRECTIONS)
+        self.offset_array = np.array(self.offsets)
+
+        x, y = np.meshgrid(
+            np.arange(self.width) + self.origin_x,
+            np.arange(self.height) + self.origin_y,
+        )
+        odd = y % 2 != 0
+        on_board = ((x + y) % 2 == 0) & (self.min_y <= y) & (y <= self.max_y)
+        on_board &= (self.min_x + odd <= x) & (x <= self.max_x + odd)
+        self.empty_grid = np.where(on_board, FREE, OUTSIDE).astype(np.int8).ravel()
+
+        self.coordinates = [self.index(x + y % 2, y) for x in range(self.min_x + 2, self.max_x, 2)
                             for y in range(self.min_y + 1, self.max_y)]
-        for i in range(len(self.coordinates)):
-            if self.coordinates[i][1] % 2 == 1:
-                self.coordinates[i] = (self.coordinates[i][0] + 1, self.coordinates[i][1])
+        self.startable_hexes = np.zeros(len(self.empty_grid), dtype=bool)
+        self.startable_hexes[self.coordinates] = True
+
+    def index(self, x, y):
+        """Index of a hex in the grid
+        """
+        return (y - self.origin_y) * self.width + x - self.origin_x
+
+    def hex(self, index):
+        """Hex at an index of the grid
+        """
+        y, x = divmod(index, self.width)
+        return hexutil.Hex(x + self.origin_x, y + self.origin_y)
 
     def random_hex(self):
         """Get random Hex from the board
@@ -43,69 +155,77 @@ class BoardGenerator(object):
     def generate_board(self):
         """Method generating the board
 
+        Generation ends early if there is no room left for another area,
+        so it always finishes.
+
         Returns
         -------
         dict
             Dictionary of areas in the game board. Contains names of adjacent
             areas and coordinates of the hexes of each area
         """
-        self.a = {}
-        self.areas = {}
-        for i in range(self.min_y, self.max_y + 1):
-            self.a[i] = {}
-            if i % 2 == 0:
-                for j in range(self.min_x, self.max_x + 1, 2):
-                    self.a[i][j] = 0
-            else:
-                for j in range(self.min_x + 1, self.max_x + 2, 2):
-                    self.a[i][j] = 0
+        self.grid = self.empty_grid.copy()
+        self.area_of = np.zeros(len(self.grid), dtype=np.int32)
+        self.can_start = np.zeros(len(self.grid), dtype=bool)
+        self.hexes = {}
 
-        for i in range(1, 30 + randint(0, 2)):
-            self.__create_area(i)
-        self.__add_neighbours()
+        for i in range(1, randint(self.shape.min_areas, self.shape.max_areas) + 1):
+            if not self.__create_area(i):
+                break
 
+        self.areas = {}
+        for area, hexes in self.hexes.items():
+            self.areas[area] = {
+                'hexes': [self.hex(h) for h in hexes],
+                'neighbours': self.__neighbouring_areas(area, hexes),
+            }
         return self.areas
 
     def __create_area(self, area):
         """Create an area from Hexes
+
+        Whenever the area runs out of room to grow, it is dropped and started
+        again elsewhere, with the count of its hexes reset.
+
+        Returns
+        -------
+        bool
+            False if there is no room left to start the area
         """
         self.possible_hexes = []
         i = 0
-        size = randint(12, 18)
+        size = randint(self.shape.min_area_size, self.shape.max_area_size)
         while i < size:
             ret = self.__add_hex_to_area(area)
+            if ret is None:
+                return False
             i += 1
             if not ret:
                 i = 0
         self.__fill_area(area)
+        return True
 
     def __fill_area(self, area):
         """Fills empty Hexes inside the area
         """
-        for h in self.areas[area]['hexes']:
-            for n in h.neighbours():
-                counter = 0
-                if n.y not in self.a or n.x not in self.a[n.y] or self.a[n.y][n.x] != 1:
+        grid = self.grid
+        area_of = self.area_of
+        hexes = self.hexes[area]
+        for h in hexes:
+            for offset in self.offsets:
+                n = h + offset
+                if grid[n] != NEIGHBOURING:
                     break
-                for nn in n.neighbours():
-                    if (nn.y not in self.a or nn.x not in self.a[nn.y]):
-                        counter += 1
-                    elif nn not in self.areas[area]['hexes']:
-                        counter += 1
-                    if counter > 2:
-                        break
-                if counter <= 2:
-                    self.__retag_neighbouring_hexes(n)
-                    self.a[n.y][n.x] = 2
-                    self.areas[area]['hexes'].append(n)
+                if np.count_nonzero(area_of[n + self.offset_array] != area) <= 2:
+                    self.__use_hex(n, area)
                     break
 
     def __add_hex_to_area(self, area):
         """Add a single Hex to area being created
         """
-        if not self.areas:
+        if not self.hexes:
             return self.__start_first_area()
-        elif area not in self.areas:
+        elif area not in self.hexes:
             return self.__start_area(area)
         else:
             return self.__grow_area(area)
@@ -113,88 +233,88 @@ class BoardGenerator(object):
     def __start_first_area(self):
         """Add first Hex to first area on the board
         """
-        self.h = self.random_hex()
-        self.possible_hexes.append(self.h)
-        self.a[self.h.y][self.h.x] = 2
-        self.__retag_neighbouring_hexes(self.h)
-        self.areas[1] = {
-            'hexes': [self.h],
-            'neighbours': []
-        }
+        h = self.random_hex()
+        self.h = self.index(h.x, h.y)
+        self.hexes[1] = []
+        self.__use_hex(self.h, 1)
         return True
 
     def __start_area(self, area):
         """Add first Hex to an area
+
+        The area starts at a random free hex adjacent to a used one.
+
+        Returns
+        -------
+        bool or None
+            None if there is no such hex
         """
-        shuffle(self.coordinates)
-        for coord in self.coordinates:
-            x = coord[0]
-            y = coord[1]
-            if self.a[y][x] == 0:
-                h = hexutil.Hex(x, y)
-                for n in h.neighbours():
-                    if n.y in self.a and n.x in self.a[n.y] and self.a[n.y][n.x] == 1:
-                        self.h = h
-                        self.possible_hexes.append(h)
-                        self.a[h.y][h.x] = 2
-                        self.__retag_neighbouring_hexes(h)
-                        self.areas[area] = {
-                            'hexes': [h],
-                            'neighbours': []
-                        }
-                        return True
+        if self.shuffle_coordinates:
+            shuffle(self.coordinates)
+            coordinates = np.array(self.coordinates)
+            candidates = self.can_start[coordinates]
+            if not candidates.any():
+                return None
+            self.h = int(coordinates[candidates.argmax()])
+        else:
+            candidates = np.flatnonzero(self.can_start)
+            if not len(candidates):
+                return None
+            self.h = int(rand_choice(candidates))
+
+        self.hexes[area] = []
+        self.__use_hex(self.h, area)
+        return True
 
     def __grow_area(self, area):
         """Add hex to already existing area
         """
         while True:
-            if self.h != self.areas[area]['hexes'][0] or self.h not in self.possible_hexes:
+            if self.h != self.hexes[area][0] or self.h not in self.possible_hexes:
                 self.h = rand_choice(self.possible_hexes)
 
             n = self.__neighbour()
-            if n:
-                self.possible_hexes.append(n)
-                self.a[n.y][n.x] = 2
-                self.__retag_neighbouring_hexes(n)
-                self.areas[area]['hexes'].append(n)
+            if n is not None:
+                self.__use_hex(n, area)
                 return True
 
             else:
                 self.possible_hexes.remove(self.h)
                 if not self.possible_hexes:
-                    self.areas.pop(area)
+                    self.area_of[self.hexes.pop(area)] = 0
                     return False
 
-    def __retag_neighbouring_hexes(self, hex):
-        """Mark adjacent Hexes as neighbours to already used Hex
+    def __use_hex(self, h, area):
+        """Add a hex to an area and mark adjacent Hexes as neighbours to it
         """
-        for n in hex.neighbours():
-            if n.y in self.a and n.x in self.a[n.y]:
-                if self.a[n.y][n.x] == 0:
-                    self.a[n.y][n.x] = 1
+        self.possible_hexes.append(h)
+        self.hexes[area].append(h)
+        self.area_of[h] = area
+        self.grid[h] = USED
+        self.can_start[h] = False
+        for offset in self.offsets:
+            n = h + offset
+            if self.grid[n] == FREE:
+                self.grid[n] = NEIGHBOURING
+                self.can_start[n] = False
+                for second_offset in self.offsets:
+                    if self.grid[n + second_offset] == FREE and self.startable_hexes[n + second_offset]:
+                        self.can_start[n + second_offset] = True
 
     def __neighbour(self):
         """Get random adjacent Hex
         """
-        ns = self.h.neighbours()
+        ns = [self.h + offset for offset in self.offsets]
         shuffle(ns)
         for n in ns:
-            if n.y in self.a and n.x in self.a[n.y]:
-                if self.a[n.y][n.x] != 2:
-                    return n
-        return False
+            if self.grid[n] < USED:
+                return n
+        return None
 
-    def __add_neighbours(self):
-        """Add neighbours of an area to the areas dict based
+    def __neighbouring_areas(self, area, hexes):
+        """Names of areas adjacent to an area, in order of its hexes
         """
-        for a in self.areas:
-            for h in self.areas[a]['hexes']:
-                for n in h.neighbours():
-                    if (n.y in self.a and n.x in self.a[n.y] and self.a[n.y][n.x] == 2
-                        and n not in self.areas[a]['hexes']):
-                        for k in self.areas:
-                            if a == k:
-                                continue
-                            if n in self.areas[k]['hexes']:
-                                if k not in self.areas[a]['neighbours']:
-                                    self.areas[a]['neighbours'].append(k)
+        neighbours = self.area_of[np.add.outer(hexes, self.offset_array)].ravel()
+        neighbours = neighbours[(neighbours != 0) & (neighbours != area)]
+        _, first = np.unique(neighbours, return_index=True)
+        return neighbours[np.sort(first)].tolist()
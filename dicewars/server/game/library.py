@@ -0,0 +1,150 @@
+import mmap
+import random
+import struct
+
+import hexutil
+import numpy as np
+
+from .generator import BoardGenerator, CLASSIC_SHAPE
+
+
+MAGIC = b'DWBOARD1'
+HEADER = struct.Struct('<8sqqqqq')  # magic, first seed, boards, areas, neighbours, hexes
+ALIGNMENT = 8
+
+
+def generate_board(seed, shape=CLASSIC_SHAPE):
+    """Generate the geometry of a board as create_board() does for the seed
+    """
+    random.seed(seed)
+    return BoardGenerator(shape).generate_board()
+
+
+def library_arrays(nb_boards, nb_areas, nb_neighbours, nb_hexes):
+    """Names, types and lengths of the arrays stored in a library, in order of storage
+
+    Areas of the i-th board are areas board_offsets[i] to board_offsets[i+1].
+    Neighbours and hexes of the k-th area are given by neighbour_offsets and
+    hex_offsets the same way, hexes being pairs of coordinates.
+    """
+    return [
+        ('board_offsets', np.int64, nb_boards + 1),
+        ('neighbour_offsets', np.int64, nb_areas + 1),
+        ('hex_offsets', np.int64, nb_areas + 1),
+        ('names', np.int16, nb_areas),
+        ('neighbours', np.int16, nb_neighbours),
+        ('hexes', np.int8, 2 * nb_hexes),
+    ]
+
+
+def padding(size):
+    return -size % ALIGNMENT
+
+
+def write_board_library(path, first_seed, boards):
+    """Store boards generated for consecutive seeds in a file
+
+    Parameters
+    ----------
+    path : str
+    first_seed : int
+        Seed of the first board
+    boards : list of dict
+        Boards as returned by BoardGenerator.generate_board()
+    """
+    board_offsets = [0]
+    neighbour_offsets = [0]
+    hex_offsets = [0]
+    names = []
+    neighbours = []
+    hexes = []
+    for board in boards:
+        for name, area in board.items():
+            names.append(name)
+            neighbours.extend(area['neighbours'])
+            neighbour_offsets.append(len(neighbours))
+            for h in area['hexes']:
+                hexes.extend((h.x, h.y))
+            hex_offsets.append(len(hexes) // 2)
+        board_offsets.append(len(names))
+
+    values = {
+        'board_offsets': board_offsets,
+        'neighbour_offsets': neighbour_offsets,
+        'hex_offsets': hex_offsets,
+        'names': names,
+        'neighbours': neighbours,
+        'hexes': hexes,
+    }
+    sizes = (len(boards), len(names), len(neighbours), len(hexes) // 2)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, first_seed, *sizes))
+        f.write(bytes(padding(HEADER.size)))
+        for name, dtype, length in library_arrays(*sizes):
+            data = np.asarray(values[name], dtype=dtype).tobytes()
+            f.write(data)
+            f.write(bytes(padding(len(data))))
+
+
+class BoardLibrary:
+    """Boards stored by write_board_library(), loaded by their seeds
+
+    The file is memory-mapped, so only the boards actually used are read
+    and a library can be shared by all processes on the machine.
+
+    Attributes
+    ----------
+    first_seed : int
+    nb_boards : int
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.first_seed, self.nb_boards, *sizes = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError("{} is not a board library".format(path))
+
+        offset = HEADER.size + padding(HEADER.size)
+        for name, dtype, length in library_arrays(self.nb_boards, *sizes):
+            array = np.frombuffer(self.map, dtype=dtype, count=length, offset=offset)
+            setattr(self, name, array)
+            offset += array.nbytes + padding(array.nbytes)
+        self.hexes = self.hexes.reshape(-1, 2)
+
+    def __len__(self):
+        return self.nb_boards
+
+    def __contains__(self, seed):
+        return seed is not None and 0 <= seed - self.first_seed < self.nb_boards
+
+    def get_board(self, seed):
+        """Board generated for the seed, the same as by generate_board()
+
+        Raises
+        ------
+        KeyError
+            If the board of the seed is not in the library
+        """
+        if seed not in self:
+            raise KeyError(seed)
+
+        i = seed - self.first_seed
+        first, last = self.board_offsets[i:i+2].tolist()
+        neighbour_offsets = self.neighbour_offsets[first:last+1].tolist()
+        hex_offsets = self.hex_offsets[first:last+1].tolist()
+        neighbours = self.neighbours[neighbour_offsets[0]:neighbour_offsets[-1]].tolist()
+        hexes = self.hexes[hex_offsets[0]:hex_offsets[-1]].tolist()
+
+        board = {}
+        for k, name in enumerate(self.names[first:last].tolist()):
+            board[name] = {
+                'hexes': [
+                    hexutil.Hex(x, y)
+                    for x, y in hexes[hex_offsets[k] - hex_offsets[0]:hex_offsets[k+1] - hex_offsets[0]]
+                ],
+                'neighbours': neighbours[
+                    neighbour_offsets[k] - neighbour_offsets[0]:neighbour_offsets[k+1] - neighbour_offsets[0]
+                ],
+            }
+        return board
@@ -1,6 +1,8 @@
 import logging
 import socket
 
+from dicewars.protocol import LEGACY, FRAMED, SUBSCRIPTION_FULL, FramedSocket
+
 
 class Player(object):
     """Object representing a player
@@ -15,7 +17,13 @@ class Player(object):
         Attributes
         ----------
         areas : list of Area
-            Areas belonging to the player
+            Areas belonging to the player, in the order of their acquisition
+        regions : dict of int: set of int
+            Names of areas of every connected region, keyed by the region id
+        region_of : dict of int: int
+            Region id of every area of the player
+        largest_region : int
+            Size of the largest region, i.e. the score of the player
         dice_reserve : int
             Number of dice in player's reserve
         client_addr : str
@@ -24,6 +32,10 @@ class Player(object):
             Client's port number
         socket : socket
             Client's socket
+        protocol : int
+            Version of protocol spoken with the client
+        subscription : str
+            Whether the client gets the full state or only changes after every event
         """
 
         self.name = name
@@ -31,9 +43,15 @@ class Player(object):
         self.logger = logging.getLogger('SERVER')
 
         self.areas = []
+        self.regions = {}
+        self.region_of = {}
+        self.largest_region = 0
         self.client_addr = None
         self.client_port = None
         self.socket = None
+        self.protocol = LEGACY
+        self.framed_socket = None
+        self.subscription = SUBSCRIPTION_FULL
         self.dice_reserve = 0
 
     def set_nickname(self, nick):
@@ -44,11 +62,33 @@ class Player(object):
 
     def add_area(self, area):
         """Add area to player's areas
+
+        The area joins the regions of the neighbouring areas of the player,
+        merging the smaller regions into the largest one.
         """
-        if area in self.areas:
-            self.logger.warning("Area {0} already belonging to player {1}.".format(area.get_name(), self.name))
+        name = area.get_name()
+        if name in self.region_of:
+            self.logger.warning("Area {0} already belonging to player {1}.".format(name, self.name))
+            return
+
+        self.areas.append(area)
+
+        neighbour_regions = {self.region_of[adj.get_name()] for adj in area.get_adjacent_areas()
+                             if adj.get_name() in self.region_of}
+        if not neighbour_regions:
+            region_id = name
+            self.regions[region_id] = set()
         else:
-            self.areas.append(area)
+            region_id = max(neighbour_regions, key=lambda r: len(self.regions[r]))
+            neighbour_regions.remove(region_id)
+            for merged_id in neighbour_regions:
+                for merged_area in self.regions.pop(merged_id):
+                    self.region_of[merged_area] = region_id
+                    self.regions[region_id].add(merged_area)
+
+        self.regions[region_id].add(name)
+        self.region_of[name] = region_id
+        self.largest_region = max(self.largest_region, len(self.regions[region_id]))
 
     def assign_client(self, socket, client_addr):
         """Assign client's socket, IP address, and port number
@@ -66,6 +106,20 @@ class Player(object):
                          .format(socket, client_addr[0], client_addr[1],
                                  self.name))
 
+    def set_protocol(self, version):
+        """Set version of protocol spoken with the client
+        """
+        self.protocol = version
+        self.logger.debug("Client of player {} speaks protocol {}".format(self.name, version))
+        if version == FRAMED:
+            self.framed_socket = FramedSocket(self.socket)
+
+    def set_subscription(self, subscription):
+        """Set whether the client gets the full state after every event
+        """
+        self.subscription = subscription
+        self.logger.debug("Client of player {} subscribed to '{}' updates".format(self.name, subscription))
+
     def get_areas(self):
         """Get areas controlled by the player
 
@@ -78,6 +132,9 @@ class Player(object):
     def get_largest_region(self, board):
         """Get player's score
 
+        The regions are kept up to date by add_area() and remove_area(),
+        so this is just a lookup.
+
         Parameters
         ----------
         board : Board
@@ -87,41 +144,7 @@ class Player(object):
         int
             Player's score
         """
-        largest_region_size = 0
-        areas_to_test = self.areas
-        player_areas = []
-
-        if not areas_to_test:
-            return 0
-
-        areas_in_current_region = [areas_to_test[0]]
-
-        while areas_to_test:
-            areas_already_tested = []
-            while areas_in_current_region:
-                current_area = areas_in_current_region[0]
-                areas_in_current_region.remove(current_area)
-                areas_already_tested.append(current_area)
-
-                for area in current_area.get_adjacent_areas():
-                    if (area not in areas_already_tested and
-                        area not in areas_in_current_region):
-                        if area.get_owner_name() == self.name:
-                            areas_in_current_region.append(area)
-
-            if len(areas_already_tested) > largest_region_size:
-                largest_region_size = len(areas_already_tested)
-
-            for area in areas_already_tested:
-                if area in areas_to_test:
-                    areas_to_test.remove(area)
-                    player_areas.append(area)
-
-            if areas_to_test:
-                areas_in_current_region = [areas_to_test[0]]
-
-        self.areas = player_areas
-        return largest_region_size
+        return self.largest_region
 
     def get_name(self):
         """Return player's name
@@ -146,19 +169,47 @@ class Player(object):
 
     def remove_area(self, area):
         """Remove area from list of areas controlled by the player
+
+        Only the region the area belonged to may split, so just that one
+        is searched for its remaining connected parts.
         """
-        if area not in self.areas:
+        name = area.get_name()
+        if name not in self.region_of:
             self.logger.warning("Trying to remove area {0} that doesn't\
                                 belong to player {1}".format(area.get_name(),
                                 self.name))
-        else:
-            self.areas.remove(area)
+            return
+
+        self.areas.remove(area)
+
+        region = self.regions.pop(self.region_of.pop(name))
+        region.remove(name)
+        was_largest = len(region) + 1 == self.largest_region
+
+        neighbours = {adj.get_name(): adj for adj in area.get_adjacent_areas()}
+        while region:
+            start = next(n for n in neighbours if n in region)
+            part = {start}
+            stack = [neighbours[start]]
+            while stack:
+                for adj in stack.pop().get_adjacent_areas():
+                    adj_name = adj.get_name()
+                    if adj_name in region and adj_name not in part:
+                        part.add(adj_name)
+                        stack.append(adj)
+            region -= part
+            self.regions[start] = part
+            for part_area in part:
+                self.region_of[part_area] = start
+
+        if was_largest:
+            self.largest_region = max((len(r) for r in self.regions.values()), default=0)
 
     def send_message(self, msg):
-        """Send message msg to the Player's client
+        """Send encoded message msg to the Player's client
         """
         try:
-            self.socket.sendall(msg.encode())
+            self.socket.sendall(msg)
         except socket.error as e:
             self.logger.error("Connection to client {0} broken".format(
                               self.name))
@@ -6,6 +6,13 @@ class GameSummary(object):
         self.winner = None
         self.nb_battles = 0
         self.eliminations = []
+        self.illegal_moves = []
+
+    def __setstate__(self, state):
+        """Unpickle a summary, including one pickled before illegal moves were recorded
+        """
+        self.__dict__.update(state)
+        self.__dict__.setdefault('illegal_moves', [])
 
     def set_winner(self, winner):
         if winner is None:
@@ -19,6 +26,9 @@ class GameSummary(object):
     def add_elimination(self, eliminated, battles):
         self.eliminations.append((eliminated, battles))
 
+    def add_illegal_move(self, player, battles):
+        self.illegal_moves.append((player, battles))
+
     def __repr__(self):
         winner_str = 'Winner: {}\n'.format(self.winner)
         nb_battles_str = 'Battles total: {}\n'.format(self.nb_battles)
@@ -27,6 +37,9 @@ class GameSummary(object):
         for elimination in self.eliminations:
             total_str += 'After {} battles eliminated {}\n'.format(elimination[1], elimination[0])
 
+        for player, battles in self.illegal_moves:
+            total_str += 'After {} battles illegal move by {}\n'.format(battles, player)
+
         return total_str
 
     def participants(self):
@@ -40,16 +53,21 @@ class GameSummary(object):
         nb_battles = int(lines[1].split()[2])
 
         eliminations = []
+        illegal_moves = []
         for line in lines[2:]:
             if line == '':
                 break
-            fields = line.split(maxsplit=4)
-            eliminations.append((fields[-1], int(fields[1])))
+            fields = line.split(maxsplit=3)
+            if fields[3].startswith('illegal move by '):
+                illegal_moves.append((fields[3][len('illegal move by '):], int(fields[1])))
+            else:
+                eliminations.append((fields[3].split(maxsplit=1)[1], int(fields[1])))
 
         summary = cls()
         summary.set_winner(winner)
         summary.nb_battles = nb_battles
         summary.eliminations = eliminations
+        summary.illegal_moves = illegal_moves
         return summary
 
 
@@ -0,0 +1,279 @@
+import asyncio
+import json
+import logging
+
+from dicewars.engine import RandomState
+from dicewars.protocol import FRAMED, FrameDecoder, choose_protocol, choose_subscription
+from .game import BoardShape, Game, create_board
+
+
+class SessionGame(Game):
+    """Game hosted by the SessionServer alongside many others
+
+    Instead of blocking on the socket of the current player, the game is
+    stepped by handle_client_message() whenever a message arrives.
+    """
+    def __init__(self, board, area_ownership, description, clients):
+        """
+        Parameters
+        ----------
+        board : Board
+        area_ownership : dict of int: int
+        description : dict
+            The 'session_desc' message defining the game
+        clients : list of (dict, asyncio.StreamWriter)
+            Hello messages and connections of clients in order of their arrival
+        """
+        self.clients = clients
+        super().__init__(
+            board, area_ownership, description['nb_players'], None, None, description.get('order')
+        )
+
+    def create_socket(self):
+        pass
+
+    def connect_clients(self):
+        """Assign the already connected clients to players
+        """
+        self.client_sockets = {}
+        for i, (hello_msg, writer) in enumerate(self.clients, start=1):
+            self.client_sockets[i] = writer
+            self.players[i].assign_client(writer, writer.get_extra_info('peername') or ('local', None))
+            self.players[i].set_nickname(hello_msg['nickname'])
+            self.players[i].set_protocol(choose_protocol(hello_msg))
+            self.players[i].set_subscription(choose_subscription(hello_msg))
+
+    def close_connections(self):
+        for writer in self.client_sockets.values():
+            writer.close()
+
+    def get_message(self, player):
+        raise RuntimeError("Messages of a SessionGame are handed over by the SessionServer")
+
+    def send_encoded(self, client, data):
+        self.client_sockets[client.get_name()].write(data)
+
+    def start(self):
+        """Send the initial state to all clients, letting the first player move
+        """
+        for player in self.players.values():
+            self.send_message(player, 'game_state')
+
+    def get_player_name(self, writer):
+        for name, client_writer in self.client_sockets.items():
+            if client_writer is writer:
+                return name
+
+    def handle_client_message(self, writer, msg):
+        """Process a message from one of the clients
+
+        Returns
+        -------
+        bool
+            True if the game has ended
+        """
+        player = self.get_player_name(writer)
+        if player != self.current_player.get_name():
+            self.logger.warning("Ignoring message '{}' of player {} sent out of turn".format(msg['type'], player))
+            return False
+
+        self.logger.debug("Got message from client {}; type: {}".format(player, msg['type']))
+        self.handle_message(msg)
+        return self.check_win_condition()
+
+
+class Session:
+    """Game being set up or played on the SessionServer
+    """
+    def __init__(self, name):
+        self.name = name
+        self.description = None
+        self.control = None
+        self.clients = []
+        self.game = None
+        self.random_state = None
+
+    def is_complete(self):
+        return self.description is not None and len(self.clients) == self.description['nb_players']
+
+
+class SessionServer:
+    """Server hosting any number of concurrent games on a single port
+
+    A launcher defines a game by connecting and sending a 'session_desc'
+    message with seeds and the shape of the board and the nicknames of
+    players in the order of play. Clients join the game by including the same 'session' in their
+    'client_desc' hello message. When the game ends, the launcher receives
+    its summary and the connections of the session are closed.
+
+    Every game has its own state of the random generator, so the results are
+    the same as if the game was played by a dedicated server process.
+    """
+    def __init__(self, addr, port, library=None):
+        """
+        Parameters
+        ----------
+        addr : str
+            IP address of the server
+        port : int
+            Port number
+        library : BoardLibrary
+            Boards to be used instead of generating them
+        """
+        self.buffer = 65535
+        self.logger = logging.getLogger('SERVER')
+
+        self.address = addr
+        self.port = port
+        self.library = library
+        self.sessions = {}
+
+    def run(self):
+        """Serve games until interrupted
+        """
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            self.logger.info("Server interrupted.")
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle_connection, self.address, self.port)
+        self.logger.debug("Session server at {}:{}".format(self.address, self.port))
+        async with server:
+            await server.serve_forever()
+
+    async def get_message(self, reader):
+        """Read a message from a connection, None if it has been closed
+        """
+        raw_message = await reader.read(self.buffer)
+        if not raw_message:
+            return None
+        return json.loads(raw_message.decode())
+
+    async def get_client_messages(self, reader, decoder):
+        """Read messages of a client, None if the connection has been closed
+
+        Clients speaking the FRAMED protocol may have several messages in a
+        single read, or a message split across several reads.
+        """
+        if decoder is None:
+            msg = await self.get_message(reader)
+            return None if msg is None else [msg]
+
+        messages = []
+        while not messages:
+            data = await reader.read(self.buffer)
+            if not data:
+                return None
+            messages = decoder.feed(data)
+        return messages
+
+    async def handle_connection(self, reader, writer):
+        try:
+            hello_msg = await self.get_message(reader)
+            if hello_msg is None:
+                writer.close()
+            elif hello_msg['type'] == 'session_desc':
+                await self.handle_launcher(hello_msg, reader, writer)
+            elif hello_msg['type'] == 'client_desc' and 'session' in hello_msg:
+                await self.handle_client(hello_msg, reader, writer)
+            else:
+                self.logger.error("Connection sent a wrong-type hello message '{}'".format(hello_msg))
+                writer.close()
+        except (ConnectionError, ValueError) as e:
+            self.logger.error("Connection failed: {}".format(e))
+            writer.close()
+
+    def get_session(self, name):
+        if name not in self.sessions:
+            self.sessions[name] = Session(name)
+        return self.sessions[name]
+
+    async def handle_launcher(self, description, reader, writer):
+        session = self.get_session(description['session'])
+        session.description = description
+        session.control = writer
+        self.start_if_complete(session)
+
+        # the launcher does not speak after the description, EOF means it is gone
+        await reader.read()
+        if session.name in self.sessions:
+            self.logger.error("Launcher of session {} disconnected".format(session.name))
+            self.abort(session)
+
+    async def handle_client(self, hello_msg, reader, writer):
+        session = self.get_session(hello_msg['session'])
+        if session.game is not None or (
+                session.description is not None and len(session.clients) == session.description['nb_players']):
+            self.logger.error("Session {} is already full".format(session.name))
+            writer.close()
+            return
+
+        session.clients.append((hello_msg, writer))
+        decoder = FrameDecoder() if choose_protocol(hello_msg) == FRAMED else None
+        self.start_if_complete(session)
+
+        while True:
+            messages = await self.get_client_messages(reader, decoder)
+            if session.name not in self.sessions:
+                break
+            if messages is None:
+                self.logger.error("Client of session {} disconnected".format(session.name))
+                self.abort(session)
+                break
+            if session.game is None:
+                self.logger.warning("Ignoring message of a client of session {} before the game start".format(session.name))
+                continue
+
+            for msg in messages:
+                try:
+                    with session.random_state:
+                        game_over = session.game.handle_client_message(writer, msg)
+                except Exception:
+                    self.logger.error("Session {} failed:\n".format(session.name), exc_info=True)
+                    self.abort(session)
+                    return
+                if game_over:
+                    self.finish(session)
+                    return
+
+    def start_if_complete(self, session):
+        if not session.is_complete():
+            return
+
+        description = session.description
+        shape = None if description.get('shape') is None else BoardShape(*description['shape'])
+        board, area_ownership = create_board(
+            description['nb_players'], description.get('board'), description.get('ownership'), description.get('strength'),
+            self.library, shape,
+        )
+
+        session.random_state = RandomState(description.get('fixed'))
+        with session.random_state:
+            session.game = SessionGame(board, area_ownership, description, session.clients)
+            session.game.start()
+        self.logger.info("Started session {}".format(session.name))
+
+    def finish(self, session):
+        summary = session.game.summary
+        session.control.write(str.encode(json.dumps({'type': 'game_summary', 'summary': repr(summary)}) + '\0'))
+        self.close(session)
+        self.logger.info("Finished session {}".format(session.name))
+
+    def abort(self, session):
+        if session.game is not None:
+            for player in session.game.players.values():
+                session.game.send_message(player, 'close_socket')
+        self.close(session)
+
+    def close(self, session):
+        if self.sessions.pop(session.name, None) is None:
+            return
+
+        if session.game is not None:
+            session.game.close_connections()
+        else:
+            for hello_msg, writer in session.clients:
+                writer.close()
+        if session.control is not None:
+            session.control.close()
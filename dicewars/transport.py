@@ -0,0 +1,156 @@
+import os
+import socket
+import stat
+
+
+class TcpTransport:
+    """Clients connect to a TCP port of the server
+    """
+    def __init__(self, address, port):
+        """
+        Parameters
+        ----------
+        address : str
+            IP address of the server
+        port : int
+        """
+        self.address = address
+        self.port = port
+        self.socket = None
+
+    def __str__(self):
+        return '{}:{}'.format(self.address, self.port)
+
+    def create_socket(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.address, self.port))
+        return sock
+
+    def bind(self):
+        """Create the listening socket of the server
+        """
+        self.socket = self.create_socket()
+
+    def listen(self, backlog):
+        self.socket.listen(backlog)
+
+    def accept(self):
+        """Wait for a client to connect
+
+        Returns
+        -------
+        (socket, (str, int))
+            Connection to the client and its address and port number
+        """
+        return self.socket.accept()
+
+    def connect(self):
+        """Connect a client to the server
+
+        Raises
+        ------
+        ConnectionRefusedError
+            If the server is not listening yet
+        """
+        return socket.create_connection((self.address, self.port))
+
+    def close(self):
+        """Close the listening socket of the server
+        """
+        self.socket.close()
+
+
+class UnixTransport(TcpTransport):
+    """Clients connect to a Unix domain socket of the server
+
+    A stale socket file left behind at the path is replaced, the file is
+    removed when the server closes the socket.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.socket = None
+
+    def __str__(self):
+        return 'unix:{}'.format(self.path)
+
+    def create_socket(self):
+        try:
+            if stat.S_ISSOCK(os.stat(self.path).st_mode):
+                os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.path)
+        return sock
+
+    def accept(self):
+        sock, _ = self.socket.accept()
+        return sock, (str(self), None)
+
+    def connect(self):
+        """Connect a client to the server
+
+        Raises
+        ------
+        ConnectionRefusedError
+            If the server is not listening yet
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+        except FileNotFoundError as e:
+            sock.close()
+            raise ConnectionRefusedError(str(e))
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def close(self):
+        super().close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class InheritedTransport:
+    """Connections already established by the launcher, e.g. by socket.socketpair()
+
+    The server gets the descriptors of its ends of the connections, a client
+    the one of its end, so nothing is bound and nobody waits for the other
+    side to start listening. The server assigns the connections to players
+    in the order of the descriptors.
+    """
+    def __init__(self, fds):
+        """
+        Parameters
+        ----------
+        fds : list of int
+            Inherited file descriptors of connected stream sockets
+        """
+        self.fds = list(fds)
+        self.next_fd = 0
+
+    def __str__(self):
+        return 'fd:{}'.format(','.join(str(fd) for fd in self.fds))
+
+    def bind(self):
+        pass
+
+    def listen(self, backlog):
+        if backlog > len(self.fds):
+            raise ValueError("{} connections inherited for {} clients".format(len(self.fds), backlog))
+
+    def accept(self):
+        fd = self.fds[self.next_fd]
+        self.next_fd += 1
+        return socket.socket(fileno=fd), ('fd', fd)
+
+    def connect(self):
+        return socket.socket(fileno=self.fds[0])
+
+    def close(self):
+        pass
+
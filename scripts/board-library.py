@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+from argparse import ArgumentParser
+import multiprocessing
+import os
+
+from dicewars.server.game.library import BoardLibrary, generate_board, write_board_library
+
+
+def main():
+    """Generate boards for a range of seeds and store them for the server
+    """
+    parser = ArgumentParser(prog='Dice_Wars-board-library')
+    parser.add_argument('library', help="File to store the boards in")
+    parser.add_argument('-b', '--board', help="Seed of the first board", type=int, default=0)
+    parser.add_argument('-n', '--nb-boards', help="Number of boards, for consecutive seeds", type=int, required=True)
+    parser.add_argument('-j', '--jobs', help="Number of boards generated in parallel", type=int,
+                        default=os.cpu_count())
+    parser.add_argument('--check', help="Verify the stored boards against newly generated ones", action='store_true')
+    args = parser.parse_args()
+
+    seeds = range(args.board, args.board + args.nb_boards)
+    with multiprocessing.Pool(args.jobs) as pool:
+        boards = pool.map(generate_board, seeds, chunksize=max(1, len(seeds) // (4 * args.jobs)))
+    write_board_library(args.library, args.board, boards)
+
+    if args.check:
+        library = BoardLibrary(args.library)
+        for seed, board in zip(seeds, boards):
+            if library.get_board(seed) != board or list(library.get_board(seed)) != list(board):
+                raise RuntimeError("Board {} differs from the generated one".format(seed))
+
+    print("Stored {} boards of seeds {} to {} in {}".format(len(seeds), seeds[0], seeds[-1], args.library))
+
+
+if __name__ == '__main__':
+    main()
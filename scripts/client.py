@@ -4,20 +4,14 @@ import logging
 from PyQt5.QtWidgets import QApplication
 import sys
 import random
-
-import importlib
+import socket
 
 from dicewars.client.game.game import Game
 from dicewars.client.ui import ClientUI
-from dicewars.client.ai_driver import AIDriver
-
-from utils import get_logging_level, get_nickname
-
+from dicewars.client.ai_driver import AIDriver, get_ai_constructor
+from dicewars.client.worker import AIWorker
 
-def get_ai_constructor(ai_specification):
-    ai_module = importlib.import_module('dicewars.ai.{}'.format(ai_specification))
-
-    return ai_module.AI
+from utils import add_transport_arguments, get_logging_level, get_nickname, get_transport
 
 
 def main():
@@ -29,6 +23,10 @@ def main():
     parser.add_argument('-d', '--debug', help="Enable debug output", default='WARN')
     parser.add_argument('-s', '--seed', help="Random seed for a client", type=int)
     parser.add_argument('--ai', help="Ai version")
+    parser.add_argument('--session', help="Game to join on a server hosting many games")
+    parser.add_argument('--worker', help="Keep playing games as commanded by a launcher over the inherited connection",
+                        type=int, metavar='FD')
+    add_transport_arguments(parser)
     args = parser.parse_args()
 
     random.seed(args.seed)
@@ -38,11 +36,17 @@ def main():
     logging.basicConfig(level=log_level)
     logger = logging.getLogger('CLIENT')
 
+    if args.worker is not None:
+        AIWorker(socket.socket(fileno=args.worker)).run()
+        return
+
     hello_msg = {
         'type': 'client_desc',
         'nickname': get_nickname(args.ai),
     }
-    game = Game(args.address, args.port, hello_msg)
+    if args.session is not None:
+        hello_msg['session'] = args.session
+    game = Game(args.address, args.port, hello_msg, get_transport(args))
 
     if args.ai:
         ai = AIDriver(game, get_ai_constructor(args.ai))
@@ -4,7 +4,8 @@ from signal import signal, SIGCHLD
 from argparse import ArgumentParser
 
 from dicewars.server.game.summary import get_win_rates
-from utils import run_ai_only_game, ListStats, BoardDefinition
+from utils import run_ai_only_game, run_local_game, configure_local_logging, ListStats, BoardDefinition
+from utils import add_board_shape_arguments, get_board_shape, AIWorkerPool, TRANSPORTS, SOCKETPAIR
 
 
 parser = ArgumentParser(prog='Dice_Wars')
@@ -20,6 +21,14 @@ parser.add_argument('-l', '--logdir', help="Folder to store last running logs in
 parser.add_argument('-d', '--debug', action='store_true')
 parser.add_argument('--ai', help="Specify AI versions as a sequence of ints.", nargs='+')
 parser.add_argument('-r', '--report', help="State the game number on the stdout", action='store_true')
+parser.add_argument('--board-library', help="Boards stored by scripts/board-library.py to be used instead of generating them")
+parser.add_argument('--in-process', help="Play the games within this process, without server and clients",
+                    action='store_true')
+parser.add_argument('--transport', help="How clients connect to the server, --port is only used by tcp",
+                    choices=TRANSPORTS, default=SOCKETPAIR)
+parser.add_argument('--workers', help="Keep the client processes playing one game after another",
+                    action='store_true')
+add_board_shape_arguments(parser)
 
 procs = []
 
@@ -45,26 +54,41 @@ def main():
     args = parser.parse_args()
 
     signal(SIGCHLD, signal_handler)
+    if args.in_process:
+        configure_local_logging(args.logdir, args.debug)
 
     if len(args.ai) < 2 or len(args.ai) > 8:
         print("Unsupported number of AIs")
         exit(1)
 
+    shape = get_board_shape(args)
+    workers = AIWorkerPool(args.logdir, args.debug) if args.workers else None
     summaries = []
     for i in range(args.nb_games):
         if args.report:
             sys.stdout.write('\r{}'.format(i))
         try:
             board_seed = None if args.board is None else args.board + i
-            board_definition = BoardDefinition(board_seed, args.ownership, args.strength)
-            game_summary = run_ai_only_game(
-                args.port, args.address, procs, args.ai,
-                board_definition,
-                fixed=args.fixed,
-                client_seed=args.client_seed,
-                logdir=args.logdir,
-                debug=args.debug,
-            )
+            board_definition = BoardDefinition(board_seed, args.ownership, args.strength, shape)
+            if args.in_process:
+                game_summary = run_local_game(
+                    args.ai, board_definition,
+                    fixed=args.fixed,
+                    client_seed=args.client_seed,
+                    board_library=args.board_library,
+                )
+            else:
+                game_summary = run_ai_only_game(
+                    args.port, args.address, procs, args.ai,
+                    board_definition,
+                    fixed=args.fixed,
+                    client_seed=args.client_seed,
+                    logdir=args.logdir,
+                    debug=args.debug,
+                    board_library=args.board_library,
+                    transport=args.transport,
+                    workers=workers,
+                )
             summaries.append(game_summary)
         except KeyboardInterrupt:
             for p in procs:
@@ -73,6 +97,8 @@ def main():
         except AttributeError:
             for p in procs:
                 p.kill()
+    if workers is not None:
+        workers.close()
     if args.report:
         sys.stdout.write('\r')
 
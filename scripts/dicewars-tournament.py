@@ -4,13 +4,18 @@ from argparse import ArgumentParser
 
 import math
 import itertools
-from utils import run_ai_only_game, get_nickname, BoardDefinition, SingleLineReporter, PlayerPerformance
+import multiprocessing
+import os
+from utils import run_ai_only_game, run_local_game, run_session_game, start_session_server, configure_local_logging
+from utils import get_nickname, BoardDefinition, SingleLineReporter, PlayerPerformance
 from utils import TournamentCombatantsProvider, EvaluationCombatantsProvider
-from utils import column_t
+from utils import column_t, add_board_shape_arguments, get_board_shape, AIWorkerPool, TRANSPORTS, SOCKETPAIR
 import random
 import sys
 import pickle
 
+from dicewars.ai.mcts.parallel import NB_WORKERS_VARIABLE
+
 
 parser = ArgumentParser(prog='Dice_Wars')
 parser.add_argument('-p', '--port', help="Server port", type=int, default=5005)
@@ -25,6 +30,18 @@ parser.add_argument('-d', '--debug', action='store_true')
 parser.add_argument('-r', '--report', help="State the game number on the stdout", action='store_true')
 parser.add_argument('--save', help="Where to put pickled GameSummaries")
 parser.add_argument('--load', help="Which GameSummaries to start from")
+parser.add_argument('-j', '--jobs', help="Number of games played in parallel, each worker uses its own port",
+                    type=int, default=1)
+parser.add_argument('--board-library', help="Boards stored by scripts/board-library.py to be used instead of generating them")
+parser.add_argument('--in-process', help="Play the games without starting server and client processes",
+                    action='store_true')
+parser.add_argument('--shared-server', help="Play all games on a single server process, listening on --port",
+                    action='store_true')
+parser.add_argument('--transport', help="How clients connect to the server, --port is only used by tcp",
+                    choices=TRANSPORTS, default=SOCKETPAIR)
+parser.add_argument('--workers', help="Keep the client processes playing one game after another",
+                    action='store_true')
+add_board_shape_arguments(parser)
 
 procs = []
 
@@ -55,10 +72,10 @@ UNIVERSAL_SEED = 42
 players_info = {ai: {'games': []} for ai in PLAYING_AIs}
 
 
-def board_definitions(initial_board_seed):
+def board_definitions(initial_board_seed, shape=None):
     board_seed = initial_board_seed
     while True:
-        yield BoardDefinition(board_seed, UNIVERSAL_SEED, UNIVERSAL_SEED)
+        yield BoardDefinition(board_seed, UNIVERSAL_SEED, UNIVERSAL_SEED, shape)
         board_seed += 1
 
 
@@ -80,6 +97,109 @@ def rotational_permunations_generator(players):
     return len(players), all_rotations(players)
 
 
+def tournament_games(args, combatants_provider):
+    """Generate all games of the tournament in the order they are to be played
+
+    Yields
+    ------
+    (str, BoardDefinition, list of str)
+        Progress description, the board and the AIs in the order of play
+    """
+    boards_played = 0
+    for board_definition in board_definitions(args.board, get_board_shape(args)):
+        if boards_played == args.nb_boards:
+            break
+        boards_played += 1
+
+        combatants = combatants_provider.get_combatants(args.game_size)
+        nb_permutations, permutations_generator = rotational_permunations_generator(combatants)
+        for i, permuted_combatants in enumerate(permutations_generator):
+            progress = '\r{} {}/{} {}'.format(boards_played, i+1, nb_permutations, ' vs. '.join(permuted_combatants))
+            yield progress, board_definition, permuted_combatants
+
+
+def play_tournament_game(args, port, board_definition, combatants, workers=None):
+    if args.in_process:
+        return run_local_game(
+            combatants, board_definition,
+            fixed=UNIVERSAL_SEED,
+            client_seed=UNIVERSAL_SEED,
+            board_library=args.board_library,
+        )
+    elif args.shared_server:
+        return run_session_game(
+            port, args.address, procs, combatants,
+            board_definition,
+            fixed=UNIVERSAL_SEED,
+            client_seed=UNIVERSAL_SEED,
+            logdir=args.logdir,
+            debug=args.debug,
+            workers=workers,
+        )
+    else:
+        return run_ai_only_game(
+            port, args.address, procs, combatants,
+            board_definition,
+            fixed=UNIVERSAL_SEED,
+            client_seed=UNIVERSAL_SEED,
+            logdir=args.logdir,
+            debug=args.debug,
+            board_library=args.board_library,
+            transport=args.transport,
+            workers=workers,
+        )
+
+
+worker_args = None
+worker_port = None
+worker_clients = None
+
+
+def init_worker(args, worker_ids):
+    """Set up a process of the pool, giving it a port of its own
+    """
+    global worker_args, worker_port, worker_clients
+    worker_args = args
+    worker_port = args.port
+    if not args.shared_server:
+        worker_port += worker_ids.get()
+    if args.workers:
+        worker_clients = AIWorkerPool(args.logdir, args.debug)
+
+    signal(SIGCHLD, signal_handler)
+    if args.in_process:
+        configure_local_logging(args.logdir, args.debug)
+
+
+def play_in_worker(game):
+    progress, board_definition, combatants = game
+    return progress, play_tournament_game(worker_args, worker_port, board_definition, combatants, worker_clients)
+
+
+def play_games_in_parallel(args, games, reporter, all_games):
+    """Play the games in a pool of processes
+
+    The games are collected in the order in which they were generated.
+    """
+    # the workers of parallel AIs of all the games at once share the cores
+    nb_cores = os.cpu_count() or 1
+    os.environ.setdefault(NB_WORKERS_VARIABLE, str(max(0, nb_cores // args.jobs - 1)))
+
+    worker_ids = multiprocessing.Queue()
+    for i in range(args.jobs):
+        worker_ids.put(i)
+
+    pool = multiprocessing.Pool(args.jobs, initializer=init_worker, initargs=(args, worker_ids))
+    try:
+        for progress, game_summary in pool.imap(play_in_worker, games):
+            reporter.report(progress)
+            all_games.append(game_summary)
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
 def main():
     args = parser.parse_args()
     if args.ai_under_test is not None:
@@ -96,25 +216,21 @@ def main():
     else:
         all_games = []
 
-    boards_played = 0
     reporter = SingleLineReporter(not args.report)
+    games = tournament_games(args, combatants_provider)
+    workers = AIWorkerPool(args.logdir, args.debug) if args.workers and args.jobs == 1 else None
+    if args.shared_server:
+        session_server = start_session_server(args.port, args.address, args.logdir, args.debug, args.board_library)
     try:
-        for board_definition in board_definitions(args.board):
-            if boards_played == args.nb_boards:
-                break
-            boards_played += 1
-
-            combatants = combatants_provider.get_combatants(args.game_size)
-            nb_permutations, permutations_generator = rotational_permunations_generator(combatants)
-            for i, permuted_combatants in enumerate(permutations_generator):
-                reporter.report('\r{} {}/{} {}'.format(boards_played, i+1, nb_permutations, ' vs. '.join(permuted_combatants)))
-                game_summary = run_ai_only_game(
-                    args.port, args.address, procs, permuted_combatants,
-                    board_definition,
-                    fixed=UNIVERSAL_SEED,
-                    client_seed=UNIVERSAL_SEED,
-                    logdir=args.logdir,
-                    debug=args.debug,
+        if args.jobs > 1:
+            play_games_in_parallel(args, games, reporter, all_games)
+        else:
+            if args.in_process:
+                configure_local_logging(args.logdir, args.debug)
+            for progress, board_definition, permuted_combatants in games:
+                reporter.report(progress)
+                game_summary = play_tournament_game(
+                    args, args.port, board_definition, permuted_combatants, workers
                 )
                 all_games.append(game_summary)
     except (Exception, KeyboardInterrupt) as e:
@@ -122,6 +238,10 @@ def main():
         for p in procs:
             p.kill()
 
+    if workers is not None:
+        workers.close()
+    if args.shared_server:
+        session_server.kill()
     reporter.clean()
 
     if args.save:
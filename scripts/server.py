@@ -4,56 +4,12 @@ from argparse import ArgumentParser
 import logging
 import random
 
-from itertools import cycle
+from dicewars.server.game import BoardLibrary, Game
+from dicewars.server.game import create_board
+from dicewars.server.sessions import SessionServer
 
-from dicewars.server.game import Board, BoardGenerator
-from dicewars.server.game import Game
 
-
-from utils import get_logging_level
-
-
-def area_player_mapping(nb_players, nb_areas):
-    assignment = {}
-    unassigned_areas = list(range(1, nb_areas+1))
-    player_cycle = cycle(range(1, nb_players+1))
-
-    while unassigned_areas:
-        player_no = next(player_cycle)
-        area_no = random.choice(unassigned_areas)
-        assignment[area_no] = player_no
-        unassigned_areas.remove(area_no)
-
-    return assignment
-
-
-def players_areas(ownership, the_player):
-    return [area for area, player in ownership.items() if player == the_player]
-
-
-def assign_dice(board, nb_players, ownership):
-    dice_total = 3 * board.get_number_of_areas() - random.randint(0, 5)
-    players_processed = 0
-
-    for player in range(1, nb_players+1):
-        player_dice = int(round(dice_total / (nb_players - players_processed)))
-        dice_total -= player_dice
-
-        available_areas = [board.get_area_by_name(area_name) for area_name in players_areas(ownership, player)]
-
-        # each area has to have at least one die
-        for area in available_areas:
-            area.set_dice(1)
-            player_dice -= 1
-
-        while player_dice and available_areas:
-            area = random.choice(available_areas)
-            if not area.add_die():  # adding a die to area failed means that area is full
-                available_areas.remove(area)
-            else:
-                player_dice -= 1
-
-        players_processed += 1
+from utils import add_board_shape_arguments, add_transport_arguments, get_board_shape, get_logging_level, get_transport
 
 
 def main():
@@ -72,6 +28,11 @@ def main():
     parser.add_argument('-f', '--fixed', help="Random seed to be used for player order and dice rolls", type=int)
     parser.add_argument('-r', '--order', nargs='+',
                         help="Random seed to be used for dice assignment")
+    parser.add_argument('--sessions', action='store_true',
+                        help="Keep hosting any number of concurrent games, as requested by launchers")
+    parser.add_argument('--board-library', help="Boards stored by scripts/board-library.py to be used instead of generating them")
+    add_board_shape_arguments(parser)
+    add_transport_arguments(parser, server=True)
     args = parser.parse_args()
     log_level = get_logging_level(args)
 
@@ -79,18 +40,20 @@ def main():
     logger = logging.getLogger('SERVER')
     logger.debug("Command line arguments: {0}".format(args))
 
-    random.seed(args.board)
-    generator = BoardGenerator()
-    board = Board(generator.generate_board())
+    library = None if args.board_library is None else BoardLibrary(args.board_library)
 
-    random.seed(args.ownership)
-    area_ownership = area_player_mapping(args.number_of_players, board.get_number_of_areas())
+    if args.sessions:
+        SessionServer(args.address, args.port, library).run()
+        return
 
-    random.seed(args.strength)
-    assign_dice(board, args.number_of_players, area_ownership)
+    board, area_ownership = create_board(
+        args.number_of_players, args.board, args.ownership, args.strength, library, get_board_shape(args)
+    )
 
     random.seed(args.fixed)
-    game = Game(board, area_ownership, args.number_of_players, args.address, args.port, args.order)
+    game = Game(
+        board, area_ownership, args.number_of_players, args.address, args.port, args.order, get_transport(args)
+    )
     game.run()
 
 
@@ -1,22 +1,38 @@
+import functools
+import json
+import logging
 import os
+import socket
 import sys
 from subprocess import Popen
 import tempfile
+import time
+import uuid
 import numpy as np
 import random
 from datetime import datetime
 
+from dicewars.client.ai_driver import get_nickname
+from dicewars.engine import play_game
+from dicewars.server.game import BoardLibrary, board_shape, create_board
 from dicewars.server.game.summary import GameSummary
+from dicewars.transport import InheritedTransport, TcpTransport, UnixTransport
+
+TCP = 'tcp'
+UNIX = 'unix'
+SOCKETPAIR = 'socketpair'
+TRANSPORTS = [TCP, UNIX, SOCKETPAIR]
 
 
 class BoardDefinition:
-    def __init__(self, board, ownership, strength):
+    def __init__(self, board, ownership, strength, shape=None):
         assert(board is None or isinstance(board, int))
         assert(ownership is None or isinstance(ownership, int))
         assert(strength is None or isinstance(strength, int))
         self.board = board
         self.ownership = ownership
         self.strength = strength
+        self.shape = shape
 
     def to_args(self):
         args = []
@@ -26,10 +42,66 @@ class BoardDefinition:
             args.extend(['-o', str(self.ownership)])
         if self.strength is not None:
             args.extend(['-s', str(self.strength)])
+        if self.shape is not None:
+            args.extend(['--grid', str(self.shape.grid_width), str(self.shape.grid_height)])
+            args.extend(['--areas', str(self.shape.min_areas), str(self.shape.max_areas)])
+            args.extend(['--area-size', str(self.shape.min_area_size), str(self.shape.max_area_size)])
         return args
 
     def __str__(self):
-        return "board: {}, ownership: {}, strength: {}".format(self.board, self.ownership, self.strength)
+        description = "board: {}, ownership: {}, strength: {}".format(self.board, self.ownership, self.strength)
+        if self.shape is not None:
+            description += ", shape: {}".format(self.shape)
+        return description
+
+
+def add_board_shape_arguments(parser):
+    """Add options for the shape of generated boards to a command-line parser
+    """
+    parser.add_argument('--areas', help="Number of areas of a board, or its range", type=int, nargs='+',
+                        metavar='N')
+    parser.add_argument('--grid', help="Width and height of the grid of hexes, scaled to the areas by default",
+                        type=int, nargs=2, metavar=('WIDTH', 'HEIGHT'))
+    parser.add_argument('--area-size', help="Range of numbers of hexes an area grows to", type=int, nargs=2,
+                        metavar=('MIN', 'MAX'))
+
+
+def get_board_shape(args):
+    """Shape of boards given by options of add_board_shape_arguments(), None for the classic one
+    """
+    if args.areas is None and args.grid is None and args.area_size is None:
+        return None
+    if args.areas is not None and len(args.areas) > 2:
+        raise ValueError("Number of areas is given by one or two values")
+
+    areas = None if args.areas is None else (args.areas[0], args.areas[-1])
+    return board_shape(areas, args.grid, args.area_size)
+
+
+def add_transport_arguments(parser, server=False):
+    """Add options for connections other than TCP on --address and --port to a command-line parser
+    """
+    parser.add_argument('--unix', help="Path of a Unix domain socket to be used instead of TCP", metavar='PATH')
+    if server:
+        parser.add_argument('--fds', help="Inherited connections to clients, assigned to players in this order",
+                            type=int, nargs='+', metavar='FD')
+    else:
+        parser.add_argument('--fd', help="Inherited connection to the server", type=int)
+
+
+def get_transport(args):
+    """Transport given by options of add_transport_arguments()
+    """
+    fds = getattr(args, 'fds', None)
+    if fds is None and getattr(args, 'fd', None) is not None:
+        fds = [args.fd]
+
+    if fds is not None:
+        return InheritedTransport(fds)
+    elif args.unix is not None:
+        return UnixTransport(args.unix)
+    else:
+        return TcpTransport(args.address, args.port)
 
 
 def get_logging_level(args):
@@ -48,15 +120,6 @@ def get_logging_level(args):
     return logging
 
 
-def get_nickname(ai_spec):
-    if ai_spec is not None:
-        nick = '{} (AI)'.format(ai_spec)
-    else:
-        nick = 'Human'
-
-    return nick
-
-
 def log_file_producer(logdir, process):
     if logdir is None:
         f = open(os.devnull, 'a+')
@@ -73,55 +136,312 @@ def log_file_producer(logdir, process):
 def run_ai_only_game(
         port, address, process_list, ais,
         board_definition=None, fixed=None, client_seed=None,
-        logdir=None, debug=False):
+        logdir=None, debug=False, board_library=None, transport=TCP, workers=None):
+    """Play a game by a server process and a client process for every AI
+
+    Parameters
+    ----------
+    transport : str
+        How the clients connect to the server. TCP uses the port and address,
+        UNIX a socket file in a temporary directory and SOCKETPAIR connections
+        created beforehand and inherited by the processes.
+    workers : AIWorkerPool
+        Processes to play for the AIs instead of clients started for the game
+
+    Returns
+    -------
+    GameSummary
+    """
     logs = []
     process_list.clear()
 
     ai_nicks = [get_nickname(ai) for ai in ais]
 
+    socket_dir = None
+    server_fds = []
+    if transport == SOCKETPAIR:
+        pairs = [socket.socketpair() for _ in ais]
+        server_fds = [server_end.fileno() for server_end, _ in pairs]
+        connection_args = ['--fds'] + [str(fd) for fd in server_fds]
+        client_connections = [({}, [client_end.fileno()]) for _, client_end in pairs]
+    elif transport == UNIX:
+        socket_dir = tempfile.TemporaryDirectory(prefix='dicewars-')
+        path = os.path.join(socket_dir.name, 'server.sock')
+        connection_args = ['--unix', path]
+        client_connections = [({'unix': path}, []) for _ in ais]
+    else:
+        connection_args = ["-p", str(port), "-a", str(address)]
+        client_connections = [({'address': address, 'port': port}, []) for _ in ais]
+
     server_cmd = [
         "./scripts/server.py",
         "-n", str(len(ais)),
-        "-p", str(port),
-        "-a", str(address),
     ]
+    server_cmd.extend(connection_args)
     server_cmd.append('-r')
     server_cmd.extend(ai_nicks)
     if board_definition is not None:
         server_cmd.extend(board_definition.to_args())
     if fixed is not None:
         server_cmd.extend(['-f', str(fixed)])
+    if board_library is not None:
+        server_cmd.extend(['--board-library', board_library])
     if debug:
         server_cmd.extend(['--debug', 'DEBUG'])
 
     server_output = tempfile.TemporaryFile('w+')
     logs.append(log_file_producer(logdir, 'server.txt'))
-    process_list.append(Popen(server_cmd, stdout=server_output, stderr=logs[-1]))
+    process_list.append(Popen(server_cmd, stdout=server_output, stderr=logs[-1], pass_fds=server_fds))
+
+    if workers is None:
+        start_ai_clients(port, address, process_list, logs, ais, client_seed, logdir, debug,
+                         connections=client_connections)
+    else:
+        workers.play(ais, client_seed, client_connections)
+    if transport == SOCKETPAIR:
+        # only the processes may keep the connections open, so that they see them closed
+        for server_end, client_end in pairs:
+            server_end.close()
+            client_end.close()
+
+    for p in process_list:
+        p.wait()
+    if workers is not None:
+        workers.wait(len(ais))
+
+    for log in logs:
+        log.close()
+    if socket_dir is not None:
+        socket_dir.cleanup()
+
+    server_output.seek(0)
+    game_summary = GameSummary.from_repr(server_output.read())
+    return game_summary
+
+
+def start_ai_clients(port, address, process_list, logs, ais, client_seed, logdir, debug, session=None,
+                     connections=None):
+    """Start a client process for every AI
 
-    for ai_version in ais:
+    Parameters
+    ----------
+    connections : list of (dict, list of int)
+        How each client connects otherwise than to the port and address, see AIWorkerPool.play()
+    """
+    for i, ai_version in enumerate(ais):
         client_cmd = [
             "./scripts/client.py",
-            "-p", str(port),
-            "-a", str(address),
             "--ai", str(ai_version),
         ]
+        connection, pass_fds = ({}, []) if connections is None else connections[i]
+        if pass_fds:
+            client_cmd.extend(['--fd', str(pass_fds[0])])
+        elif connection.get('unix') is not None:
+            client_cmd.extend(['--unix', connection['unix']])
+        else:
+            client_cmd.extend(["-p", str(port), "-a", str(address)])
         if client_seed is not None:
             client_cmd.extend(['-s', str(client_seed)])
+        if session is not None:
+            client_cmd.extend(['--session', session])
         if debug:
             client_cmd.extend(['--debug', 'DEBUG'])
 
         logs.append(log_file_producer(logdir, 'client-{}.log'.format(ai_version)))
-        process_list.append(Popen(client_cmd, stderr=logs[-1]))
+        process_list.append(Popen(client_cmd, stderr=logs[-1], pass_fds=pass_fds))
+
+
+def start_session_server(port, address, logdir=None, debug=False, board_library=None):
+    """Start a server hosting games of many sessions, wait until it accepts connections
+    """
+    server_cmd = [
+        "./scripts/server.py",
+        "--sessions",
+        "-p", str(port),
+        "-a", str(address),
+    ]
+    if board_library is not None:
+        server_cmd.extend(['--board-library', board_library])
+    if debug:
+        server_cmd.extend(['--debug', 'DEBUG'])
+
+    server = Popen(server_cmd, stderr=log_file_producer(logdir, 'session-server.txt'))
+    for _ in range(100):
+        try:
+            socket.create_connection((address, port)).close()
+            return server
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+
+    server.kill()
+    raise RuntimeError("Session server did not start on {}:{}".format(address, port))
+
+
+def run_session_game(
+        port, address, process_list, ais,
+        board_definition=None, fixed=None, client_seed=None,
+        logdir=None, debug=False, workers=None):
+    """Play a game on a server started by start_session_server()
+
+    The arguments have the same meaning as for run_ai_only_game().
+    """
+    logs = []
+    process_list.clear()
+
+    session = uuid.uuid4().hex
+    description = {
+        'type': 'session_desc',
+        'session': session,
+        'nb_players': len(ais),
+        'order': [get_nickname(ai) for ai in ais],
+        'fixed': fixed,
+    }
+    if board_definition is not None:
+        description['board'] = board_definition.board
+        description['ownership'] = board_definition.ownership
+        description['strength'] = board_definition.strength
+        if board_definition.shape is not None:
+            description['shape'] = list(board_definition.shape)
+
+    control = socket.create_connection((address, port))
+    control.sendall(str.encode(json.dumps(description)))
+
+    if workers is None:
+        start_ai_clients(port, address, process_list, logs, ais, client_seed, logdir, debug, session)
+    else:
+        workers.play(ais, client_seed, [({'address': address, 'port': port}, [])] * len(ais), session)
+
+    response = b''
+    while True:
+        data = control.recv(65535)
+        if not data:
+            break
+        response += data
+    control.close()
 
     for p in process_list:
         p.wait()
+    if workers is not None:
+        workers.wait(len(ais))
 
     for log in logs:
         log.close()
 
-    server_output.seek(0)
-    game_summary = GameSummary.from_repr(server_output.read())
-    return game_summary
+    msg = json.loads(response.decode().rstrip('\0'))
+    return GameSummary.from_repr(msg['summary'])
+
+
+class AIWorkerPool:
+    """Client processes playing one game after another, kept across games
+
+    Every worker is a scripts/client.py --worker process, commanded over
+    a socketpair. For every game, the AI is constructed anew and the random
+    generator re-seeded, so the results are the same as with a new client
+    process, whose start often takes longer than a short game of cheap AIs.
+    A worker which has died is replaced by a new one.
+    """
+    def __init__(self, logdir=None, debug=False):
+        self.logdir = logdir
+        self.debug = debug
+        self.workers = []
+        self.logs = []
+
+    def start_worker(self):
+        """Start a worker process
+
+        Returns
+        -------
+        (Popen, socket)
+            The process and the connection commanding it
+        """
+        control, worker_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        worker_cmd = ["./scripts/client.py", "--worker", str(worker_end.fileno())]
+        if self.debug:
+            worker_cmd.extend(['--debug', 'DEBUG'])
+
+        self.logs.append(log_file_producer(self.logdir, 'worker-{}.log'.format(len(self.logs))))
+        process = Popen(worker_cmd, stderr=self.logs[-1], pass_fds=[worker_end.fileno()])
+        worker_end.close()
+        return process, control
+
+    def play(self, ais, client_seed, connections, session=None):
+        """Have the first workers join a game, the i-th one playing the i-th AI
+
+        Parameters
+        ----------
+        ais : list of str
+        client_seed : int
+            Seed of the random generator of every client
+        connections : list of (dict, list of int)
+            How each client connects to the server. Either by the descriptor
+            of a connection passed to it, or to 'unix' or 'address' and 'port'
+            given by the dict.
+        session : str
+            Session of the game on a server hosting many games
+        """
+        while len(self.workers) < len(ais):
+            self.workers.append(self.start_worker())
+
+        for (process, control), ai, (connection, fds) in zip(self.workers, ais, connections):
+            command = dict(connection, type='play', ai=ai, seed=client_seed, session=session)
+            socket.send_fds(control, [str.encode(json.dumps(command))], fds)
+
+    def wait(self, nb_workers):
+        """Wait for the first workers to finish their games
+        """
+        for i in range(nb_workers):
+            process, control = self.workers[i]
+            try:
+                response = control.recv(65535)
+            except ConnectionResetError:
+                response = b''
+            if not response:
+                control.close()
+                process.wait()
+                self.workers[i] = self.start_worker()
+
+    def close(self):
+        """Let the workers end
+        """
+        for process, control in self.workers:
+            control.close()
+        for process, control in self.workers:
+            process.wait()
+        for log in self.logs:
+            log.close()
+        self.workers = []
+
+
+def configure_local_logging(logdir, debug=False):
+    """Log in-process games to the log directory, like processes of socket-based games do
+    """
+    logging.basicConfig(
+        stream=log_file_producer(logdir, 'in-process.log'),
+        level=logging.DEBUG if debug else logging.WARNING,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def load_board_library(path):
+    return BoardLibrary(path)
+
+
+def run_local_game(ais, board_definition=None, fixed=None, client_seed=None, board_library=None):
+    """Play a game within this process, equivalent to run_ai_only_game()
+    """
+    if board_definition is None:
+        board_definition = BoardDefinition(None, None, None)
+    library = None if board_library is None else load_board_library(board_library)
+
+    # creating the board re-seeds the global generator, which the caller may rely on
+    random_state = random.getstate()
+    board, area_ownership = create_board(
+        len(ais), board_definition.board, board_definition.ownership, board_definition.strength, library,
+        board_definition.shape,
+    )
+    random.setstate(random_state)
+
+    return play_game(board, area_ownership, ais, fixed=fixed, client_seed=client_seed)
 
 
 class ListStats:
@@ -185,7 +505,7 @@ class PlayerPerformance:
 
 class TournamentCombatantsProvider:
     def __init__(self, players):
-        self.game_numbers = np.zeros((len(players), len(players)), dtype=np.int)
+        self.game_numbers = np.zeros((len(players), len(players)), dtype=int)
         self.players = players
 
     def get_combatants(self, nb_combatants):
@@ -215,7 +535,7 @@ class TournamentCombatantsProvider:
 
 class EvaluationCombatantsProvider:
     def __init__(self, players, ai_under_test):
-        self.game_numbers = np.zeros((len(players), len(players)), dtype=np.int)
+        self.game_numbers = np.zeros((len(players), len(players)), dtype=int)
         self.players = players
         self.put = ai_under_test
         assert(self.put in self.players)
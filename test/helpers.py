@@ -0,0 +1,24 @@
+import json
+
+from dicewars.client.game.board import Board
+from dicewars.server.game import create_board
+
+
+def client_board(server_board, area_ownership):
+    """Board of a client, created from the state of a server board sent over the wire
+    """
+    areas = {
+        name: {'owner': area_ownership[name], 'dice': area.get_dice()}
+        for name, area in server_board.areas.items()
+    }
+    msg = json.loads(json.dumps({'areas': areas, 'board': server_board.get_board()}))
+    return Board(msg['areas'], msg['board'])
+
+
+def create_client_board(nb_players, board_seed, ownership_seed, strength_seed, shape=None):
+    """Board of a client in a game created by create_board() for the seeds
+    """
+    server_board, area_ownership = create_board(
+        nb_players, board_seed, ownership_seed, strength_seed, shape=shape
+    )
+    return client_board(server_board, area_ownership)
@@ -0,0 +1,117 @@
+import threading
+import time
+import unittest
+
+from dicewars.client.ai_driver import AttackPlanCommand, BattleCommand
+from dicewars.engine import LocalGame, RandomState
+from dicewars.server.game import create_board
+
+
+class PonderingAI:
+    def __init__(self, nb_calls=None, fail=False, duration=0.0, cancellable=True):
+        self.nb_calls = nb_calls
+        self.fail = fail
+        self.duration = duration
+        self.cancellable = cancellable
+        self.calls = []
+        self.started = threading.Event()
+
+    def ponder(self, board, current_player, cancelled):
+        self.started.set()
+        if self.fail:
+            raise ValueError("Pondering went wrong")
+        if self.cancellable:
+            cancelled.wait(self.duration)
+        else:
+            time.sleep(self.duration)
+        self.calls.append(current_player)
+        return self.nb_calls is None or len(self.calls) < self.nb_calls
+
+
+class PonderingTests(unittest.TestCase):
+    def setUp(self):
+        board, area_ownership = create_board(2, 3, 4, 5)
+        with RandomState(7):
+            game = LocalGame(board, area_ownership, ['dt.rand', 'dt.rand'])
+        self.current_player = game.current_player.get_name()
+        self.driver = next(driver for name, driver in game.drivers.items() if name != self.current_player)
+
+    def test_pondering_stopped(self):
+        self.driver.ai = PonderingAI()
+        self.driver.start_pondering()
+        self.assertTrue(self.driver.ai.started.wait(5.0))
+        self.driver.stop_pondering()
+        nb_calls = len(self.driver.ai.calls)
+        time.sleep(0.05)
+
+        self.assertGreater(nb_calls, 0)
+        self.assertEqual(set(self.driver.ai.calls), {self.current_player})
+        self.assertIsNone(self.driver.ponder_thread)
+        self.assertEqual(len(self.driver.ai.calls), nb_calls)
+
+    def test_long_call_cancelled(self):
+        self.driver.ai = PonderingAI(duration=10.0)
+        self.driver.start_pondering()
+        self.assertTrue(self.driver.ai.started.wait(5.0))
+        start = time.perf_counter()
+        self.driver.stop_pondering()
+
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(len(self.driver.ai.calls), 1)
+        self.assertFalse(self.driver.ponder_failed)
+
+    def test_overrunning_call_not_waited_for(self):
+        self.driver.ai = PonderingAI(duration=1.0, cancellable=False)
+        self.driver.start_pondering()
+        self.assertTrue(self.driver.ai.started.wait(5.0))
+        start = time.perf_counter()
+        self.driver.stop_pondering()
+
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(self.driver.ai.calls, [])
+        self.assertTrue(self.driver.ponder_failed)
+        self.assertIsNone(self.driver.ponder_thread)
+        self.driver.start_pondering()
+        self.assertIsNone(self.driver.ponder_thread)
+
+    def test_pondering_ends_on_its_own(self):
+        self.driver.ai = PonderingAI(nb_calls=3)
+        self.driver.start_pondering()
+        self.driver.ponder_thread.join(5.0)
+        self.assertEqual(len(self.driver.ai.calls), 3)
+        self.driver.stop_pondering()
+
+    def test_no_pondering_on_own_turn(self):
+        self.driver.ai = PonderingAI()
+        self.driver.game.current_player_name = self.driver.player_name
+        self.driver.start_pondering()
+        self.assertIsNone(self.driver.ponder_thread)
+
+    def test_failing_ponder_not_called_again(self):
+        self.driver.ai = PonderingAI(fail=True)
+        self.driver.start_pondering()
+        self.driver.stop_pondering()
+        self.assertTrue(self.driver.ponder_failed)
+        self.assertFalse(self.driver.ai_disabled)
+
+        self.driver.start_pondering()
+        self.assertIsNone(self.driver.ponder_thread)
+
+
+class ValidationTests(unittest.TestCase):
+    def setUp(self):
+        board, area_ownership = create_board(2, 3, 4, 5)
+        with RandomState(7):
+            game = LocalGame(board, area_ownership, ['dt.rand', 'dt.rand'])
+        self.driver = game.drivers[game.current_player.get_name()]
+        self.nb_areas = board.get_number_of_areas()
+
+    def test_unknown_source_rejected(self):
+        for name in [0, -1, self.nb_areas + 1]:
+            self.driver.ai_disabled = False
+            self.assertFalse(self.driver.battle_is_valid(BattleCommand(name, 1)))
+            self.assertTrue(self.driver.ai_disabled)
+
+    def test_unknown_source_not_skipped(self):
+        plan = AttackPlanCommand([(-1, 1), (1, 2)])
+        self.assertEqual(self.driver.skip_weak_attacks(plan), [(-1, 1), (1, 2)])
@@ -0,0 +1,69 @@
+import itertools
+import unittest
+
+import numpy
+
+from dicewars.ai.utils import ATTACK_TABLES, AttackTables, attack_succcess_probability
+from dicewars.ai.utils import AttackBatch, possible_attacks, possible_attack_indices
+from dicewars.ai.utils import probability_of_holding_area, probability_of_successful_attack
+
+from helpers import create_client_board
+
+
+def enumerated_success(atk, df, faces):
+    wins = total = 0
+    for rolls in itertools.product(range(1, faces + 1), repeat=atk + df):
+        wins += sum(rolls[:atk]) > sum(rolls[atk:])
+        total += 1
+    return wins / total
+
+
+class AttackTablesTests(unittest.TestCase):
+    def test_success_is_exact(self):
+        for atk, df in [(1, 1), (2, 1), (2, 2), (3, 2), (2, 3)]:
+            self.assertAlmostEqual(ATTACK_TABLES.success[atk, df], enumerated_success(atk, df, 6), places=12)
+        self.assertAlmostEqual(attack_succcess_probability(8, 8), 0.47109073, places=8)
+
+    def test_other_dice(self):
+        tables = AttackTables(faces=4, max_dice=12)
+        self.assertAlmostEqual(tables.success[3, 2], enumerated_success(3, 2, 4), places=12)
+        self.assertEqual(tables.success.shape, (13, 13))
+
+    def test_vectorized_lookup(self):
+        atk = numpy.array([2, 5, 8])
+        df = numpy.array([1, 5, 3])
+        expected = [attack_succcess_probability(a, d) for a, d in zip(atk, df)]
+        self.assertEqual(attack_succcess_probability(atk, df).tolist(), expected)
+
+    def test_margin_and_surviving_dice(self):
+        margin = ATTACK_TABLES.margin
+        self.assertTrue(numpy.allclose(margin.sum(axis=2), 1.0))
+        self.assertAlmostEqual(margin[1, 1, ATTACK_TABLES.max_margin], 1 / 6)
+        self.assertAlmostEqual(
+            ATTACK_TABLES.surviving_attacker[4, 2], 1 + 3 * ATTACK_TABLES.success[4, 2]
+        )
+        self.assertAlmostEqual(
+            ATTACK_TABLES.surviving_defender[4, 2], 2 * (1 - ATTACK_TABLES.success[4, 2])
+        )
+
+
+class AttackBatchTests(unittest.TestCase):
+    def setUp(self):
+        self.board = create_client_board(3, 8, 9, 10)
+
+    def test_same_attacks_as_possible_attacks(self):
+        for player in range(1, 4):
+            expected = [(s.get_name(), t.get_name()) for s, t in possible_attacks(self.board, player)]
+            sources, targets = possible_attack_indices(self.board, player)
+            self.assertEqual(list(zip(sources.tolist(), targets.tolist())), expected)
+
+    def test_same_probabilities_as_per_attack(self):
+        for player in range(1, 4):
+            attacks = AttackBatch(self.board, player)
+            self.assertGreater(len(attacks), 0)
+            for i in range(len(attacks)):
+                source, target = attacks.attack(i)
+                dice = self.board.get_area(source).get_dice()
+                self.assertEqual(attacks.attack_probability[i], probability_of_successful_attack(self.board, source, target))
+                self.assertEqual(attacks.hold_probability[i], probability_of_holding_area(self.board, target, dice - 1, player))
+                self.assertEqual(attacks.strength_difference[i], dice - self.board.get_area(target).get_dice())
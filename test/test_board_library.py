@@ -0,0 +1,54 @@
+import json
+import os
+import tempfile
+import unittest
+
+from dicewars.server.game import BoardLibrary, create_board
+from dicewars.server.game.library import generate_board, write_board_library
+
+
+class BoardLibraryTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'boards.lib')
+        self.boards = [generate_board(seed) for seed in range(10, 14)]
+        write_board_library(self.path, 10, self.boards)
+        self.library = BoardLibrary(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_boards_same_as_generated(self):
+        self.assertEqual(len(self.library), 4)
+        for seed, board in zip(range(10, 14), self.boards):
+            loaded = self.library.get_board(seed)
+            self.assertEqual(json.dumps(loaded), json.dumps(board))
+            self.assertEqual(loaded, board)
+
+    def test_missing_boards(self):
+        self.assertNotIn(9, self.library)
+        self.assertNotIn(14, self.library)
+        self.assertNotIn(None, self.library)
+        with self.assertRaises(KeyError):
+            self.library.get_board(14)
+
+        board, ownership = create_board(3, 20, 1, 2, self.library)
+        self.assertEqual(board.get_board(), generate_board(20))
+
+    def test_create_board(self):
+        for seed in [11, 13]:
+            board, ownership = create_board(4, seed, 5, 6, self.library)
+            expected_board, expected_ownership = create_board(4, seed, 5, 6)
+            self.assertEqual(ownership, expected_ownership)
+            self.assertEqual(json.dumps(board.get_board()), json.dumps(expected_board.get_board()))
+            self.assertEqual(
+                [area.get_dice() for area in board.areas.values()],
+                [area.get_dice() for area in expected_board.areas.values()],
+            )
+
+    def test_not_a_library(self):
+        path = os.path.join(self.directory.name, 'zeros')
+        with open(path, 'wb') as f:
+            f.write(bytes(100))
+        with self.assertRaises(ValueError):
+            BoardLibrary(path)
@@ -0,0 +1,121 @@
+import pickle
+import unittest
+
+from dicewars.compact_board import CompactBoard, mask_to_names
+from dicewars.server.game import create_board
+
+from helpers import client_board
+
+
+class CompactBoardTests(unittest.TestCase):
+    def setUp(self):
+        self.server_board, self.ownership = create_board(4, 3, 4, 5)
+        for name, owner in self.ownership.items():
+            self.server_board.get_area_by_name(name).set_owner_name(owner)
+        self.board = client_board(self.server_board, self.ownership)
+
+    def test_same_as_server_board(self):
+        compact = CompactBoard.from_server_board(self.server_board)
+        self.assertEqual(compact.get_number_of_areas(), self.server_board.get_number_of_areas())
+        for name, area in self.server_board.areas.items():
+            self.assertEqual(compact.get_neighbours(name).tolist(), area.get_adjacent_areas_names())
+            self.assertEqual(compact.get_owner(name), area.get_owner_name())
+            self.assertEqual(compact.get_dice(name), area.get_dice())
+
+    def test_facade(self):
+        area = self.board.get_area(5)
+        self.assertIs(self.board.get_area('5'), area)
+        self.assertEqual(area.get_owner_name(), self.ownership[5])
+
+        area.set_dice(8)
+        self.assertEqual(self.board.compact.get_dice(5), 8)
+        self.assertIn(area, self.board.get_player_areas(self.ownership[5]))
+
+        for player in range(1, 5):
+            regions = self.board.get_players_regions(player)
+            self.assertEqual(sorted(sum(regions, [])), sorted(a.get_name() for a in self.board.get_player_areas(player)))
+            for region in regions:
+                self.assertEqual(sorted(region), sorted(self.board.get_areas_region(region[0], sum(regions, []))))
+        self.assertEqual(self.board.nb_players_alive(), 4)
+
+    def test_unknown_area_names(self):
+        nb_areas = self.server_board.get_number_of_areas()
+        for board in [self.board, self.board.snapshot()]:
+            for name in [0, -1, nb_areas + 1, 999, 'x', None]:
+                with self.assertRaises(KeyError):
+                    board.get_area(name)
+            self.assertEqual(board.get_area(nb_areas).get_name(), nb_areas)
+
+    def test_regions_with_skipped_area(self):
+        player = self.ownership[1]
+        regions = self.board.get_players_regions(player, skip_area=1)
+        self.assertNotIn(1, sum(regions, []))
+        self.assertEqual(len(sum(regions, [])), len(self.board.get_player_areas(player)) - 1)
+
+    def test_regions_are_recomputed_after_change_of_owner(self):
+        compact = self.board.compact
+        player = self.ownership[1]
+        regions = compact.get_players_regions(player)
+        self.assertIs(compact.get_regions_masks(player), compact.get_regions_masks(player))
+
+        compact.owner[compact.get_player_areas(player)] = 4
+        self.assertEqual(compact.get_players_regions(player), [])
+        self.assertEqual(compact.get_largest_region_size(player), 0)
+        self.assertGreater(compact.get_largest_region_size(4), max(len(r) for r in regions))
+
+    def test_region_masks(self):
+        compact = self.board.compact
+        self.assertEqual(mask_to_names(0b10110), [1, 2, 4])
+        for area in [1, 2, 3]:
+            everything = compact.get_owner_mask(0) ^ ((1 << len(compact.owner)) - 1)
+            self.assertEqual(mask_to_names(compact.get_region_mask(area, everything)), compact.names.tolist())
+            self.assertEqual(compact.get_region_mask(area, 0), 1 << area)
+
+    def test_copy_shares_only_static_data(self):
+        compact = self.board.compact
+        copy = compact.copy()
+        copy.set_owner(1, 3)
+        copy.set_dice(1, 7)
+        self.assertEqual(compact.get_owner(1), self.ownership[1])
+        self.assertIs(copy.adjacency, compact.adjacency)
+        with self.assertRaises(ValueError):
+            copy.adjacency[0] = 1
+
+    def test_pickling(self):
+        board = pickle.loads(pickle.dumps(self.board))
+        self.assertEqual(board.get_area(3).get_dice(), self.board.get_area(3).get_dice())
+        board.get_area(3).set_owner(4)
+        self.assertEqual(board.compact.get_owner(3), 4)
+
+
+class SnapshotTests(unittest.TestCase):
+    def setUp(self):
+        server_board, ownership = create_board(3, 6, 7, 8)
+        self.board = client_board(server_board, ownership)
+
+    def state(self, board):
+        return [(a.get_name(), a.get_owner_name(), a.get_dice(), list(a.get_adjacent_areas())) for a in board.areas.values()]
+
+    def test_snapshot_is_equal(self):
+        snapshot = self.board.snapshot()
+        self.assertEqual(self.state(snapshot), self.state(self.board))
+        self.assertEqual(snapshot.get_players_regions(2), self.board.get_players_regions(2))
+        self.assertEqual(snapshot.get_area(1).get_hexes(), [])
+
+    def test_snapshot_is_tamper_proof(self):
+        original = self.state(self.board)
+        snapshot = self.board.snapshot()
+        for area in snapshot.areas.values():
+            area.set_owner(3)
+            area.set_dice(8)
+            area.get_adjacent_areas().append(1000)
+        snapshot.compact.owner[:] = 1
+        snapshot.compact.dice[:] = 1
+        for array in [snapshot.compact.adjacency, snapshot.compact.adjacency_ptr, snapshot.compact.names]:
+            with self.assertRaises(ValueError):
+                array[0] = 1
+            with self.assertRaises(ValueError):
+                array.flags.writeable = True
+
+        self.assertEqual(self.state(self.board), original)
+        self.assertEqual(self.state(self.board.snapshot()), original)
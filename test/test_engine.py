@@ -0,0 +1,228 @@
+import os
+import random
+import sys
+import unittest
+from unittest import mock
+
+from dicewars.engine import LocalGame, RandomState, play_game
+from dicewars.protocol import SUBSCRIPTION_FULL
+from dicewars.server.game import create_board
+from dicewars.server.game.generator import board_shape
+
+
+def play(ais, board_seed, fixed=7, client_seed=11):
+    board, area_ownership = create_board(len(ais), board_seed, 3, 5)
+    return play_game(board, area_ownership, ais, fixed=fixed, client_seed=client_seed)
+
+
+class FullStateGame(LocalGame):
+    def connect_clients(self):
+        super().connect_clients()
+        for player in self.players.values():
+            player.set_subscription(SUBSCRIPTION_FULL)
+
+
+class EngineTests(unittest.TestCase):
+    def test_game_finishes(self):
+        summary = play(['dt.sdc', 'dt.rand'], 1)
+        self.assertIn(summary.winner, ['dt.sdc (AI)', 'dt.rand (AI)'])
+        self.assertEqual(len(summary.participants()), 2)
+        self.assertGreater(summary.nb_battles, 0)
+
+    def test_same_seeds_same_game(self):
+        ais = ['dt.rand', 'dt.sdc', 'dt.rand']
+        first = play(ais, 2)
+        second = play(ais, 2)
+        self.assertEqual(repr(first), repr(second))
+
+    def test_global_random_untouched(self):
+        board, area_ownership = create_board(2, 4, 3, 5)
+        state = random.getstate()
+        play_game(board, area_ownership, ['dt.rand', 'dt.sdc'], fixed=1, client_seed=2)
+        self.assertEqual(random.getstate(), state)
+
+    def test_deltas_same_as_full_state(self):
+        ais = ['dt.sdc', 'dt.ste', 'dt.rand']
+        board, area_ownership = create_board(len(ais), 6, 3, 5)
+        with RandomState(7):
+            full = FullStateGame(board, area_ownership, ais, client_seed=11).play()
+        self.assertEqual(repr(play(ais, 6)), repr(full))
+
+    def test_attack_plans(self):
+        ais = ['dt.stei', 'dt.sdc', 'dt.stei']
+        board, area_ownership = create_board(len(ais), 6, 3, 5)
+        with RandomState(7):
+            full = FullStateGame(board, area_ownership, ais, client_seed=11).play()
+        self.assertEqual(repr(play(ais, 6)), repr(full))
+
+
+class SocketGameTests(unittest.TestCase):
+    """In-process games against games of server and client processes
+    """
+    def setUp(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        sys.path.insert(0, os.path.join(root, 'scripts'))
+        self.addCleanup(sys.path.remove, os.path.join(root, 'scripts'))
+        cwd = os.getcwd()
+        os.chdir(root)
+        self.addCleanup(os.chdir, cwd)
+        environment = mock.patch.dict(os.environ, {'PYTHONPATH': root})
+        environment.start()
+        self.addCleanup(environment.stop)
+
+    def test_same_summaries(self):
+        import utils
+
+        for ais, board in [(['wrong', 'dt.sdc'], 4), (['dt.sdc', 'dt.ste', 'dt.rand'], 6)]:
+            definition = utils.BoardDefinition(board, 3, 5)
+            local = utils.run_local_game(ais, definition, fixed=7, client_seed=11)
+            over_sockets = utils.run_ai_only_game(
+                None, None, [], ais, definition, fixed=7, client_seed=11, transport=utils.SOCKETPAIR
+            )
+            self.assertEqual(repr(local), repr(over_sockets))
+
+
+class LargeBoardTests(unittest.TestCase):
+    # the AIs of scripts/dicewars-tournament.py, split so that the WPM agents
+    # have their weights for the number of players
+    TOURNAMENT_AIS = [
+        ['dt.rand', 'dt.sdc', 'dt.ste', 'dt.stei', 'dt.wpm_d'],
+        ['dt.wpm_s', 'dt.wpm_c', 'xlogin00', 'xsismi01'],
+    ]
+
+    def test_tournament_ais_play_large_board(self):
+        for board_seed, ais in enumerate(self.TOURNAMENT_AIS):
+            board, area_ownership = create_board(len(ais), board_seed, 3, 5, shape=board_shape(200))
+            with RandomState(7):
+                game = LocalGame(board, area_ownership, ais, client_seed=11)
+                for i in range(1, game.number_of_players + 1):
+                    game.send_message(game.players[i], 'game_state')
+
+                nb_turns = 0
+                while nb_turns < 2 * len(ais) and not game.check_win_condition():
+                    player = game.current_player
+                    game.handle_player_turn()
+                    nb_turns += game.current_player is not player
+
+            self.assertGreater(game.summary.nb_battles, 0)
+            for player_name, ai in enumerate(ais, start=1):
+                self.assertFalse(game.drivers[player_name].ai_disabled, ai)
+
+
+class AttackPlanTests(unittest.TestCase):
+    def setUp(self):
+        board, area_ownership = create_board(2, 3, 4, 5)
+        with RandomState(7):
+            self.game = LocalGame(board, area_ownership, ['dt.rand', 'dt.rand'])
+        self.player = self.game.current_player.get_name()
+
+    def attacks(self):
+        attacks = []
+        targets = set()
+        for area in self.game.board.areas.values():
+            if area.get_owner_name() != self.player or area.get_dice() < 2:
+                continue
+            for neighbour in area.get_adjacent_areas():
+                if neighbour.get_owner_name() != self.player and neighbour not in targets:
+                    attacks.append((area.get_name(), neighbour.get_name()))
+                    targets.add(neighbour)
+                    break
+        return attacks
+
+    def test_impossible_attacks_skipped(self):
+        source, target = self.attacks()[0]
+        plan = [(target, source), (source, source), (source, target), (source, target)]
+        with RandomState(1):
+            battles, players = self.game.execute_attack_plan(plan, False, 2)
+        self.assertEqual(len(battles), 1)
+        self.assertEqual((battles[0]['atk']['name'], battles[0]['def']['name']), (source, target))
+        self.assertEqual(self.game.board.get_area_by_name(source).get_dice(), 1)
+        self.assertEqual(self.game.summary.nb_battles, 1)
+
+    def test_stop_conditions(self):
+        attacks = self.attacks()
+        strong = [attack for attack in attacks if self.game.board.get_area_by_name(attack[0]).get_dice() >= 4]
+        with RandomState(2):
+            battles, players = self.game.execute_attack_plan(attacks, False, 4)
+        self.assertEqual([(battle['atk']['name'], battle['def']['name']) for battle in battles], strong)
+
+        attacks = self.attacks()
+        with RandomState(3):
+            battles, players = self.game.execute_attack_plan(attacks, True, 2)
+        lost = [battle['def']['owner'] != self.player for battle in battles]
+        self.assertTrue(lost[-1])
+        self.assertNotIn(True, lost[:-1])
+
+
+class ClientBattleTests(unittest.TestCase):
+    def test_conquest_applied(self):
+        board, area_ownership = create_board(2, 3, 4, 5)
+        with RandomState(7):
+            game = LocalGame(board, area_ownership, ['dt.rand', 'dt.rand'])
+        client = game.clients[1]
+        source = next(area for area in client.board.areas_by_name[1:] if area.get_owner_name() == 1)
+        target = next(
+            client.board.get_area(name) for name in source.get_adjacent_areas()
+            if client.board.get_area(name).get_owner_name() == 2
+        )
+        result = {
+            'atk': {'name': str(source.get_name()), 'dice': 1, 'owner': 1, 'pwr': 10},
+            'def': {'name': target.get_name(), 'dice': 3, 'owner': 1, 'pwr': 5},
+        }
+        self.assertEqual(client.apply_battle(result, {'1': 7, '2': 2}), (1, 2))
+        self.assertEqual((source.get_dice(), target.get_dice(), target.get_owner_name()), (1, 3, 1))
+        self.assertEqual((client.players[1].get_score(), client.players[2].get_score()), (7, 2))
+
+
+class IllegalMoveTests(unittest.TestCase):
+    def setUp(self):
+        board, area_ownership = create_board(2, 3, 4, 5)
+        with RandomState(7):
+            self.game = LocalGame(board, area_ownership, ['dt.rand', 'dt.rand'])
+
+    def area(self, owned, min_dice=1, max_dice=8):
+        player = self.game.current_player.get_name()
+        return next(
+            area for area in self.game.board.areas.values()
+            if (area.get_owner_name() == player) == owned and min_dice <= area.get_dice() <= max_dice
+        )
+
+    def assert_rejected(self, msg):
+        player = self.game.current_player.get_name()
+        nb_illegal_moves = len(self.game.summary.illegal_moves)
+        with RandomState(1):
+            self.game.handle_message(msg)
+        self.assertNotEqual(self.game.current_player.get_name(), player)
+        self.assertEqual(len(self.game.summary.illegal_moves), nb_illegal_moves + 1)
+        self.assertEqual(self.game.summary.nb_battles, 0)
+
+    def test_illegal_battles(self):
+        source = self.area(owned=True, min_dice=2)
+        far = next(area for area in self.game.board.areas.values() if area not in source.get_adjacent_areas())
+        self.assert_rejected({'type': 'battle', 'atk': source.get_name(), 'def': far.get_name()})
+
+        source = self.area(owned=True, max_dice=1)
+        target = self.area(owned=False)
+        self.assert_rejected({'type': 'battle', 'atk': source.get_name(), 'def': target.get_name()})
+        self.assert_rejected({'type': 'battle', 'atk': target.get_name(), 'def': source.get_name()})
+        self.assert_rejected({'type': 'battle', 'atk': 0, 'def': source.get_name()})
+        self.assert_rejected({'type': 'battle', 'atk': [1], 'def': '2'})
+
+    def test_illegal_plans(self):
+        source = self.area(owned=True, min_dice=2)
+        own = next(area for area in self.game.board.areas.values() if area.get_owner_name() == source.get_owner_name())
+        self.assert_rejected({
+            'type': 'attack_plan', 'attacks': [[source.get_name(), own.get_name()]], 'stop_on_loss': True, 'min_dice': 2,
+        })
+        self.assert_rejected({'type': 'attack_plan', 'attacks': [], 'stop_on_loss': True, 'min_dice': 2})
+        self.assert_rejected({'type': 'attack_plan', 'attacks': [[1, 2, 3]], 'stop_on_loss': True, 'min_dice': 2})
+
+    def test_recorded_in_summary(self):
+        player = self.game.current_player.get_nickname()
+        self.assert_rejected({'type': 'battle', 'atk': 0, 'def': 1})
+        self.assertEqual(self.game.summary.illegal_moves, [(player, 0)])
+
+    def test_stopped_by_client(self):
+        summary = play(['wrong', 'dt.sdc'], 4)
+        self.assertEqual(summary.illegal_moves, [])
+        self.assertEqual(summary.winner, 'dt.sdc (AI)')
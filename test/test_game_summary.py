@@ -1,3 +1,4 @@
+import pickle
 import unittest
 
 from dicewars.server.game.summary import GameSummary
@@ -31,3 +32,26 @@ class GameSummaryTests(unittest.TestCase):
 
         self.assertEqual(repr(reconstructed), repr(summary))
         self.assertEqual(reconstructed.nb_battles, 2)
+
+    def test_repr_loading_with_illegal_moves(self):
+        summary = GameSummary()
+        summary.set_winner('joe')
+        summary.add_illegal_move('cheater (AI)', 0)
+        summary.add_battle()
+        summary.add_elimination('cheater (AI)', 1)
+        reconstructed = GameSummary.from_repr(repr(summary))
+
+        self.assertEqual(repr(reconstructed), repr(summary))
+        self.assertEqual(reconstructed.illegal_moves, [('cheater (AI)', 0)])
+        self.assertEqual(reconstructed.eliminations, [('cheater (AI)', 1)])
+
+    def test_unpickling_without_illegal_moves(self):
+        summary = GameSummary()
+        summary.set_winner('joe')
+        summary.add_elimination('looser', 0)
+        del summary.illegal_moves
+        unpickled = pickle.loads(pickle.dumps(summary))
+
+        self.assertEqual(unpickled.illegal_moves, [])
+        self.assertEqual(unpickled.eliminations, [('looser', 0)])
+        self.assertEqual(repr(unpickled), 'Winner: joe\nBattles total: 0\nAfter 0 battles eliminated looser\n')
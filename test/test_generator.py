@@ -0,0 +1,71 @@
+import hashlib
+import json
+import unittest
+
+from dicewars.server.game import create_board
+from dicewars.server.game.game import MAX_REINFORCEMENT, max_reinforcement
+from dicewars.server.game.generator import BoardGenerator, CLASSIC_SHAPE, board_shape
+from dicewars.server.game.library import generate_board
+
+
+class BoardGeneratorTests(unittest.TestCase):
+    def test_same_boards_as_original_generator(self):
+        # digest of boards for seeds 0 to 49 generated by the original implementation
+        digest = hashlib.sha256()
+        for seed in range(50):
+            digest.update(json.dumps(generate_board(seed)).encode())
+        self.assertEqual(digest.hexdigest(), 'a51e23b8634f8020cbef4fd6451fe316d2a1e39c4d30525a1153a874e122101a')
+
+    def test_neighbours_symmetric(self):
+        board = generate_board(3)
+        for name, area in board.items():
+            self.assertNotIn(name, area['neighbours'])
+            for neighbour in area['neighbours']:
+                self.assertIn(name, board[neighbour]['neighbours'])
+
+    def test_hexes_in_one_area(self):
+        board = generate_board(4)
+        hexes = [h for area in board.values() for h in area['hexes']]
+        self.assertEqual(len(hexes), len(set(hexes)))
+
+    def test_grid_indices(self):
+        generator = BoardGenerator()
+        h = generator.random_hex()
+        self.assertEqual(generator.hex(generator.index(h.x, h.y)), h)
+        for offset, n in zip(generator.offsets, h.neighbours()):
+            self.assertEqual(generator.hex(generator.index(h.x, h.y) + offset), n)
+
+
+class BoardShapeTests(unittest.TestCase):
+    def test_classic_shape(self):
+        self.assertEqual(board_shape(), CLASSIC_SHAPE)
+        self.assertEqual(board_shape((29, 31), area_size=(12, 18)), CLASSIC_SHAPE)
+        self.assertEqual(generate_board(5, board_shape()), generate_board(5))
+
+    def test_large_board(self):
+        shape = board_shape(300)
+        self.assertGreater(shape.grid_width * shape.grid_height, 9 * 32 * 28)
+        board = generate_board(7, shape)
+        self.assertEqual(len(board), 300)
+        self.assertEqual(board, generate_board(7, shape))
+        for name, area in board.items():
+            for neighbour in area['neighbours']:
+                self.assertIn(name, board[neighbour]['neighbours'])
+
+    def test_full_grid(self):
+        board = generate_board(1, board_shape(100, grid=(10, 10)))
+        self.assertGreater(len(board), 0)
+        self.assertLess(len(board), 100)
+
+    def test_invalid_shape(self):
+        with self.assertRaises(ValueError):
+            board_shape((10, 5))
+        with self.assertRaises(ValueError):
+            board_shape(10, area_size=(0, 3))
+
+    def test_game_on_large_board(self):
+        board, ownership = create_board(8, 2, 3, 4, shape=board_shape(200))
+        self.assertEqual(board.get_number_of_areas(), 200)
+        self.assertEqual(set(ownership.values()), set(range(1, 9)))
+        self.assertEqual(max_reinforcement(board.get_number_of_areas()), 400)
+        self.assertEqual(max_reinforcement(31), MAX_REINFORCEMENT)
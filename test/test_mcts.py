@@ -0,0 +1,174 @@
+import multiprocessing
+import os
+import random
+import threading
+import unittest
+from multiprocessing import shared_memory
+from unittest import mock
+
+from dicewars.ai.mcts import AI, parallel
+from dicewars.ai.mcts.simulator import MAX_DICE, SimulatedGame
+from dicewars.ai.mcts.uct import END_TURN, UCTSearch
+from dicewars.client.ai_driver import BattleCommand, EndTurnCommand
+from dicewars.server.game.game import MAX_PASS_ROUNDS
+
+from helpers import create_client_board
+
+
+class SimulatedGameTests(unittest.TestCase):
+    def setUp(self):
+        self.board = create_client_board(3, 2, 3, 4)
+        self.game = SimulatedGame(self.board.compact, [2, 3, 1], 2)
+
+    def test_battle(self):
+        source, target = self.game.possible_attacks(2)[0]
+        dice = self.game.dice[source]
+        defender = self.game.owner[target]
+
+        lost = self.game.copy()
+        lost.battle(source, target, False)
+        self.assertEqual((lost.dice[source], lost.owner[target]), (1, defender))
+
+        self.game.battle(source, target, True)
+        self.assertEqual((self.game.dice[source], self.game.dice[target], self.game.owner[target]), (1, dice - 1, 2))
+        self.assertTrue(self.game.masks[2] & 1 << target)
+        self.assertFalse(self.game.masks[defender] & 1 << target)
+
+    def test_end_turn_reinforces_by_largest_region(self):
+        largest = self.board.compact.get_largest_region_size(2)
+        self.assertEqual(self.game.largest_region(2), largest)
+        dice = sum(self.game.dice[area] for area in self.game.player_areas(2))
+
+        self.game.end_turn(random.Random(0))
+        self.assertEqual(sum(self.game.dice[area] for area in self.game.player_areas(2)), dice + largest)
+        self.assertEqual(self.game.current_player, 3)
+
+    def test_full_areas_leave_reserve(self):
+        for area in self.game.player_areas(2):
+            self.game.dice[area] = MAX_DICE - 1
+        self.game.reserves[2] = 70
+        self.game.end_turn(random.Random(0))
+        self.assertEqual(self.game.reserves[2], 64 - len(self.game.player_areas(2)))
+        self.assertTrue(all(self.game.dice[area] == MAX_DICE for area in self.game.player_areas(2)))
+
+    def test_eliminated_players_are_skipped(self):
+        for area in self.game.player_areas(3):
+            self.game.owner[area] = 1
+        self.game.masks[1] |= self.game.masks[3]
+        self.game.masks[3] = 0
+        self.game.end_turn(random.Random(0))
+        self.assertEqual(self.game.current_player, 1)
+
+    def test_passing_cancels_game(self):
+        rng = random.Random(0)
+        for _ in range(3 * MAX_PASS_ROUNDS - 1):
+            self.game.end_turn(rng)
+        self.assertIsNone(self.game.winner)
+        self.game.end_turn(rng)
+        self.assertEqual(self.game.winner, -1)
+
+    def test_rollout(self):
+        value = self.game.copy().rollout(2, random.Random(0), 1000)
+        self.assertEqual(value, self.game.copy().rollout(2, random.Random(0), 1000))
+        self.assertGreaterEqual(value, 0.0)
+        self.assertLessEqual(value, 1.0)
+
+
+class UCTSearchTests(unittest.TestCase):
+    def setUp(self):
+        self.board = create_client_board(2, 5, 6, 7)
+
+    def test_subtree_is_reused(self):
+        search = UCTSearch(1, random.Random(0), rollout_turns=4)
+        game = SimulatedGame(self.board.compact, [1, 2], 1)
+        self.assertFalse(search.set_root(game))
+        for _ in range(300):
+            search.iterate()
+        self.assertEqual(search.nb_rollouts, 300)
+        self.assertEqual(search.root.visits, 300)
+
+        action = search.best_action()
+        self.assertIn(action, search.root.actions)
+        if action is END_TURN:
+            return
+        game.battle(*action, True)
+        child = search.root.children[action].outcomes[True]
+        self.assertTrue(search.set_root(game))
+        self.assertIs(search.root, child)
+
+    def test_priors_seed_root(self):
+        search = UCTSearch(1, random.Random(0), rollout_turns=4)
+        search.set_root(SimulatedGame(self.board.compact, [1, 2], 1))
+        attack = search.root.actions[0]
+        search.seed_root({attack: (30, 20.0), END_TURN: (10, 2.0), (-1, -1): (100, 0.0)}, 20.0)
+
+        self.assertEqual(search.root_statistics(), {attack: (15.0, 10.0), END_TURN: (5.0, 1.0)})
+        self.assertEqual(search.root.visits, 20.0)
+        self.assertNotIn(attack, search.root.untried)
+        for _ in range(50):
+            search.iterate()
+        self.assertEqual(search.root.visits, 70.0)
+
+    def test_pondering(self):
+        ai = AI(2, self.board.snapshot(), [1, 2])
+        board = self.board.snapshot()
+        for _ in range(5):
+            self.assertTrue(ai.ponder(board, 1, threading.Event()))
+        self.assertTrue(ai.priors)
+
+        command = ai.ai_turn(self.board.snapshot(), 0, 0, 1.0)
+        self.assertIsInstance(command, (BattleCommand, EndTurnCommand))
+        self.assertEqual(ai.priors, {})
+
+
+def turn_in_daemonic_process(nb_workers):
+    """Construct the parallel AI in the current process and let it move once
+    """
+    board = create_client_board(2, 5, 6, 7)
+    ai = parallel.AI(1, board.snapshot(), [1, 2], nb_workers=nb_workers)
+    try:
+        command = ai.ai_turn(board.snapshot(), 0, 0, 0.5)
+        return len(ai.processes), type(command).__name__, ai.shared.name
+    finally:
+        ai.close()
+
+
+class ParallelAITests(unittest.TestCase):
+    def setUp(self):
+        self.board = create_client_board(2, 5, 6, 7)
+        self.ai = parallel.AI(1, self.board.snapshot(), [1, 2], nb_workers=2)
+        self.addCleanup(self.ai.close)
+
+    def test_statistics_of_workers_are_merged(self):
+        command = self.ai.ai_turn(self.board.snapshot(), 0, 0, 3.0)
+        self.assertIsInstance(command, (BattleCommand, EndTurnCommand))
+
+        statistics = self.ai.search_root(parallel.Deadline(0.05))
+        own_statistics = self.ai.search.root_statistics()
+        self.assertGreater(sum(v for v, _ in statistics.values()), sum(v for v, _ in own_statistics.values()))
+
+    def test_number_of_workers_from_environment(self):
+        with mock.patch.dict(os.environ, {parallel.NB_WORKERS_VARIABLE: '0'}):
+            ai = parallel.AI(1, self.board.snapshot(), [1, 2])
+        self.addCleanup(ai.close)
+        self.assertEqual(ai.processes, [])
+        self.assertEqual(len(self.ai.processes), 2)
+
+        command = ai.ai_turn(self.board.snapshot(), 0, 0, 1.0)
+        self.assertIsInstance(command, (BattleCommand, EndTurnCommand))
+
+    def test_constructed_in_pool_worker(self):
+        with multiprocessing.get_context('fork').Pool(1) as pool:
+            nb_processes, command, shared_name = pool.apply(turn_in_daemonic_process, (2,))
+        self.assertEqual(nb_processes, 0)
+        self.assertIn(command, ['BattleCommand', 'EndTurnCommand'])
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=shared_name)
+
+    def test_close_stops_workers(self):
+        self.assertTrue(all(process.is_alive() for process in self.ai.processes))
+        self.ai.close()
+        self.assertFalse(any(process.is_alive() for process in self.ai.processes))
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=self.ai.shared.name)
+        self.ai.close()
@@ -0,0 +1,65 @@
+import unittest
+
+from dicewars.ai.planning import AttackPlanner, plan_attacks
+from dicewars.ai.utils import possible_attacks
+
+from helpers import create_client_board
+
+
+class AttackPlannerTests(unittest.TestCase):
+    def setUp(self):
+        self.board = create_client_board(3, 5, 6, 7)
+        self.player = 1
+        self.plans = []
+
+    def make_plan(self, board):
+        attacks = [(source.get_name(), target.get_name()) for source, target in possible_attacks(board, self.player)]
+        self.plans.append(attacks)
+        return plan_attacks(board, attacks)
+
+    def test_plan_uses_every_area_once(self):
+        plan = self.make_plan(self.board)
+        self.assertTrue(plan)
+        areas = [area for attack in plan for area in (attack.source, attack.target)]
+        self.assertEqual(len(areas), len(set(areas)))
+        self.assertEqual(plan[0][:2], self.plans[0][0])
+
+    def test_plan_kept_over_battles(self):
+        planner = AttackPlanner(self.player, self.make_plan)
+        plan = self.make_plan(self.board)
+        self.assertGreater(len(plan), 1)
+
+        compact = self.board.compact
+        for attack in plan:
+            self.assertEqual(planner.next_attack(self.board, 0), attack[:2])
+            compact.set_owner(attack.target, self.player)
+            compact.set_dice(attack.target, compact.get_dice(attack.source) - 1)
+            compact.set_dice(attack.source, 1)
+        self.assertEqual(planner.nb_plans, 1)
+        self.assertEqual(planner.nb_attacks, len(plan))
+
+    def test_invalid_plan_replaced(self):
+        planner = AttackPlanner(self.player, self.make_plan)
+        first = planner.next_attack(self.board, 0)
+        second = planner.plan[0]
+
+        self.board.compact.set_dice(first[0], 1)
+        self.board.compact.set_dice(second.target, second.target_dice + 1)
+        attack = planner.next_attack(self.board, 0)
+        self.assertEqual(planner.nb_plans, 2)
+        self.assertNotEqual(attack, first)
+
+        planner.next_attack(self.board, 1)
+        self.assertEqual(planner.nb_plans, 3)
+
+    def test_nothing_left(self):
+        planner = AttackPlanner(self.player, lambda board: [])
+        self.assertIsNone(planner.next_attack(self.board, 0))
+        self.assertEqual(planner.nb_plans, 1)
+
+    def test_whole_plan_taken(self):
+        planner = AttackPlanner(self.player, self.make_plan)
+        plan = self.make_plan(self.board)
+        self.assertEqual(planner.next_plan(self.board, 0), [attack[:2] for attack in plan])
+        self.assertEqual(planner.nb_attacks, len(plan))
+        self.assertFalse(planner.plan)
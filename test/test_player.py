@@ -0,0 +1,60 @@
+import random
+import unittest
+
+from dicewars.server.game import create_board
+from dicewars.server.game.player import Player
+
+
+def largest_region(board, player_name):
+    areas = {a.get_name() for a in board.areas.values() if a.get_owner_name() == player_name}
+    largest = 0
+    while areas:
+        stack = [areas.pop()]
+        size = 1
+        while stack:
+            for adj in board.get_area_by_name(stack.pop()).get_adjacent_areas_names():
+                if adj in areas:
+                    areas.remove(adj)
+                    stack.append(adj)
+                    size += 1
+        largest = max(largest, size)
+    return largest
+
+
+class PlayerRegionsTests(unittest.TestCase):
+    def setUp(self):
+        self.board, ownership = create_board(3, 4, 5, 6)
+        self.players = {name: Player(name) for name in range(1, 4)}
+        for area_name, player_name in ownership.items():
+            area = self.board.get_area_by_name(area_name)
+            area.set_owner_name(player_name)
+            self.players[player_name].add_area(area)
+
+    def transfer(self, area, new_owner):
+        old_owner = area.get_owner_name()
+        area.set_owner_name(new_owner)
+        self.players[new_owner].add_area(area)
+        self.players[old_owner].remove_area(area)
+
+    def assert_scores(self):
+        for name, player in self.players.items():
+            self.assertEqual(player.get_largest_region(self.board), largest_region(self.board, name))
+
+    def test_initial_scores(self):
+        self.assert_scores()
+
+    def test_scores_follow_conquests(self):
+        rng = random.Random(42)
+        for _ in range(500):
+            area = self.board.get_area_by_name(rng.randint(1, self.board.get_number_of_areas()))
+            enemies = [adj.get_owner_name() for adj in area.get_adjacent_areas()
+                       if adj.get_owner_name() != area.get_owner_name()]
+            if enemies:
+                self.transfer(area, rng.choice(enemies))
+                self.assert_scores()
+
+    def test_areas_are_not_reordered(self):
+        player = self.players[1]
+        areas = list(player.get_areas())
+        player.get_largest_region(self.board)
+        self.assertEqual(player.get_areas(), areas)
@@ -0,0 +1,79 @@
+import json
+import unittest
+
+from dicewars.protocol import (
+    FRAMED, LEGACY, RECORD_MAP, FRAME_HEADER, SUBSCRIPTION_DELTA, SUBSCRIPTION_FULL, FrameDecoder,
+    choose_protocol, choose_subscription, encode_frame,
+)
+
+
+def as_received(msg):
+    return json.loads(json.dumps(msg))
+
+
+class ProtocolTests(unittest.TestCase):
+    def setUp(self):
+        self.battle = {
+            'type': 'battle',
+            'result': {
+                'atk': {'name': 3, 'dice': 1, 'owner': 1, 'pwr': 17},
+                'def': {'name': 12, 'dice': 7, 'owner': 1, 'pwr': 9},
+            },
+            'score': {1: 12, 2: 5},
+            'areas': {3: {'owner': 1, 'dice': 1}, 12: {'owner': 1, 'dice': 7}},
+        }
+        self.end_turn = {
+            'type': 'end_turn',
+            'current_player': 2,
+            'reserves': {1: 0, 2: 3},
+            'score': {1: 12, 2: 5},
+            'areas': {5: {'owner': 1, 'dice': 8}},
+        }
+
+    def decode(self, msg):
+        messages = FrameDecoder().feed(encode_frame(msg))
+        self.assertEqual(len(messages), 1)
+        return messages[0]
+
+    def test_negotiation(self):
+        self.assertEqual(choose_protocol({'type': 'client_desc', 'nickname': 'x'}), LEGACY)
+        self.assertEqual(choose_protocol({'protocols': [LEGACY]}), LEGACY)
+        self.assertEqual(choose_protocol({'protocols': [FRAMED, LEGACY]}), FRAMED)
+        self.assertEqual(choose_subscription({'type': 'client_desc', 'nickname': 'x'}), SUBSCRIPTION_FULL)
+        self.assertEqual(choose_subscription({'subscription': SUBSCRIPTION_DELTA}), SUBSCRIPTION_DELTA)
+
+    def test_records_roundtrip(self):
+        battles = {
+            'type': 'battles',
+            'results': [self.battle['result'], self.battle['result']],
+            'score': self.battle['score'],
+            'areas': self.battle['areas'],
+        }
+        plan = {'type': 'attack_plan', 'attacks': [[3, 12], [5, 7]], 'stop_on_loss': True, 'min_dice': 3}
+        for msg in [self.battle, battles, self.end_turn, plan, {'type': 'end_turn'}, {'type': 'battle', 'atk': 4, 'def': 600}]:
+            self.assertEqual(self.decode(msg), as_received(msg))
+
+    def test_records_are_packed(self):
+        frame = encode_frame(self.battle)
+        self.assertNotEqual(frame[FRAME_HEADER.size], RECORD_MAP)
+        self.assertLess(len(frame), len(json.dumps(self.battle)))
+
+    def test_map_fallback(self):
+        msg = {'type': 'game_end', 'winner': 2}
+        frame = encode_frame(msg)
+        self.assertEqual(frame[FRAME_HEADER.size], RECORD_MAP)
+        self.assertEqual(self.decode(msg), msg)
+
+        # values not fitting the records are sent as a map as well
+        msg = dict(self.end_turn, current_player=1000)
+        self.assertEqual(self.decode(msg), as_received(msg))
+
+    def test_split_and_merged_frames(self):
+        stream = encode_frame(self.battle) + encode_frame(self.end_turn) + encode_frame({'type': 'game_end', 'winner': 1})
+        decoder = FrameDecoder()
+        messages = []
+        for i in range(0, len(stream), 7):
+            messages.extend(decoder.feed(stream[i:i+7]))
+        self.assertEqual(messages, [as_received(self.battle), as_received(self.end_turn), {'type': 'game_end', 'winner': 1}])
+
+        self.assertEqual(len(FrameDecoder().feed(stream)), 3)
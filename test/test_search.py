@@ -0,0 +1,85 @@
+import random
+import unittest
+
+from dicewars.ai import xsismi01
+from dicewars.ai.search import MAX_OWNER, SearchBoard, TranspositionTable, ZobristKeys
+from dicewars.ai.utils import attack_succcess_probability
+from dicewars.client.ai_driver import BattleCommand, EndTurnCommand
+from dicewars.server.game import board_shape
+
+from helpers import create_client_board
+
+
+class SearchBoardTests(unittest.TestCase):
+    def setUp(self):
+        self.board = create_client_board(3, 5, 6, 7)
+        self.keys = ZobristKeys(len(self.board.compact.owner))
+
+    def some_attack(self, search):
+        for source in self.board.compact.names.tolist():
+            for target in search.enemy_neighbours(source, search.owner[source]):
+                if search.dice[source] > 1:
+                    return source, target
+
+    def test_unmake_restores_position(self):
+        search = SearchBoard(self.board.compact, self.keys)
+        start = (list(search.owner), list(search.dice), search.hash)
+        rng = random.Random(0)
+        for _ in range(20):
+            source, target = self.some_attack(search)
+            if rng.random() < 0.5:
+                search.make_attack(source, target)
+                self.assertEqual(search.owner[target], search.owner[source])
+            else:
+                search.make_failed_attack(source)
+            self.assertEqual(search.dice[source], 1)
+        for _ in range(20):
+            search.unmake()
+
+        self.assertEqual((search.owner, search.dice, search.hash), start)
+        self.assertEqual(self.board.compact.owner.tolist(), start[0])
+
+    def test_hash_depends_only_on_position(self):
+        search = SearchBoard(self.board.compact, self.keys)
+        start = search.hash
+        source, target = self.some_attack(search)
+        search.make_attack(source, target)
+        self.assertNotEqual(search.hash, start)
+
+        compact = self.board.compact.copy()
+        compact.owner[:] = search.owner
+        compact.dice[:] = search.dice
+        self.assertEqual(SearchBoard(compact, self.keys).hash, search.hash)
+
+    def test_attack_chance(self):
+        search = SearchBoard(self.board.compact, self.keys)
+        source, target = self.some_attack(search)
+        probability = attack_succcess_probability(search.dice[source], search.dice[target])
+        value = search.attack_chance(source, target, lambda: float(search.owner[target] == search.owner[source]))
+        self.assertAlmostEqual(value, probability)
+        self.assertEqual(search.undo_stack, [])
+
+
+class TranspositionTableTests(unittest.TestCase):
+    def test_oldest_entries_are_dropped(self):
+        table = TranspositionTable(3)
+        for key in range(5):
+            table.put(key, key * 2)
+        self.assertEqual(len(table), 3)
+        self.assertNotIn(1, table)
+        self.assertEqual(table.get(4), 8)
+        table.put(2, 0)
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.get(2), 0)
+
+
+class LargeBoardSearchTests(unittest.TestCase):
+    def test_xsismi01_on_more_areas_than_owners(self):
+        for nb_players in [2, 4]:
+            board = create_client_board(nb_players, 1, 2, 3, shape=board_shape(200))
+            self.assertGreater(board.compact.get_number_of_areas(), MAX_OWNER)
+
+            for player in range(1, nb_players + 1):
+                ai = xsismi01.AI(player, board.snapshot(), list(range(1, nb_players + 1)))
+                command = ai.ai_turn(board.snapshot(), 0, 0, 10.0)
+                self.assertIsInstance(command, (BattleCommand, EndTurnCommand))
@@ -0,0 +1,68 @@
+import asyncio
+import json
+import unittest
+
+from dicewars.server.game.summary import GameSummary
+from dicewars.server.sessions import SessionServer
+
+
+async def read_messages(reader):
+    buffer = b''
+    while True:
+        data = await reader.read(65535)
+        if not data:
+            return
+        buffer += data
+        *messages, buffer = buffer.split(b'\0')
+        for msg in messages:
+            yield json.loads(msg.decode())
+
+
+async def passive_client(port, session, nickname):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(str.encode(json.dumps({'type': 'client_desc', 'nickname': nickname, 'session': session})))
+
+    player_name = None
+    async for msg in read_messages(reader):
+        if msg['type'] == 'game_start':
+            player_name = msg['player']
+        elif msg['type'] == 'game_end':
+            break
+        elif msg.get('current_player') == player_name:
+            writer.write(str.encode(json.dumps({'type': 'end_turn'})))
+    writer.close()
+
+
+async def launch(port, session, nicknames):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(str.encode(json.dumps({
+        'type': 'session_desc', 'session': session, 'nb_players': len(nicknames), 'order': nicknames,
+        'board': 1, 'ownership': 2, 'strength': 3, 'fixed': 4,
+    })))
+    response = await reader.read()
+    return GameSummary.from_repr(json.loads(response.decode().rstrip('\0'))['summary'])
+
+
+class SessionServerTests(unittest.TestCase):
+    def test_concurrent_sessions(self):
+        async def play_sessions():
+            session_server = SessionServer('127.0.0.1', 0)
+            server = await asyncio.start_server(session_server.handle_connection, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+
+            tasks = []
+            for session in ['first', 'second']:
+                nicknames = ['{}-{}'.format(session, i) for i in range(3)]
+                tasks.append(launch(port, session, nicknames))
+                tasks.extend(passive_client(port, session, nick) for nick in reversed(nicknames))
+            results = await asyncio.gather(*tasks)
+            server.close()
+            return results[0], results[4], session_server
+
+        first, second, session_server = asyncio.run(play_sessions())
+
+        for summary, session in [(first, 'first'), (second, 'second')]:
+            self.assertEqual(summary.winner, '#None')
+            self.assertEqual(summary.nb_battles, 0)
+            self.assertEqual(sorted(summary.participants()[:-1]), ['{}-{}'.format(session, i) for i in range(3)])
+        self.assertEqual(session_server.sessions, {})
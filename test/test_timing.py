@@ -0,0 +1,64 @@
+import time
+import unittest
+
+from dicewars.ai.timing import Deadline, SearchTimeout, TimeManager, iterative_deepening
+
+
+class TimeManagerTests(unittest.TestCase):
+    def test_clock_lasts_for_expected_moves(self):
+        manager = TimeManager(expected_turns=20, min_turns_left=5, moves_per_turn=3.0, increment=0.1, reserve=0.3)
+        time_left = 10.0
+        for turn in range(20):
+            for move in range(3):
+                budget = manager.start_move(time_left, move, turn).budget
+                self.assertGreater(budget, 0.1)
+                self.assertLessEqual(budget, time_left - 0.3)
+                time_left += 0.1 - budget
+        self.assertGreater(time_left, 0.3)
+
+    def test_budget_never_reaches_reserve(self):
+        manager = TimeManager(reserve=0.3)
+        self.assertEqual(manager.start_move(0.35, 0, 100).budget, 0.35 - 0.3)
+        self.assertEqual(manager.start_move(0.2, 0, 100).budget, 0.0)
+
+    def test_moves_per_turn_follow_observation(self):
+        manager = TimeManager(moves_per_turn=4.0)
+        for turn in range(10):
+            manager.start_move(10.0, 0, turn)
+        self.assertEqual(manager.moves_per_turn, 1.0)
+
+
+class IterativeDeepeningTests(unittest.TestCase):
+    def test_deepest_finished_search_is_returned(self):
+        deadline = Deadline(0.2)
+
+        def search(depth):
+            if depth == 4:
+                while True:
+                    deadline.check()
+            return depth * 10
+
+        self.assertEqual(iterative_deepening(search, deadline, growth=0.0), (30, 3))
+        self.assertTrue(deadline.expired())
+
+    def test_fallback_without_finished_search(self):
+        deadline = Deadline(0.0)
+
+        def search(depth):
+            deadline.check()
+
+        self.assertEqual(iterative_deepening(search, deadline, best='end'), ('end', None))
+        with self.assertRaises(SearchTimeout):
+            deadline.check()
+
+    def test_no_search_started_without_time_for_it(self):
+        deadline = Deadline(0.05)
+        depths = []
+
+        def search(depth):
+            depths.append(depth)
+            time.sleep(0.02)
+            return depth
+
+        self.assertEqual(iterative_deepening(search, deadline, max_depth=10, growth=2.0), (1, 1))
+        self.assertEqual(depths, [1])
@@ -0,0 +1,109 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+from dicewars.server.game import Game, create_board
+from dicewars.transport import InheritedTransport, TcpTransport, UnixTransport
+
+
+def connect(transport):
+    while True:
+        try:
+            return transport.connect()
+        except ConnectionRefusedError:
+            time.sleep(0.01)
+
+
+def passive_client(transport, nickname):
+    """Client ending every turn, in the legacy protocol
+    """
+    sock = connect(transport)
+    sock.sendall(str.encode(json.dumps({'type': 'client_desc', 'nickname': nickname})))
+
+    player_name = None
+    buffer = b''
+    while True:
+        data = sock.recv(65535)
+        if not data:
+            break
+        buffer += data
+        *messages, buffer = buffer.split(b'\0')
+        for msg in map(json.loads, messages):
+            if msg['type'] == 'game_start':
+                player_name = msg['player']
+            elif msg['type'] == 'game_end':
+                sock.close()
+                return
+            elif msg.get('current_player') == player_name:
+                sock.sendall(str.encode(json.dumps({'type': 'end_turn'})))
+    sock.close()
+
+
+def play(server_transport, client_transports):
+    nicknames = ['first', 'second', 'third']
+    clients = []
+    for transport, nickname in zip(client_transports, nicknames):
+        client = threading.Thread(target=passive_client, args=(transport, nickname))
+        client.start()
+        clients.append(client)
+
+    board, area_ownership = create_board(3, 1, 2, 3)
+    game = Game(board, area_ownership, 3, None, None, nicknames, server_transport)
+    summary = game.play()
+    game.close_connections()
+    for client in clients:
+        client.join()
+    return summary
+
+
+class TransportTests(unittest.TestCase):
+    def check_summary(self, summary):
+        self.assertEqual(summary.winner, '#None')
+        self.assertEqual(sorted(summary.participants()[:-1]), ['first', 'second', 'third'])
+
+    def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'server.sock')
+            stale = socket.socket(socket.AF_UNIX)
+            stale.bind(path)
+            stale.close()
+
+            transport = UnixTransport(path)
+            summary = play(transport, [UnixTransport(path)] * 3)
+            self.check_summary(summary)
+            self.assertFalse(os.path.exists(path))
+
+    def test_inherited_socketpairs(self):
+        pairs = [socket.socketpair() for _ in range(3)]
+        summary = play(
+            InheritedTransport([server_end.detach() for server_end, _ in pairs]),
+            [InheritedTransport([client_end.detach()]) for _, client_end in pairs],
+        )
+        self.check_summary(summary)
+
+    def test_inherited_connections_must_suffice(self):
+        transport = InheritedTransport([])
+        with self.assertRaises(ValueError):
+            transport.listen(2)
+
+    def test_unix_connection_refused_before_server_starts(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ConnectionRefusedError):
+                UnixTransport(os.path.join(directory, 'server.sock')).connect()
+
+    def test_tcp_transport(self):
+        transport = TcpTransport('127.0.0.1', 0)
+        transport.bind()
+        transport.listen(1)
+        client = TcpTransport('127.0.0.1', transport.socket.getsockname()[1]).connect()
+        connection, address = transport.accept()
+        client.sendall(b'hello')
+        self.assertEqual(connection.recv(5), b'hello')
+        self.assertEqual(address[0], '127.0.0.1')
+        for sock in [client, connection]:
+            sock.close()
+        transport.close()
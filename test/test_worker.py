@@ -0,0 +1,90 @@
+import json
+import socket
+import threading
+import unittest
+from unittest.mock import patch
+
+from dicewars.ai.dt import rand
+from dicewars.client.worker import AIWorker
+from dicewars.server.game import Game, create_board
+from dicewars.transport import InheritedTransport
+
+
+def passive_client(sock):
+    """Client ending every turn, in the legacy protocol
+    """
+    sock.sendall(str.encode(json.dumps({'type': 'client_desc', 'nickname': 'passive'})))
+
+    player_name = None
+    buffer = b''
+    while True:
+        data = sock.recv(65535)
+        if not data:
+            break
+        buffer += data
+        *messages, buffer = buffer.split(b'\0')
+        for msg in map(json.loads, messages):
+            if msg['type'] == 'game_start':
+                player_name = msg['player']
+            elif msg['type'] == 'game_end':
+                sock.close()
+                return
+            elif msg.get('current_player') == player_name:
+                sock.sendall(str.encode(json.dumps({'type': 'end_turn'})))
+    sock.close()
+
+
+class ClosedAI(rand.AI):
+    """Random AI recording that it was closed at the end of its game
+    """
+    closed = []
+
+    def close(self):
+        self.closed.append(self.player_name)
+
+
+class AIWorkerTests(unittest.TestCase):
+    def test_series_of_games(self):
+        ClosedAI.closed = []
+        control, worker_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+
+        server_connections = []
+        for seed in [11, 12]:
+            server_end, client_end = socket.socketpair()
+            passive_server_end, passive_client_end = socket.socketpair()
+            server_connections.append((server_end, passive_server_end, passive_client_end))
+            command = {'type': 'play', 'ai': 'dt.rand', 'seed': seed}
+            socket.send_fds(control, [str.encode(json.dumps(command))], [client_end.fileno()])
+            client_end.close()
+        control.shutdown(socket.SHUT_WR)
+
+        summaries = []
+        server = threading.Thread(target=self.serve, args=(server_connections, summaries))
+        server.start()
+        with patch('dicewars.client.worker.get_ai_constructor', return_value=ClosedAI):
+            with self.assertLogs('WORKER', 'INFO') as logs:
+                AIWorker(worker_end).run()
+        server.join()
+
+        self.assertEqual([json.loads(control.recv(65535))['type'] for _ in range(2)], ['game_over', 'game_over'])
+        self.assertEqual(len(summaries), 2)
+        for summary in summaries:
+            self.assertEqual(sorted(summary.participants()), ['dt.rand (AI)', 'passive'])
+        # the AIs were closed as the games ended, not after losing the connection
+        self.assertEqual(len(ClosedAI.closed), 2)
+        self.assertEqual([record.levelname for record in logs.records], ['INFO', 'INFO'])
+        control.close()
+        worker_end.close()
+
+    def serve(self, connections, summaries):
+        for board_seed, (server_end, passive_server_end, passive_client_end) in enumerate(connections):
+            client = threading.Thread(target=passive_client, args=(passive_client_end,))
+            client.start()
+
+            board, area_ownership = create_board(2, board_seed, 2, 3)
+            transport = InheritedTransport([server_end.detach(), passive_server_end.detach()])
+            game = Game(board, area_ownership, 2, None, None, None, transport)
+            summaries.append(game.play())
+            for sock in game.client_sockets.values():
+                sock.close()
+            client.join()
@@ -0,0 +1,135 @@
+import unittest
+
+import numpy
+
+from dicewars.ai.dt import wpm_c, wpm_d, wpm_s
+from dicewars.ai.dt.wpm import WPMEvaluator
+from dicewars.ai.utils import possible_attacks, probability_of_successful_attack, sigmoid
+from dicewars.client.ai_driver import BattleCommand, EndTurnCommand
+
+from helpers import create_client_board
+
+
+def per_attack_turns_c(ai):
+    """Turns of wpm_c computed attack by attack, as before the WPMEvaluator
+    """
+    board, name = ai.board, ai.player_name
+
+    def features_of(end_turn=False):
+        features = []
+        for p in ai.players_order:
+            dice = board.get_player_dice(p)
+            if end_turn and p == name:
+                dice += ai.get_score_by_player(p)
+            features.extend([numpy.log(ai.get_score_by_player(p) + 1), numpy.log(dice + 1)])
+        return features
+
+    features = features_of()
+    wp_start = numpy.log(sigmoid(numpy.dot(features, ai.weights)))
+    wp_end = numpy.log(sigmoid(numpy.dot(features_of(end_turn=True), ai.weights)))
+    turns = [['end', 0, wp_end - wp_start]]
+
+    for source, target in possible_attacks(board, name):
+        increase_score = source.get_name() in ai.largest_region or any(
+            n in ai.largest_region for n in target.get_adjacent_areas()
+        )
+        a_dice = board.get_player_dice(name)
+        a_score = ai.get_score_by_player(name) + increase_score
+        d_dice = board.get_player_dice(target.get_owner_name())
+        opponent_idx = ai.players_order.index(target.get_owner_name()) * 2 + 1
+
+        win_features = list(features)
+        win_features[1] = numpy.log(a_dice + a_score + 1)
+        win_features[opponent_idx] = numpy.log(d_dice - target.get_dice() + 1)
+        loss_features = list(features)
+        loss_features[1] = numpy.log(a_dice + a_score - source.get_dice() + 1 + 1)
+        loss_features[opponent_idx] = numpy.log(d_dice + 1)
+
+        atk_prob = probability_of_successful_attack(board, source.get_name(), target.get_name())
+        wp_win = sigmoid(numpy.dot(win_features, ai.weights))
+        wp_loss = sigmoid(numpy.dot(loss_features, ai.weights))
+        improvement = numpy.log(wp_win * atk_prob + wp_loss * (1.0 - atk_prob)) - wp_start
+        turns.append([source.get_name(), target.get_name(), improvement])
+
+    return sorted(turns, key=lambda turn: turn[2], reverse=True)
+
+
+def per_attack_turns_s(ai):
+    """Turns of wpm_s computed attack by attack, as before the WPMEvaluator
+    """
+    board, name = ai.board, ai.player_name
+    features = [ai.get_score_by_player(p) for p in ai.players_order]
+    win_prob = numpy.log(sigmoid(numpy.dot(features, ai.weights)))
+    ai.get_largest_region()
+
+    turns = []
+    for source, target in possible_attacks(board, name):
+        increase_score = source.get_name() in ai.largest_region or any(
+            n in ai.largest_region for n in target.get_adjacent_areas()
+        )
+        if not increase_score and source.get_dice() != 8:
+            continue
+        new_features = []
+        for i, p in enumerate(ai.players_order):
+            if p == name:
+                new_features.append(features[i] + 1 if increase_score else features[i])
+            elif p == target.get_owner_name():
+                new_features.append(ai.get_score_by_player(p, skip_area=target.get_name()))
+            else:
+                new_features.append(features[i])
+        atk_prob = numpy.log(probability_of_successful_attack(board, source.get_name(), target.get_name()))
+        improvement = numpy.log(sigmoid(numpy.dot(new_features, ai.weights))) + atk_prob - win_prob
+        if improvement >= -1:
+            turns.append([source.get_name(), target.get_name(), improvement])
+
+    return sorted(turns, key=lambda turn: turn[2], reverse=True)
+
+
+class WPMEvaluatorTests(unittest.TestCase):
+    def setUp(self):
+        self.board = create_client_board(3, 7, 8, 9)
+        self.evaluator = WPMEvaluator(numpy.array([0.5, -0.2, -0.3]), [2, 3, 1])
+
+    def test_player_dice(self):
+        dice = self.evaluator.player_dice(self.board)
+        self.assertEqual(dice.tolist(), [self.board.get_player_dice(p) for p in [2, 3, 1]])
+        self.assertIs(self.evaluator.player_dice(self.board), dice)
+
+        self.board.get_area(1).set_dice(self.board.get_area(1).get_dice() % 8 + 1)
+        self.assertEqual(self.evaluator.player_dice(self.board).tolist(), [self.board.get_player_dice(p) for p in [2, 3, 1]])
+
+    def test_attacks(self):
+        sources, targets, atk_dice, def_dice, opponents, _ = self.evaluator.attacks(self.board, 2)
+        expected = [(s.get_name(), t.get_name()) for s, t in possible_attacks(self.board, 2)]
+        self.assertEqual(list(zip(sources.tolist(), targets.tolist())), expected)
+        self.assertEqual(
+            [[2, 3, 1][i] for i in opponents], [self.board.get_area(t).get_owner_name() for t in targets.tolist()]
+        )
+
+    def test_win_probabilities_of_rows(self):
+        features = self.evaluator.outcome_matrix([1.0, 2.0, 3.0], 4)
+        features[1:, 1] = [0.5, 1.5, 2.5]
+        expected = [sigmoid(numpy.dot(row, self.evaluator.weights)) for row in features]
+        self.assertTrue(numpy.allclose(self.evaluator.win_probabilities(features), expected))
+
+
+class WPMAgentsTests(unittest.TestCase):
+    def test_agents_move(self):
+        board = create_client_board(4, 1, 2, 3)
+        for module in [wpm_c, wpm_d, wpm_s]:
+            ai = module.AI(1, board.snapshot(), [3, 1, 4, 2])
+            command = ai.ai_turn(board.snapshot(), 0, 0, 10.0)
+            self.assertIsInstance(command, (BattleCommand, EndTurnCommand))
+
+    def test_possible_turns_as_per_attack(self):
+        for nb_players, seeds in [(2, (1, 2, 3)), (4, (4, 5, 6))]:
+            board = create_client_board(nb_players, *seeds)
+            for module, per_attack_turns in [(wpm_c, per_attack_turns_c), (wpm_s, per_attack_turns_s)]:
+                for player in range(1, nb_players + 1):
+                    ai = module.AI(player, board, list(range(1, nb_players + 1)))
+                    ai.board = board
+                    ai.get_largest_region()
+                    turns = ai.possible_turns()
+                    expected = per_attack_turns(ai)
+                    self.assertEqual([turn[:2] for turn in turns], [turn[:2] for turn in expected])
+                    self.assertTrue(numpy.allclose([turn[2] for turn in turns], [turn[2] for turn in expected]))